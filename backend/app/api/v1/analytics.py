@@ -1,28 +1,218 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.schemas.analytics import AnalyticsRequest, AnalyticsResponse
-from app.services.analytics import analyze_at_risk_students
+import json
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.at_risk_score import AtRiskScore
+from app.models.student_feature import StudentFeature
+from app.schemas.analytics import (
+    AnalyticsRequest,
+    AnalyticsResponse,
+    AtRiskScoreOut,
+    JobOut,
+    ScoringRunRequest,
+    ScoringRunResponse,
+    StudentFeatureOut,
+    TrainingJobRequest,
+)
+from app.services.analytics import (
+    analyze_at_risk_students,
+    iter_ndjson_lines,
+    parse_student_line,
+    score_ndjson_batch,
+    train_model,
+    warm_model,
+)
 from app.services.authz import require_roles
+from app.services.jobs import JobQueueFull, analytics_jobs
+from app.services.loading import out_options
+from app.services.pagination import PageParams, page_params, paginate_async
+from app.services.scoring import score_from_database
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
 
 
+def _queue_full(e: JobQueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Analytics workers are busy: {str(e)}",
+        headers={"Retry-After": "5"}
+    )
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose body iterator reads the request body itself.
+
+    StreamingResponse normally races the iterator with a disconnect listener
+    on ``receive()``, which would swallow request body chunks; here the
+    request stream raises ClientDisconnect on its own and streaming stops.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except ClientDisconnect:
+            return
+        if self.background is not None:
+            await self.background()
+
+
 @router.post("/at-risk", response_model=AnalyticsResponse)
-def analyze_students_at_risk(
+async def analyze_students_at_risk(
     request: AnalyticsRequest,
     current_user = Depends(require_roles("faculty", "admin"))
 ):
     """
     Analyze students to identify those at risk of academic failure.
-    Requires faculty or admin role.
+    Runs on the analytics job pool. Requires faculty or admin role.
+    """
+    try:
+        return await analytics_jobs.run(analyze_at_risk_students, request)
+    except JobQueueFull as e:
+        raise _queue_full(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Analysis failed: {str(e)}"
+        )
+
+
+@router.post("/at-risk/stream")
+async def stream_students_at_risk(
+    request: Request,
+    model_version: str = Query("v1", pattern=r"^[A-Za-z0-9._-]{1,64}$"),
+    batch_size: int = Query(settings.analytics_stream_batch_size, ge=1, le=10000),
+    current_user = Depends(require_roles("faculty", "admin"))
+):
+    """
+    Score newline-delimited StudentFeatures and stream AtRiskPrediction lines back.
+    Students are scored in micro-batches of ``batch_size`` against the cached
+    model, so memory stays flat regardless of cohort size. Lines that fail
+    validation are reported in-stream as ``{"line": n, "error": [...]}``; if
+    scoring fails part-way (e.g. the worker queue is full) the stream ends
+    with a final ``{"error": ...}`` line. Requires faculty or admin role.
     """
     try:
-        return analyze_at_risk_students(request)
+        await analytics_jobs.run(warm_model, model_version)
+    except JobQueueFull as e:
+        raise _queue_full(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Analysis failed: {str(e)}"
         )
 
+    async def predictions():
+        batch = []
+        try:
+            async for line_no, line in iter_ndjson_lines(request.stream()):
+                parsed = parse_student_line(line_no, line)
+                if isinstance(parsed, dict):
+                    yield (json.dumps(parsed) + "\n").encode()
+                    continue
+                batch.append(parsed)
+                if len(batch) >= batch_size:
+                    yield await analytics_jobs.run(score_ndjson_batch, model_version, batch)
+                    batch = []
+            if batch:
+                yield await analytics_jobs.run(score_ndjson_batch, model_version, batch)
+        except ClientDisconnect:
+            # nobody is left to read an error record
+            raise
+        # the 200 is already on the wire: end the stream with an error record
+        # rather than cutting it off
+        except JobQueueFull as e:
+            yield (json.dumps({"error": f"Analytics workers are busy: {str(e)}", "retry_after": 5}) + "\n").encode()
+        except Exception as e:
+            yield (json.dumps({"error": f"Analysis failed: {str(e)}"}) + "\n").encode()
+
+    return NDJSONStreamingResponse(predictions())
+
+
+@router.post("/at-risk/score", response_model=ScoringRunResponse)
+async def score_students_at_risk(
+    request: ScoringRunRequest,
+    current_user = Depends(require_roles("faculty", "admin"))
+):
+    """
+    Score every active student (optionally one department and/or term) from the
+    database and persist the results in at_risk_scores under a new run_id.
+    Runs on the analytics job pool. Requires faculty or admin role.
+    """
+    try:
+        return await analytics_jobs.run(score_from_database, request)
+    except JobQueueFull as e:
+        raise _queue_full(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Scoring failed: {str(e)}"
+        )
+
+
+@router.get("/at-risk/runs/{run_id}", response_model=list[AtRiskScoreOut])
+async def list_scoring_run_results(
+    run_id: str,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends(page_params),
+    current_user = Depends(require_roles("faculty", "admin"))
+):
+    """List the persisted scores of one scoring run, highest risk first"""
+    stmt = select(AtRiskScore).options(*out_options(AtRiskScore, AtRiskScoreOut)).where(AtRiskScore.run_id == run_id)
+    return await paginate_async(db, stmt, page, response, {
+        "risk": [AtRiskScore.risk_score.desc(), AtRiskScore.id],
+        "id": [AtRiskScore.id],
+    })
+
+
+@router.get("/features/{student_id}", response_model=list[StudentFeatureOut])
+async def get_student_features(
+    student_id: int,
+    term: str | None = Query(None, max_length=10),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_roles("faculty", "admin"))
+):
+    """Precomputed per-term features of one student from the feature store"""
+    stmt = select(StudentFeature).where(StudentFeature.student_id == student_id)
+    if term is not None:
+        stmt = stmt.where(StudentFeature.term == term)
+    return (await db.scalars(stmt.order_by(StudentFeature.term))).all()
+
+
+@router.post("/models/{model_version}/train", response_model=JobOut, status_code=202)
+def train_model_version(
+    payload: TrainingJobRequest,
+    model_version: str = Path(pattern=r"^[A-Za-z0-9._-]{1,64}$"),
+    current_user = Depends(require_roles("admin"))
+):
+    """
+    Submit a background job that retrains ``model_version`` and replaces its
+    artifact; poll GET /jobs/{job_id} for the outcome. Requires admin role.
+    """
+    try:
+        job = analytics_jobs.submit("train", train_model, model_version, payload.n_samples)
+    except JobQueueFull as e:
+        raise _queue_full(e)
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def get_job(
+    job_id: str,
+    current_user = Depends(require_roles("faculty", "admin"))
+):
+    """Status (and result once finished) of a background analytics job"""
+    job = analytics_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="not found")
+    return job.to_dict()
+
 
 @router.get("/health")
 def analytics_health():
@@ -1,38 +1,49 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut
-from app.services.security import verify_password, hash_password
-from app.services.tokens import create_access_token
+from app.services.principal_cache import Principal, principal_cache
+from app.services.response_cache import response_cache
+from app.services.security import hash_password_async, verify_and_rehash_async
+from app.services.tokens import create_user_token
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 
-def get_db():
-	db = SessionLocal()
-	try:
-		yield db
-	finally:
-		db.close()
-
-
 @router.post("/register", response_model=UserOut, status_code=201)
-def register(payload: UserCreate, db: Session = Depends(get_db)):
-	if db.query(User).filter(User.email == payload.email).first():
+async def register(payload: UserCreate, db: AsyncSession = Depends(get_db)):
+	if await db.scalar(select(User.id).where(User.email == payload.email).limit(1)):
 		raise HTTPException(status_code=409, detail="email already exists")
-	user = User(email=payload.email, username=payload.username, role=payload.role, password_hash=hash_password(payload.password))
+	password_hash = await hash_password_async(payload.password)
+	user = User(email=payload.email, username=payload.username, role=payload.role, password_hash=password_hash)
 	db.add(user)
-	db.commit()
-	db.refresh(user)
+	await db.commit()
+	await response_cache.invalidate("users")
+	await db.refresh(user)
+	await principal_cache.invalidate(user.email)
+	await principal_cache.record_user(user)
 	return user
 
 
 @router.post("/login")
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-	user = db.query(User).filter(User.email == form.username).first()
-	if not user or not verify_password(form.password, user.password_hash):
+async def login(form: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+	user = await db.scalar(select(User).where(User.email == form.username).limit(1))
+	if not user:
+		raise HTTPException(status_code=401, detail="invalid credentials")
+	ok, new_hash = await verify_and_rehash_async(form.password, user.password_hash)
+	if not ok:
 		raise HTTPException(status_code=401, detail="invalid credentials")
-	token = create_access_token(user.email)
+	if not user.is_active:
+		raise HTTPException(status_code=403, detail="inactive user")
+	if new_hash is not None:
+		# hashed under an older work factor; upgrade while we hold the plaintext
+		user.password_hash = new_hash
+		await db.commit()
+	# the token's first request then authorizes without a lookup
+	await principal_cache.put(Principal.from_user(user))
+	await principal_cache.record_user(user)
+	token = create_user_token(user)
 	return {"access_token": token, "token_type": "bearer"}
@@ -1,51 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
 from app.models.course import Course
+from app.models.department import Department
 from app.schemas.course import CourseCreate, CourseOut, CourseUpdate
-from app.services.pagination import pagination_params, apply_pagination
+from app.services.loading import out_options
+from app.services.pagination import PageParams, page_params, paginate_async
+from app.services.response_cache import response_cache
 
 router = APIRouter(prefix="/api/v1/courses", tags=["courses"])
 
 
-def get_db():
-	db = SessionLocal()
-	try:
-		yield db
-	finally:
-		db.close()
+async def _department_id(db: AsyncSession, code: str) -> int:
+	department_id = await db.scalar(select(Department.id).where(Department.code == code))
+	if department_id is None:
+		raise HTTPException(status_code=404, detail="department not found")
+	return department_id
 
 
 @router.get("/", response_model=list[CourseOut])
-def list_courses(db: Session = Depends(get_db), pag=Depends(pagination_params)):
-	limit, offset = pag
-	q = db.query(Course)
-	return apply_pagination(q, limit, offset).all()
+async def list_courses(response: Response, db: AsyncSession = Depends(get_db), page: PageParams = Depends(page_params)):
+	stmt = select(Course).options(*out_options(Course, CourseOut))
+	return await paginate_async(db, stmt, page, response, {"id": [Course.id], "code": [Course.code, Course.id]})
 
 
 @router.post("/", response_model=CourseOut, status_code=201)
-def create_course(payload: CourseCreate, db: Session = Depends(get_db)):
-	exists = db.query(Course).filter(Course.code == payload.code).first()
+async def create_course(payload: CourseCreate, db: AsyncSession = Depends(get_db)):
+	exists = await db.scalar(select(Course.id).where(Course.code == payload.code).limit(1))
 	if exists:
 		raise HTTPException(status_code=409, detail="code already exists")
-	obj = Course(code=payload.code, title=payload.title, credits=payload.credits, department=payload.department)
+	department_id = await _department_id(db, payload.department) if payload.department is not None else None
+	obj = Course(code=payload.code, title=payload.title, credits=payload.credits, department_id=department_id)
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	await db.commit()
+	await response_cache.invalidate("courses")
+	await db.refresh(obj)
 	return obj
 
 
 @router.get("/{course_id}", response_model=CourseOut)
-def get_course(course_id: int, db: Session = Depends(get_db)):
-	obj = db.get(Course, course_id)
+async def get_course(course_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Course, course_id, options=out_options(Course, CourseOut))
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	return obj
 
 
 @router.patch("/{course_id}", response_model=CourseOut)
-def update_course(course_id: int, payload: CourseUpdate, db: Session = Depends(get_db)):
-	obj = db.get(Course, course_id)
+async def update_course(course_id: int, payload: CourseUpdate, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Course, course_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	if payload.title is not None:
@@ -53,18 +57,20 @@ def update_course(course_id: int, payload: CourseUpdate, db: Session = Depends(g
 	if payload.credits is not None:
 		obj.credits = payload.credits
 	if payload.department is not None:
-		obj.department = payload.department
+		obj.department_id = await _department_id(db, payload.department)
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	await db.commit()
+	await response_cache.invalidate("courses")
+	await db.refresh(obj)
 	return obj
 
 
 @router.delete("/{course_id}", status_code=204)
-def delete_course(course_id: int, db: Session = Depends(get_db)):
-	obj = db.get(Course, course_id)
+async def delete_course(course_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Course, course_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
-	db.delete(obj)
-	db.commit()
+	await db.delete(obj)
+	await db.commit()
+	await response_cache.invalidate("courses", "enrollments", "grades")
 	return None
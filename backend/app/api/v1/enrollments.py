@@ -1,49 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from typing import Annotated
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
 from app.models.enrollment import Enrollment
+from app.schemas.bulk import MAX_BULK_ITEMS, BulkItemResult, BulkResult
 from app.schemas.enrollment import EnrollmentCreate, EnrollmentOut, EnrollmentUpdate
 from app.services.authz import require_roles
-from app.services.pagination import pagination_params, apply_pagination
+from app.services.feature_store import refresh_student_features
+from app.services.loading import out_options
+from app.services.pagination import PageParams, page_params, paginate_async
+from app.services.response_cache import response_cache
 
 router = APIRouter(prefix="/api/v1/enrollments", tags=["enrollments"])
 
 
-def get_db():
-	db = SessionLocal()
-	try:
-		yield db
-	finally:
-		db.close()
-
-
 @router.get("/", response_model=list[EnrollmentOut])
-def list_enrollments(db: Session = Depends(get_db), pag=Depends(pagination_params)):
-	limit, offset = pag
-	q = db.query(Enrollment)
-	return apply_pagination(q, limit, offset).all()
+async def list_enrollments(response: Response, db: AsyncSession = Depends(get_db), page: PageParams = Depends(page_params)):
+	stmt = select(Enrollment).options(*out_options(Enrollment, EnrollmentOut))
+	return await paginate_async(db, stmt, page, response, {"id": [Enrollment.id]})
 
 
 @router.post("/", response_model=EnrollmentOut, status_code=201, dependencies=[Depends(require_roles("faculty", "admin"))])
-def create_enrollment(payload: EnrollmentCreate, db: Session = Depends(get_db)):
+async def create_enrollment(payload: EnrollmentCreate, db: AsyncSession = Depends(get_db)):
 	# Check if student exists
 	from app.models.student import Student
-	student = db.get(Student, payload.student_id)
+	student = await db.get(Student, payload.student_id)
 	if not student:
 		raise HTTPException(status_code=404, detail="student not found")
 	
 	# Check if course exists
 	from app.models.course import Course
-	course = db.get(Course, payload.course_id)
+	course = await db.get(Course, payload.course_id)
 	if not course:
 		raise HTTPException(status_code=404, detail="course not found")
 	
 	# Check for duplicate enrollment
-	exists = db.query(Enrollment).filter(
+	exists = await db.scalar(select(Enrollment.id).where(
 		Enrollment.student_id == payload.student_id,
 		Enrollment.course_id == payload.course_id,
 		Enrollment.term == payload.term
-	).first()
+	).limit(1))
 	if exists:
 		raise HTTPException(status_code=409, detail="enrollment already exists")
 	
@@ -54,37 +51,86 @@ def create_enrollment(payload: EnrollmentCreate, db: Session = Depends(get_db)):
 		grade=payload.grade
 	)
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	await db.run_sync(refresh_student_features, [(obj.student_id, obj.term)])
+	await db.commit()
+	await response_cache.invalidate("enrollments")
+	await db.refresh(obj)
 	return obj
 
 
+@router.post("/bulk", response_model=BulkResult, dependencies=[Depends(require_roles("faculty", "admin"))])
+async def create_enrollments_bulk(
+	payload: Annotated[list[EnrollmentCreate], Body(min_length=1, max_length=MAX_BULK_ITEMS)],
+	db: AsyncSession = Depends(get_db),
+):
+	"""Create many enrollments: one IN query per check, one INSERT and one commit"""
+	from app.models.student import Student
+	from app.models.course import Course
+	students = set(await db.scalars(select(Student.id).where(Student.id.in_({item.student_id for item in payload}))))
+	courses = set(await db.scalars(select(Course.id).where(Course.id.in_({item.course_id for item in payload}))))
+	wanted = {(item.student_id, item.course_id, item.term) for item in payload}
+	existing = set((await db.execute(
+		select(Enrollment.student_id, Enrollment.course_id, Enrollment.term)
+		.where(tuple_(Enrollment.student_id, Enrollment.course_id, Enrollment.term).in_(wanted))
+	)).tuples())
+
+	results: list[BulkItemResult] = []
+	created: dict[tuple, BulkItemResult] = {}
+	records = []
+	for index, item in enumerate(payload):
+		key = (item.student_id, item.course_id, item.term)
+		if item.student_id not in students:
+			results.append(BulkItemResult(index=index, status="error", error="student not found"))
+		elif item.course_id not in courses:
+			results.append(BulkItemResult(index=index, status="error", error="course not found"))
+		elif key in existing:
+			results.append(BulkItemResult(index=index, status="error", error="enrollment already exists"))
+		else:
+			existing.add(key)
+			created[key] = BulkItemResult(index=index, status="created")
+			results.append(created[key])
+			records.append(item.model_dump())
+	if records:
+		# RETURNING order is not guaranteed for multi-row inserts; match on the natural key
+		stmt = insert(Enrollment).returning(Enrollment.id, Enrollment.student_id, Enrollment.course_id, Enrollment.term)
+		for enrollment_id, *key in await db.execute(stmt, records):
+			created[tuple(key)].id = enrollment_id
+		await db.run_sync(refresh_student_features, [(r["student_id"], r["term"]) for r in records])
+		await db.commit()
+		await response_cache.invalidate("enrollments")
+	return BulkResult.from_items(results)
+
+
 @router.get("/{enrollment_id}", response_model=EnrollmentOut)
-def get_enrollment(enrollment_id: int, db: Session = Depends(get_db)):
-	obj = db.get(Enrollment, enrollment_id)
+async def get_enrollment(enrollment_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Enrollment, enrollment_id, options=out_options(Enrollment, EnrollmentOut))
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	return obj
 
 
 @router.patch("/{enrollment_id}", response_model=EnrollmentOut, dependencies=[Depends(require_roles("faculty", "admin"))])
-def update_enrollment(enrollment_id: int, payload: EnrollmentUpdate, db: Session = Depends(get_db)):
-	obj = db.get(Enrollment, enrollment_id)
+async def update_enrollment(enrollment_id: int, payload: EnrollmentUpdate, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Enrollment, enrollment_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	if payload.grade is not None:
 		obj.grade = payload.grade
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	await db.run_sync(refresh_student_features, [(obj.student_id, obj.term)])
+	await db.commit()
+	await response_cache.invalidate("enrollments")
+	await db.refresh(obj)
 	return obj
 
 
 @router.delete("/{enrollment_id}", status_code=204, dependencies=[Depends(require_roles("faculty", "admin"))])
-def delete_enrollment(enrollment_id: int, db: Session = Depends(get_db)):
-	obj = db.get(Enrollment, enrollment_id)
+async def delete_enrollment(enrollment_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Enrollment, enrollment_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
-	db.delete(obj)
-	db.commit()
+	await db.delete(obj)
+	await db.run_sync(refresh_student_features, [(obj.student_id, obj.term)])
+	await db.commit()
+	await response_cache.invalidate("enrollments")
 	return None
@@ -1,69 +1,148 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from typing import Annotated
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
 from app.models.grade import Grade
 from app.models.enrollment import Enrollment
-from app.schemas.grade import GradeCreate, GradeOut, GradeUpdate
+from app.schemas.bulk import MAX_BULK_ITEMS, BulkItemResult, BulkResult
+from app.schemas.grade import GradeBulkUpdate, GradeCreate, GradeOut, GradeUpdate
 from app.services.authz import require_roles
-from app.services.pagination import pagination_params, apply_pagination
+from app.services.feature_store import refresh_student_features
+from app.services.loading import out_options
+from app.services.pagination import PageParams, page_params, paginate_async
+from app.services.response_cache import response_cache
 
 router = APIRouter(prefix="/api/v1/grades", tags=["grades"])
 
 
-def get_db():
-	db = SessionLocal()
-	try:
-		yield db
-	finally:
-		db.close()
-
-
 @router.get("/", response_model=list[GradeOut])
-def list_grades(db: Session = Depends(get_db), pag=Depends(pagination_params)):
-	limit, offset = pag
-	q = db.query(Grade)
-	return apply_pagination(q, limit, offset).all()
+async def list_grades(response: Response, db: AsyncSession = Depends(get_db), page: PageParams = Depends(page_params)):
+	stmt = select(Grade).options(*out_options(Grade, GradeOut))
+	return await paginate_async(db, stmt, page, response, {"id": [Grade.id]})
 
 
 @router.post("/", response_model=GradeOut, status_code=201, dependencies=[Depends(require_roles("faculty", "admin"))])
-def create_grade(payload: GradeCreate, db: Session = Depends(get_db)):
+async def create_grade(payload: GradeCreate, db: AsyncSession = Depends(get_db)):
 	# verify enrollment exists
-	enr = db.get(Enrollment, payload.enrollment_id)
+	enr = await db.get(Enrollment, payload.enrollment_id)
 	if not enr:
 		raise HTTPException(status_code=404, detail="enrollment not found")
 	obj = Grade(enrollment_id=payload.enrollment_id, value=payload.value)
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	await db.run_sync(refresh_student_features, [(enr.student_id, enr.term)])
+	await db.commit()
+	await response_cache.invalidate("grades")
+	await db.refresh(obj)
 	return obj
 
 
+@router.post("/bulk", response_model=BulkResult, dependencies=[Depends(require_roles("faculty", "admin"))])
+async def create_grades_bulk(
+	payload: Annotated[list[GradeCreate], Body(min_length=1, max_length=MAX_BULK_ITEMS)],
+	db: AsyncSession = Depends(get_db),
+):
+	"""Create a whole grade sheet: one lookup query, one INSERT and one commit"""
+	# existence and "already graded" in a single IN query
+	rows = (await db.execute(
+		select(Enrollment.id, Enrollment.student_id, Enrollment.term, Grade.id)
+		.outerjoin(Grade, Grade.enrollment_id == Enrollment.id)
+		.where(Enrollment.id.in_({item.enrollment_id for item in payload}))
+	)).all()
+	enrollments = {enrollment_id: (student_id, term) for enrollment_id, student_id, term, _ in rows}
+	graded = {enrollment_id for enrollment_id, _, _, grade_id in rows if grade_id is not None}
+
+	results: list[BulkItemResult] = []
+	created: dict[int, BulkItemResult] = {}
+	records = []
+	for index, item in enumerate(payload):
+		if item.enrollment_id not in enrollments:
+			results.append(BulkItemResult(index=index, status="error", error="enrollment not found"))
+		elif item.enrollment_id in graded:
+			results.append(BulkItemResult(index=index, status="error", error="enrollment already has a grade"))
+		else:
+			graded.add(item.enrollment_id)
+			created[item.enrollment_id] = BulkItemResult(index=index, status="created")
+			results.append(created[item.enrollment_id])
+			records.append({"enrollment_id": item.enrollment_id, "value": item.value})
+	if records:
+		# RETURNING order is not guaranteed for multi-row inserts; match on the enrollment
+		for grade_id, enrollment_id in await db.execute(insert(Grade).returning(Grade.id, Grade.enrollment_id), records):
+			created[enrollment_id].id = grade_id
+		await db.run_sync(refresh_student_features, [enrollments[r["enrollment_id"]] for r in records])
+		await db.commit()
+		await response_cache.invalidate("grades")
+	return BulkResult.from_items(results)
+
+
+@router.patch("/bulk", response_model=BulkResult, dependencies=[Depends(require_roles("faculty", "admin"))])
+async def update_grades_bulk(
+	payload: Annotated[list[GradeBulkUpdate], Body(min_length=1, max_length=MAX_BULK_ITEMS)],
+	db: AsyncSession = Depends(get_db),
+):
+	"""Update many grades by id: one lookup query, one executemany UPDATE and one commit"""
+	rows = (await db.execute(
+		select(Grade.id, Enrollment.student_id, Enrollment.term)
+		.join(Enrollment, Enrollment.id == Grade.enrollment_id)
+		.where(Grade.id.in_({item.id for item in payload}))
+	)).all()
+	keys = {grade_id: (student_id, term) for grade_id, student_id, term in rows}
+
+	results: list[BulkItemResult] = []
+	records = []
+	seen: set[int] = set()
+	for index, item in enumerate(payload):
+		if item.id not in keys:
+			results.append(BulkItemResult(index=index, id=item.id, status="error", error="not found"))
+		elif item.id in seen:
+			results.append(BulkItemResult(index=index, id=item.id, status="error", error="duplicate id in request"))
+		elif item.value is None:
+			seen.add(item.id)
+			results.append(BulkItemResult(index=index, id=item.id, status="unchanged"))
+		else:
+			seen.add(item.id)
+			results.append(BulkItemResult(index=index, id=item.id, status="updated"))
+			records.append({"id": item.id, "value": item.value})
+	if records:
+		await db.execute(update(Grade), records)
+		await db.run_sync(refresh_student_features, [keys[r["id"]] for r in records])
+		await db.commit()
+		await response_cache.invalidate("grades")
+	return BulkResult.from_items(results)
+
+
 @router.get("/{grade_id}", response_model=GradeOut)
-def get_grade(grade_id: int, db: Session = Depends(get_db)):
-	obj = db.get(Grade, grade_id)
+async def get_grade(grade_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Grade, grade_id, options=out_options(Grade, GradeOut))
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	return obj
 
 
 @router.patch("/{grade_id}", response_model=GradeOut, dependencies=[Depends(require_roles("faculty", "admin"))])
-def update_grade(grade_id: int, payload: GradeUpdate, db: Session = Depends(get_db)):
-	obj = db.get(Grade, grade_id)
+async def update_grade(grade_id: int, payload: GradeUpdate, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Grade, grade_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	if payload.value is not None:
 		obj.value = payload.value
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	enr = await db.get(Enrollment, obj.enrollment_id)
+	await db.run_sync(refresh_student_features, [(enr.student_id, enr.term)])
+	await db.commit()
+	await response_cache.invalidate("grades")
+	await db.refresh(obj)
 	return obj
 
 
 @router.delete("/{grade_id}", status_code=204, dependencies=[Depends(require_roles("faculty", "admin"))])
-def delete_grade(grade_id: int, db: Session = Depends(get_db)):
-	obj = db.get(Grade, grade_id)
+async def delete_grade(grade_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Grade, grade_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
-	db.delete(obj)
-	db.commit()
+	enr = await db.get(Enrollment, obj.enrollment_id)
+	await db.delete(obj)
+	await db.run_sync(refresh_student_features, [(enr.student_id, enr.term)])
+	await db.commit()
+	await response_cache.invalidate("grades")
 	return None
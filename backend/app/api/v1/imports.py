@@ -0,0 +1,33 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.db.session import get_sync_db
+from app.schemas.imports import ImportReport
+from app.services.authz import require_roles
+from app.services.importer import DEFAULT_CHUNK_SIZE, ImportFormatError, format_from_filename, import_file
+from app.services.response_cache import response_cache
+
+router = APIRouter(prefix="/api/v1/imports", tags=["imports"])
+
+# cached namespaces an import writes besides its own; student imports create users
+ALSO_WRITES = {"students": ("users",)}
+
+
+@router.post("/{entity}", response_model=ImportReport, dependencies=[Depends(require_roles("admin"))])
+async def import_entities(
+	entity: Literal["students", "courses", "enrollments", "grades"],
+	file: UploadFile = File(...),
+	chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=50_000),
+	db: Session = Depends(get_sync_db),
+):
+	"""Bulk import a CSV or XLSX file (chosen by extension); rows that fail are listed in the report"""
+	try:
+		return await run_in_threadpool(
+			import_file, db, entity, file.file, format_from_filename(file.filename), chunk_size=chunk_size
+		)
+	except ImportFormatError as e:
+		raise HTTPException(status_code=400, detail=str(e))
+	finally:
+		# chunks commit independently, so even a failed import may have written rows
+		await response_cache.invalidate(entity, *ALSO_WRITES.get(entity, ()))
@@ -1,11 +1,57 @@
-from fastapi import APIRouter
-from app.schemas.scheduling import ScheduleRequest, ScheduleResponse
-from app.services.scheduling import greedy_schedule
+import time
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.db.session import get_sync_db
+from app.schemas.scheduling import (
+	ExamScheduleRequest,
+	ExamScheduleResponse,
+	RescheduleRequest,
+	RescheduleResponse,
+	ScheduleBatchRequest,
+	ScheduleBatchResponse,
+	ScheduleRequest,
+	ScheduleResponse,
+)
+from app.services.authz import require_roles
+from app.services.exam_scheduling import schedule_exams
+from app.services.jobs import JobQueueFull, scheduling_jobs
+from app.services.scheduling import reschedule, solve_schedule
 
 router = APIRouter(prefix="/api/v1/scheduling", tags=["scheduling"])
 
 
 @router.post("/generate", response_model=ScheduleResponse)
 def generate_schedule(payload: ScheduleRequest):
-	return greedy_schedule(payload)
+	return solve_schedule(payload)
 
+
+@router.post("/reschedule", response_model=RescheduleResponse)
+def reschedule_timetable(payload: RescheduleRequest):
+	"""Re-place only the sections affected by a change, keeping the rest of a prior schedule pinned"""
+	return reschedule(payload)
+
+
+@router.post("/generate/batch", response_model=ScheduleBatchResponse)
+async def generate_schedule_batch(payload: ScheduleBatchRequest):
+	"""Solve independent terms/campuses in parallel on the scheduling worker pool"""
+	started = time.perf_counter()
+	try:
+		results = await scheduling_jobs.map(solve_schedule, payload.requests)
+	except JobQueueFull as e:
+		raise HTTPException(
+			status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+			detail=f"Scheduling workers are busy: {str(e)}",
+			headers={"Retry-After": "5"},
+		)
+	return ScheduleBatchResponse(
+		results=results,
+		placed=sum(r.placed for r in results),
+		unscheduled=sum(len(r.unscheduled) for r in results),
+		solve_time_ms=round((time.perf_counter() - started) * 1000, 3),
+	)
+
+
+@router.post("/exams", response_model=ExamScheduleResponse, dependencies=[Depends(require_roles("faculty", "admin"))])
+def generate_exam_schedule(payload: ExamScheduleRequest, db: Session = Depends(get_sync_db)):
+	"""Exam timetable from the term's enrollments; courses sharing a student never share a slot"""
+	return schedule_exams(db, payload)
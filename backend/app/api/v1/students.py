@@ -1,51 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
 from app.models.student import Student
+from app.models.user import User
 from app.schemas.student import StudentCreate, StudentOut, StudentUpdate
-from app.services.pagination import pagination_params, apply_pagination
+from app.services.loading import out_options
+from app.services.pagination import PageParams, page_params, paginate_async
+from app.services.response_cache import response_cache
 
 router = APIRouter(prefix="/api/v1/students", tags=["students"])
 
 
-def get_db():
-	db = SessionLocal()
-	try:
-		yield db
-	finally:
-		db.close()
-
-
 @router.get("/", response_model=list[StudentOut])
-def list_students(db: Session = Depends(get_db), pag=Depends(pagination_params)):
-	limit, offset = pag
-	q = db.query(Student)
-	return apply_pagination(q, limit, offset).all()
+async def list_students(response: Response, db: AsyncSession = Depends(get_db), page: PageParams = Depends(page_params)):
+	stmt = select(Student).options(*out_options(Student, StudentOut))
+	return await paginate_async(db, stmt, page, response, {"id": [Student.id], "student_no": [Student.student_no, Student.id]})
 
 
 @router.post("/", response_model=StudentOut, status_code=201)
-def create_student(payload: StudentCreate, db: Session = Depends(get_db)):
-	exists = db.query(Student).filter(Student.student_no == payload.student_no).first()
+async def create_student(payload: StudentCreate, db: AsyncSession = Depends(get_db)):
+	exists = await db.scalar(select(Student.id).where(Student.student_no == payload.student_no).limit(1))
 	if exists:
 		raise HTTPException(status_code=409, detail="student_no already exists")
-	obj = Student(student_no=payload.student_no, entry_year=payload.entry_year, full_name=payload.full_name)
+	if not await db.scalar(select(User.id).where(User.id == payload.user_id)):
+		raise HTTPException(status_code=404, detail="user not found")
+	if await db.scalar(select(Student.id).where(Student.user_id == payload.user_id).limit(1)):
+		raise HTTPException(status_code=409, detail="user already has a student record")
+	obj = Student(user_id=payload.user_id, student_no=payload.student_no, entry_year=payload.entry_year, full_name=payload.full_name)
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	await db.commit()
+	await response_cache.invalidate("students")
+	await db.refresh(obj)
 	return obj
 
 
 @router.get("/{student_id}", response_model=StudentOut)
-def get_student(student_id: int, db: Session = Depends(get_db)):
-	obj = db.get(Student, student_id)
+async def get_student(student_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Student, student_id, options=out_options(Student, StudentOut))
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	return obj
 
 
 @router.patch("/{student_id}", response_model=StudentOut)
-def update_student(student_id: int, payload: StudentUpdate, db: Session = Depends(get_db)):
-	obj = db.get(Student, student_id)
+async def update_student(student_id: int, payload: StudentUpdate, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Student, student_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	if payload.entry_year is not None:
@@ -53,16 +53,18 @@ def update_student(student_id: int, payload: StudentUpdate, db: Session = Depend
 	if payload.full_name is not None:
 		obj.full_name = payload.full_name
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	await db.commit()
+	await response_cache.invalidate("students")
+	await db.refresh(obj)
 	return obj
 
 
 @router.delete("/{student_id}", status_code=204)
-def delete_student(student_id: int, db: Session = Depends(get_db)):
-	obj = db.get(Student, student_id)
+async def delete_student(student_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(Student, student_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
-	db.delete(obj)
-	db.commit()
+	await db.delete(obj)
+	await db.commit()
+	await response_cache.invalidate("students", "enrollments", "grades")
 	return None
@@ -1,68 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, UserUpdate
-from app.services.security import hash_password
+from app.services.loading import out_options
+from app.services.pagination import PageParams, page_params, paginate_async
+from app.services.principal_cache import REVOKED, principal_cache
+from app.services.response_cache import response_cache
+from app.services.security import hash_password_async
 
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
 
-def get_db():
-	db = SessionLocal()
-	try:
-		yield db
-	finally:
-		db.close()
-
-
 @router.get("/", response_model=list[UserOut])
-def list_users(db: Session = Depends(get_db)):
-	return db.query(User).all()
+async def list_users(response: Response, db: AsyncSession = Depends(get_db), page: PageParams = Depends(page_params)):
+	stmt = select(User).options(*out_options(User, UserOut))
+	return await paginate_async(db, stmt, page, response, {"id": [User.id], "email": [User.email, User.id]})
 
 
 @router.post("/", response_model=UserOut, status_code=201)
-def create_user(payload: UserCreate, db: Session = Depends(get_db)):
-	exists = db.query(User).filter(User.email == payload.email).first()
+async def create_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
+	exists = await db.scalar(select(User.id).where(User.email == payload.email).limit(1))
 	if exists:
 		raise HTTPException(status_code=409, detail="email already exists")
-	obj = User(email=payload.email, username=payload.username, role=payload.role, password_hash=hash_password(payload.password))
+	password_hash = await hash_password_async(payload.password)
+	obj = User(email=payload.email, username=payload.username, role=payload.role, password_hash=password_hash)
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	await db.commit()
+	await response_cache.invalidate("users")
+	await db.refresh(obj)
+	await principal_cache.invalidate(obj.email)
+	await principal_cache.record_user(obj)
 	return obj
 
 
 @router.get("/{user_id}", response_model=UserOut)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-	obj = db.get(User, user_id)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(User, user_id, options=out_options(User, UserOut))
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	return obj
 
 
 @router.patch("/{user_id}", response_model=UserOut)
-def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db)):
-	obj = db.get(User, user_id)
+async def update_user(user_id: int, payload: UserUpdate, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(User, user_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
 	if payload.username is not None:
 		obj.username = payload.username
+	# issued tokens carry the role, so a role or password change revokes them
+	revoke = (payload.role is not None and payload.role != obj.role) or payload.password is not None
 	if payload.role is not None:
 		obj.role = payload.role
 	if payload.password is not None:
-		obj.password_hash = hash_password(payload.password)
+		obj.password_hash = await hash_password_async(payload.password)
+	if revoke:
+		obj.revoke_tokens()
 	db.add(obj)
-	db.commit()
-	db.refresh(obj)
+	await db.commit()
+	await response_cache.invalidate("users")
+	await db.refresh(obj)
+	if revoke:
+		await principal_cache.invalidate(obj.email)
+		await principal_cache.record_user(obj)
 	return obj
 
 
 @router.delete("/{user_id}", status_code=204)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-	obj = db.get(User, user_id)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
+	obj = await db.get(User, user_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="not found")
-	db.delete(obj)
-	db.commit()
+	await db.delete(obj)
+	await db.commit()
+	await response_cache.invalidate("users", "students", "enrollments", "grades")
+	await principal_cache.invalidate(obj.email)
+	await principal_cache.record_token_version(obj.id, REVOKED)
 	return None
@@ -0,0 +1,74 @@
+"""
+Maintenance commands for the Academic Data Platform backend.
+
+Usage (from ``backend/``):
+	python -m app.cli rebuild-features
+	python -m app.cli import enrollments enrollments.csv [--chunk-size 5000] [--report errors.json]
+"""
+
+import argparse
+import sys
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.services.feature_store import rebuild_student_features
+from app.services.importer import DEFAULT_CHUNK_SIZE, ENTITIES, ImportFormatError, format_from_filename, import_file
+
+
+def rebuild_features(args: argparse.Namespace) -> int:
+	Base.metadata.create_all(bind=engine)
+	db = SessionLocal()
+	try:
+		rows = rebuild_student_features(db)
+	finally:
+		db.close()
+	print(f"student_features rebuilt: {rows} rows")
+	return 0
+
+
+def import_data(args: argparse.Namespace) -> int:
+	Base.metadata.create_all(bind=engine)
+	db = SessionLocal()
+	try:
+		with open(args.path, "rb") as f:
+			report = import_file(
+				db, args.entity, f, args.format or format_from_filename(args.path),
+				chunk_size=args.chunk_size, max_errors=args.max_errors,
+			)
+	except ImportFormatError as e:
+		print(f"error: {e}", file=sys.stderr)
+		return 2
+	finally:
+		db.close()
+	print(f"{report.entity}: {report.rows} rows, {report.inserted} inserted, "
+		f"{report.error_count} rejected in {report.elapsed_ms / 1000:.1f}s")
+	if args.report:
+		with open(args.report, "w") as f:
+			f.write(report.model_dump_json(indent=2))
+	else:
+		for error in report.errors[:20]:
+			print(f"  row {error.row}: {error.error}")
+	return 1 if report.error_count else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(prog="python -m app.cli")
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	rebuild = commands.add_parser("rebuild-features", help="regenerate the student_features store")
+	rebuild.set_defaults(func=rebuild_features)
+
+	load = commands.add_parser("import", help="bulk import a CSV or XLSX file")
+	load.add_argument("entity", choices=sorted(ENTITIES))
+	load.add_argument("path")
+	load.add_argument("--format", choices=["csv", "xlsx"], help="defaults to the file extension")
+	load.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+	load.add_argument("--max-errors", type=int, default=1000, help="row errors kept in the report")
+	load.add_argument("--report", help="write the full JSON report here instead of printing errors")
+	load.set_defaults(func=import_data)
+
+	args = parser.parse_args(argv)
+	return args.func(args)
+
+
+if __name__ == "__main__":
+	sys.exit(main())
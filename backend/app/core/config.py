@@ -6,9 +6,42 @@ class Settings(BaseModel):
 	app_name: str = "Academic Data Platform API"
 	version: str = "0.1.0"
 	database_url: str = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
+	# connection pool per process, split between its sync and async engines on PostgreSQL; each process job
+	# worker holds one connection, so keep web workers x (max(pool_size, 2) + max_overflow + process job
+	# workers) under the server's max_connections
+	db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+	db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+	db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+	db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+	db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+	db_statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # PostgreSQL only, 0 = off
 	jwt_secret_key: str = os.getenv("JWT_SECRET_KEY", "dev-secret-change-me")
 	jwt_algorithm: str = os.getenv("JWT_ALGORITHM", "HS256")
 	access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+	password_bcrypt_rounds: int = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))  # existing hashes are upgraded on login
+	password_workers: int = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 2))))
+	password_max_queue: int = int(os.getenv("PASSWORD_MAX_QUEUE", "32"))
+	# login throttling; the IP bucket is generous because a campus NAT puts many users behind one address
+	login_rate_ip_burst: int = int(os.getenv("LOGIN_RATE_IP_BURST", "50"))
+	login_rate_ip_per_minute: float = float(os.getenv("LOGIN_RATE_IP_PER_MINUTE", "60"))
+	login_rate_account_burst: int = int(os.getenv("LOGIN_RATE_ACCOUNT_BURST", "10"))
+	login_rate_account_per_minute: float = float(os.getenv("LOGIN_RATE_ACCOUNT_PER_MINUTE", "5"))
+	rate_limit_url: str = os.getenv("RATE_LIMIT_URL", "")  # redis://... to share buckets between workers
+	rate_limit_trust_forwarded: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+	response_cache_ttl_seconds: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))  # 0 = off
+	response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+	response_cache_url: str = os.getenv("RESPONSE_CACHE_URL", "")  # redis://... to share invalidations between workers
+	principal_cache_ttl_seconds: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))  # 0 = off
+	principal_cache_max_entries: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+	principal_cache_url: str = os.getenv("PRINCIPAL_CACHE_URL", "")  # redis://... to share between workers
+	analytics_model_dir: str = os.getenv("ANALYTICS_MODEL_DIR", "./artifacts/models")
+	analytics_stream_batch_size: int = int(os.getenv("ANALYTICS_STREAM_BATCH_SIZE", "1000"))
+	analytics_executor: str = os.getenv("ANALYTICS_EXECUTOR", "process")  # process | thread
+	analytics_workers: int = int(os.getenv("ANALYTICS_WORKERS", "2"))
+	analytics_max_queue: int = int(os.getenv("ANALYTICS_MAX_QUEUE", "16"))
+	scheduling_executor: str = os.getenv("SCHEDULING_EXECUTOR", "process")  # process | thread
+	scheduling_workers: int = int(os.getenv("SCHEDULING_WORKERS", str(os.cpu_count() or 2)))
+	scheduling_max_queue: int = int(os.getenv("SCHEDULING_MAX_QUEUE", "64"))
 
 
 settings = Settings()
@@ -1,6 +1,213 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from typing import Any, Callable, Dict, Optional
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import CursorResult, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.services.metrics import registry
 
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {})
+POOL_CHECKOUT_WAIT = registry.histogram(
+	"db_pool_checkout_wait_seconds",
+	"Time spent waiting for a pooled connection, including opening a new one",
+)
+POOL_CHECKOUT_TIMEOUTS = registry.counter(
+	"db_pool_checkout_timeouts_total",
+	"Checkouts that gave up after pool_timeout",
+)
+
+
+class _TimedCheckout:
+	"""Pool mixin that records how long each checkout waits and how often it times out"""
+
+	def __init__(self, *args, pool_size: int = 5, max_overflow: int = 10, **kw):
+		super().__init__(*args, pool_size=pool_size, max_overflow=max_overflow, **kw)
+		# most connections this pool opens at once (size + overflow), for the saturation gauge
+		self.limit = pool_size + max(0, max_overflow)
+
+	def _do_get(self):
+		started = time.perf_counter()
+		try:
+			return super()._do_get()
+		except exc.TimeoutError:
+			POOL_CHECKOUT_TIMEOUTS.inc()
+			raise
+		finally:
+			POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+	pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+	pass
+
+
+# backends with an async driver among our dependencies, and the driver to use
+ASYNC_DRIVERS = {"postgresql": "psycopg"}
+
+
+def async_database_url(database_url: str) -> Optional[str]:
+	"""``database_url`` with its async driver, or None when the backend has none (SQLite)"""
+	url = make_url(database_url)
+	driver = ASYNC_DRIVERS.get(url.get_backend_name())
+	if driver is None:
+		return None
+	return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _share(total: int, is_async: bool, split: bool) -> int:
+	"""This engine's part of ``total`` when a sync and an async engine split it"""
+	if not split:
+		return total
+	sync_part = total // 2
+	return total - sync_part if is_async else sync_part
+
+
+def engine_options(database_url: str, is_async: bool = False, split: bool = False) -> Dict[str, Any]:
+	"""
+	create_engine keyword arguments for ``database_url`` from the DB_* settings.
+	With ``split`` the process runs a sync and an async engine that share one
+	budget: each gets half of pool_size (at least one) and half of max_overflow.
+	"""
+	url = make_url(database_url)
+	if url.get_backend_name() == "sqlite":
+		connect_args: Dict[str, Any] = {"check_same_thread": False}
+		if url.database in (None, "", ":memory:"):
+			# an in-memory database lives in one connection; keep SQLAlchemy's default pool
+			return {"connect_args": connect_args}
+	else:
+		connect_args = {}
+	if settings.db_statement_timeout_ms and url.get_backend_name() == "postgresql":
+		connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+	return {
+		"poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+		"pool_size": max(1, _share(settings.db_pool_size, is_async, split)),
+		"max_overflow": _share(settings.db_max_overflow, is_async, split),
+		"pool_timeout": settings.db_pool_timeout,
+		"pool_recycle": settings.db_pool_recycle,
+		"pool_pre_ping": settings.db_pool_pre_ping,
+		"connect_args": connect_args,
+	}
+
+
+_async_url = async_database_url(settings.database_url)
+engine = create_engine(settings.database_url, **engine_options(settings.database_url, split=_async_url is not None))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class ThreadedAsyncSession:
+	"""
+	The part of AsyncSession the routers use, over a sync Session whose calls
+	run in the threadpool. This is the fallback for backends without an async
+	driver (SQLite in development and tests); results are buffered like
+	AsyncSession's so they can be read back on the event loop.
+	"""
+
+	def __init__(self, sync_session: Session):
+		self.sync_session = sync_session
+
+	async def __aenter__(self) -> "ThreadedAsyncSession":
+		return self
+
+	async def __aexit__(self, *exc_info) -> None:
+		await self.close()
+
+	def add(self, instance: Any) -> None:
+		self.sync_session.add(instance)
+
+	def add_all(self, instances) -> None:
+		self.sync_session.add_all(instances)
+
+	def _execute(self, statement, params=None, **kw):
+		result = self.sync_session.execute(statement, params, **kw)
+		if isinstance(result, CursorResult) and not result.returns_rows:
+			return result
+		return result.freeze()()
+
+	async def execute(self, statement, params=None, **kw):
+		return await run_in_threadpool(self._execute, statement, params, **kw)
+
+	async def scalars(self, statement, params=None, **kw):
+		return (await self.execute(statement, params, **kw)).scalars()
+
+	async def scalar(self, statement, params=None, **kw):
+		return (await self.execute(statement, params, **kw)).scalar()
+
+	async def get(self, entity, ident, **kw):
+		return await run_in_threadpool(self.sync_session.get, entity, ident, **kw)
+
+	async def delete(self, instance: Any) -> None:
+		await run_in_threadpool(self.sync_session.delete, instance)
+
+	async def refresh(self, instance: Any, **kw) -> None:
+		await run_in_threadpool(self.sync_session.refresh, instance, **kw)
+
+	async def flush(self) -> None:
+		await run_in_threadpool(self.sync_session.flush)
+
+	async def commit(self) -> None:
+		await run_in_threadpool(self.sync_session.commit)
+
+	async def rollback(self) -> None:
+		await run_in_threadpool(self.sync_session.rollback)
+
+	async def close(self) -> None:
+		await run_in_threadpool(self.sync_session.close)
+
+	async def run_sync(self, fn: Callable[..., Any], *args, **kw) -> Any:
+		return await run_in_threadpool(fn, self.sync_session, *args, **kw)
+
+
+if _async_url is not None:
+	async_engine = create_async_engine(_async_url, **engine_options(_async_url, is_async=True, split=True))
+	# objects stay readable after commit without a lazy refresh, which async cannot do implicitly
+	AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+	async_engine = None
+
+	def AsyncSessionLocal() -> ThreadedAsyncSession:
+		return ThreadedAsyncSession(SessionLocal(expire_on_commit=False))
+
+
+def _pools():
+	engines = [engine] if async_engine is None else [engine, async_engine.sync_engine]
+	return [e.pool for e in engines if isinstance(e.pool, _TimedCheckout)]
+
+
+def _pool_stat(name: str) -> float:
+	"""Pool statistic summed over this process's engines"""
+	pools = _pools()
+	if name == "saturation":
+		# share of the pools' hard limit (size + overflow) currently checked out
+		limit = sum(pool.limit for pool in pools)
+		return sum(pool.checkedout() for pool in pools) / max(1, limit)
+	return float(sum(getattr(pool, name)() for pool in pools))
+
+
+registry.gauge("db_pool_size", "Configured number of persistent pooled connections", lambda: _pool_stat("size"))
+registry.gauge("db_pool_checked_out", "Connections currently checked out", lambda: _pool_stat("checkedout"))
+registry.gauge("db_pool_overflow", "Connections open beyond pool_size (negative while the pool fills)", lambda: _pool_stat("overflow"))
+registry.gauge("db_pool_saturation", "Checked-out connections / (pool_size + max_overflow)", lambda: _pool_stat("saturation"))
+
+
+async def get_db():
+	"""
+	The request's AsyncSession. FastAPI resolves a dependency once per request,
+	so get_current_user and the handler share this session and its single
+	pooled connection.
+	"""
+	async with AsyncSessionLocal() as db:
+		yield db
+
+
+def get_sync_db():
+	"""A sync Session for handlers whose work runs in the threadpool (imports, exam scheduling)"""
+	db = SessionLocal()
+	try:
+		yield db
+	finally:
+		db.close()
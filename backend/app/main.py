@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.api.v1.students import router as students_router
 from app.api.v1.users import router as users_router
 from app.api.v1.auth import router as auth_router
@@ -7,10 +8,17 @@ from app.api.v1.enrollments import router as enrollments_router
 from app.api.v1.grades import router as grades_router
 from app.api.v1.scheduling import router as scheduling_router
 from app.api.v1.analytics import router as analytics_router
+from app.api.v1.imports import router as imports_router
 from app.db.base import Base
 from app.db.session import engine
+from app.services.jobs import analytics_jobs, password_jobs, scheduling_jobs
+from app.services.metrics import registry
+from app.services.rate_limit import LoginRateLimitMiddleware
+from app.services.response_cache import ResponseCacheMiddleware
 
 app = FastAPI(title="Academic Data Platform API", version="0.1.0")
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(LoginRateLimitMiddleware)
 
 
 @app.on_event("startup")
@@ -18,11 +26,23 @@ def on_startup():
 	Base.metadata.create_all(bind=engine)
 
 
+@app.on_event("shutdown")
+def on_shutdown():
+	analytics_jobs.shutdown()
+	scheduling_jobs.shutdown()
+	password_jobs.shutdown()
+
+
 @app.get("/health")
 def health_check():
 	return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+	return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(students_router)
@@ -31,3 +51,4 @@ app.include_router(enrollments_router)
 app.include_router(grades_router)
 app.include_router(scheduling_router)
 app.include_router(analytics_router)
+app.include_router(imports_router)
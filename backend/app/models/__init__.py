@@ -13,6 +13,8 @@ from .grade import Grade
 from .department import Department
 from .faculty import Faculty
 from .research_item import ResearchItem
+from .at_risk_score import AtRiskScore
+from .student_feature import StudentFeature
 
 __all__ = [
     "User",
@@ -23,4 +25,6 @@ __all__ = [
     "Department",
     "Faculty",
     "ResearchItem",
+    "AtRiskScore",
+    "StudentFeature",
 ]
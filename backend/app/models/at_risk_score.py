@@ -0,0 +1,55 @@
+"""
+AtRiskScore model for Academic Data Platform.
+
+This module defines the persisted output of server-side at-risk scoring runs.
+"""
+
+from datetime import datetime
+from typing import Optional, List
+from sqlalchemy import Integer, String, Float, DateTime, ForeignKey, func, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class AtRiskScore(Base):
+	"""
+	One student's at-risk score produced by a scoring run.
+	
+	Attributes:
+		id: Primary key
+		run_id: Identifier shared by all scores of one scoring run
+		student_id: Foreign key to Student table
+		term: Term the features were computed for (None = all terms)
+		model_version: Model version used for scoring
+		risk_score: Probability of the student being at risk
+		risk_level: Bucketed risk (low, medium, high)
+		confidence: Model confidence for the prediction
+		factors: Contributing rule-based risk factors
+		scored_at: Scoring timestamp
+	"""
+	
+	__tablename__ = "at_risk_scores"
+
+	id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+	run_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True, comment="Scoring run identifier")
+	student_id: Mapped[int] = mapped_column(
+		Integer,
+		ForeignKey("students.id", ondelete="CASCADE"),
+		nullable=False,
+		index=True,
+		comment="Foreign key to students table"
+	)
+	term: Mapped[Optional[str]] = mapped_column(String(10), nullable=True, comment="Scored term (NULL = all terms)")
+	model_version: Mapped[str] = mapped_column(String(64), nullable=False, comment="Model version used for scoring")
+	risk_score: Mapped[float] = mapped_column(Float, nullable=False)
+	risk_level: Mapped[str] = mapped_column(String(16), nullable=False, index=True)
+	confidence: Mapped[float] = mapped_column(Float, nullable=False)
+	factors: Mapped[List[str]] = mapped_column(JSON, nullable=False, default=list)
+	scored_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True),
+		server_default=func.now(),
+		comment="Scoring timestamp"
+	)
+
+	def __repr__(self) -> str:
+		return f"<AtRiskScore(run_id='{self.run_id}', student_id={self.student_id}, risk_level='{self.risk_level}')>"
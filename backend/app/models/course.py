@@ -6,12 +6,12 @@ This module defines the Course entity representing academic courses.
 
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
-from sqlalchemy import Integer, String, DateTime, ForeignKey, func, Text, Boolean
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Integer, String, DateTime, ForeignKey, func, Text, Boolean, select
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 from app.db.base import Base
+from .department import Department
 
 if TYPE_CHECKING:
-    from .department import Department
     from .enrollment import Enrollment
 
 
@@ -25,6 +25,7 @@ class Course(Base):
 		title: Course title/name
 		credits: Number of credit units
 		department_id: Foreign key to Department table
+		department_code: Code of the related department (read-only)
 		level: Course level (undergraduate, graduate, etc.)
 		description: Detailed course description
 		prerequisites: Text description of prerequisites
@@ -74,6 +75,11 @@ class Course(Base):
 		index=True,
 		comment="Foreign key to departments table"
 	)
+
+	# the department's code as a plain column, read in the same SELECT as the course
+	department_code: Mapped[Optional[str]] = column_property(
+		select(Department.code).where(Department.id == department_id).correlate_except(Department).scalar_subquery()
+	)
 	
 	level: Mapped[Optional[str]] = mapped_column(
 		String(32),
@@ -116,13 +122,13 @@ class Course(Base):
 	# Relationships
 	department: Mapped[Optional["Department"]] = relationship(
 		back_populates="courses",
-		lazy="joined"
+		lazy="raise_on_sql"
 	)
 	
 	enrollments: Mapped[List["Enrollment"]] = relationship(
 		back_populates="course",
 		cascade="all, delete-orphan",
-		lazy="selectin",
+		lazy="raise_on_sql",
 	)
 
 	def __repr__(self) -> str:
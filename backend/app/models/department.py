@@ -90,18 +90,18 @@ class Department(Base):
     faculty_members: Mapped[List["Faculty"]] = relationship(
         back_populates="department",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="raise_on_sql"
     )
     
     courses: Mapped[List["Course"]] = relationship(
         back_populates="department",
         cascade="all, delete-orphan", 
-        lazy="selectin"
+        lazy="raise_on_sql"
     )
     
     students: Mapped[List["Student"]] = relationship(
         back_populates="department",
-        lazy="selectin"
+        lazy="raise_on_sql"
     )
 
     def __repr__(self) -> str:
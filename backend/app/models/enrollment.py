@@ -1,10 +1,11 @@
-from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy import Integer, String, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
 
 class Enrollment(Base):
 	__tablename__ = "enrollments"
+	__table_args__ = (Index("ix_enrollments_student_id_term", "student_id", "term"),)
 
 	id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 	student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"), nullable=False)
@@ -13,5 +14,5 @@ class Enrollment(Base):
 	grade: Mapped[float | None] = mapped_column(nullable=True)
 
 	# Relationships
-	student: Mapped["Student"] = relationship(back_populates="enrollments", lazy="joined")
-	course: Mapped["Course"] = relationship(back_populates="enrollments", lazy="joined")
+	student: Mapped["Student"] = relationship(back_populates="enrollments", lazy="raise_on_sql")
+	course: Mapped["Course"] = relationship(back_populates="enrollments", lazy="raise_on_sql")
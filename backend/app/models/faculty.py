@@ -135,19 +135,19 @@ class Faculty(Base):
     # Relationships
     user: Mapped["User"] = relationship(
         back_populates="faculty",
-        lazy="joined",
+        lazy="raise_on_sql",
         cascade="all, delete"
     )
     
     department: Mapped[Optional["Department"]] = relationship(
         back_populates="faculty_members",
-        lazy="joined"
+        lazy="raise_on_sql"
     )
     
     research_items: Mapped[List["ResearchItem"]] = relationship(
         back_populates="owner_faculty",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="raise_on_sql"
     )
     
     # Course offerings will be added in future when we create CourseOffering model
@@ -7,8 +7,8 @@ class Grade(Base):
 	__tablename__ = "grades"
 
 	id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-	enrollment_id: Mapped[int] = mapped_column(Integer, ForeignKey("enrollments.id"), nullable=False)
+	enrollment_id: Mapped[int] = mapped_column(Integer, ForeignKey("enrollments.id"), nullable=False, index=True)
 	value: Mapped[float] = mapped_column(Float)
 
 	# Relationships
-	enrollment: Mapped["Enrollment"] = relationship(lazy="joined")
+	enrollment: Mapped["Enrollment"] = relationship(lazy="raise_on_sql")
@@ -155,7 +155,7 @@ class ResearchItem(Base):
     # Relationships
     owner_faculty: Mapped["Faculty"] = relationship(
         back_populates="research_items",
-        lazy="joined"
+        lazy="raise_on_sql"
     )
     
     # This will be added after creating collaboration table
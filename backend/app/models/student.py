@@ -122,18 +122,18 @@ class Student(Base):
 	# Relationships
 	user: Mapped["User"] = relationship(
 		back_populates="student",
-		lazy="joined"
+		lazy="raise_on_sql"
 	)
 	
 	department: Mapped[Optional["Department"]] = relationship(
 		back_populates="students",
-		lazy="joined"
+		lazy="raise_on_sql"
 	)
 	
 	enrollments: Mapped[List["Enrollment"]] = relationship(
 		back_populates="student",
 		cascade="all, delete-orphan",
-		lazy="selectin",
+		lazy="raise_on_sql",
 	)
 
 	def __repr__(self) -> str:
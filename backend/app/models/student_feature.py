@@ -0,0 +1,54 @@
+"""
+StudentFeature model for Academic Data Platform.
+
+This module defines the precomputed per-student, per-term feature rows used by
+analytics scoring and dashboards.
+"""
+
+from datetime import datetime
+from sqlalchemy import Integer, String, Float, DateTime, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class StudentFeature(Base):
+	"""
+	Aggregated academic features of one student in one term.
+	
+	Sums and counts are stored instead of averages so that several terms can be
+	combined exactly (e.g. GPA = sum(grade_sum) / sum(graded_courses)).
+	
+	Attributes:
+		student_id: Foreign key to Student table
+		term: Academic term (e.g. "1402-1")
+		enrolled_courses: Number of enrollments in the term
+		graded_courses: Number of enrollments with a grade
+		grade_sum: Sum of the per-enrollment grades (0-20 scale)
+		failed_courses: Number of graded enrollments below the passing grade
+		credit_hours: Total credits enrolled in the term
+		updated_at: Last refresh timestamp
+	"""
+	
+	__tablename__ = "student_features"
+
+	student_id: Mapped[int] = mapped_column(
+		Integer,
+		ForeignKey("students.id", ondelete="CASCADE"),
+		primary_key=True,
+		comment="Foreign key to students table"
+	)
+	term: Mapped[str] = mapped_column(String(10), primary_key=True, comment="Academic term")
+	enrolled_courses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	graded_courses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	grade_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+	failed_courses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	credit_hours: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	updated_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True),
+		server_default=func.now(),
+		onupdate=func.now(),
+		comment="Last refresh timestamp"
+	)
+
+	def __repr__(self) -> str:
+		return f"<StudentFeature(student_id={self.student_id}, term='{self.term}')>"
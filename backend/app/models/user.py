@@ -4,9 +4,10 @@ User model for Academic Data Platform authentication.
 This module defines the User entity for authentication and authorization.
 """
 
+import secrets
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import Integer, String, DateTime, func, Boolean
+from sqlalchemy import Integer, String, DateTime, func, Boolean, inspect
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
@@ -15,6 +16,11 @@ if TYPE_CHECKING:
     from .faculty import Faculty
 
 
+def new_token_version() -> int:
+	"""Random starting version, so a reused user id never matches an old token's claim"""
+	return secrets.randbelow(2**31)
+
+
 class User(Base):
 	"""
 	User model for authentication and authorization.
@@ -30,6 +36,7 @@ class User(Base):
 		last_login: Last login timestamp
 		is_active: Whether account is active
 		is_verified: Whether email is verified
+		token_version: Bumped to revoke issued access tokens
 	
 	Relationships:
 		student: Related Student record (1:1)
@@ -104,6 +111,13 @@ class User(Base):
 		comment="Whether email address is verified"
 	)
 
+	token_version: Mapped[int] = mapped_column(
+		Integer,
+		default=new_token_version,
+		server_default="0",
+		comment="Bumped to revoke issued access tokens"
+	)
+
 	# Relationships
 	student: Mapped[Optional["Student"]] = relationship(
 		back_populates="user",
@@ -122,13 +136,19 @@ class User(Base):
 	
 	def __str__(self) -> str:
 		return self.email
+
+	def revoke_tokens(self) -> None:
+		"""Invalidate every access token issued so far; takes effect on commit"""
+		self.token_version = (self.token_version + 1) % 2**31
 	
 	@property
 	def display_name(self) -> str:
-		"""Returns display name based on role and related records."""
-		if self.role == "faculty" and self.faculty:
+		"""Returns display name based on role and related records, if they are loaded."""
+		# never trigger a load: relationships may be raiseload()ed by the query
+		loaded = inspect(self).dict
+		if self.role == "faculty" and loaded.get("faculty"):
 			return self.faculty.display_name
-		elif self.role == "student" and self.student:
+		elif self.role == "student" and loaded.get("student"):
 			return self.student.full_name or self.email
 		elif self.username:
 			return self.username
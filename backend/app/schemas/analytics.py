@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, List, Optional
 from datetime import datetime
 
 
@@ -10,23 +10,88 @@ class StudentFeatures(BaseModel):
     credit_hours: int = Field(ge=0)
     failed_courses: int = Field(ge=0)
     age: Optional[int] = Field(None, ge=16, le=100)
-    gender: Optional[str] = Field(None, regex="^(male|female|other)$")
+    gender: Optional[str] = Field(None, pattern="^(male|female|other)$")
 
 
 class AtRiskPrediction(BaseModel):
     student_id: int
     risk_score: float = Field(ge=0.0, le=1.0)
-    risk_level: str = Field(regex="^(low|medium|high)$")
+    risk_level: str = Field(pattern="^(low|medium|high)$")
     confidence: float = Field(ge=0.0, le=1.0)
     factors: List[str] = Field(default_factory=list)
 
 
 class AnalyticsRequest(BaseModel):
     students: List[StudentFeatures]
-    model_version: str = "v1"
+    model_version: str = Field("v1", pattern=r"^[A-Za-z0-9._-]{1,64}$")
 
 
 class AnalyticsResponse(BaseModel):
     predictions: List[AtRiskPrediction]
     model_info: dict
     generated_at: datetime
+
+
+class ScoringRunRequest(BaseModel):
+    department_id: Optional[int] = None
+    term: Optional[str] = Field(None, max_length=10)
+    model_version: str = Field("v1", pattern=r"^[A-Za-z0-9._-]{1,64}$")
+    # attendance is not recorded in the database yet, so it is assumed
+    default_attendance_rate: float = Field(1.0, ge=0.0, le=1.0)
+    chunk_size: int = Field(5000, ge=1, le=100000)
+    # "live" aggregates enrollments/grades, "store" reads the student_features table
+    source: str = Field("live", pattern="^(live|store)$")
+
+
+class ScoringRunResponse(BaseModel):
+    run_id: str
+    model_version: str
+    department_id: Optional[int] = None
+    term: Optional[str] = None
+    scored: int
+    skipped: int
+    risk_levels: dict
+    generated_at: datetime
+
+
+class AtRiskScoreOut(BaseModel):
+    student_id: int
+    term: Optional[str] = None
+    model_version: str
+    risk_score: float
+    risk_level: str
+    confidence: float
+    factors: List[str] = Field(default_factory=list)
+    scored_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TrainingJobRequest(BaseModel):
+    # the whole synthetic dataset is generated and fitted in one job worker
+    n_samples: int = Field(1000, ge=100, le=200_000)
+
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str = Field(pattern="^(queued|running|succeeded|failed)$")
+    submitted_at: datetime
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+
+class StudentFeatureOut(BaseModel):
+    student_id: int
+    term: str
+    enrolled_courses: int
+    graded_courses: int
+    grade_sum: float
+    failed_courses: int
+    credit_hours: int
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
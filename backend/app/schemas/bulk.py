@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+MAX_BULK_ITEMS = 1000
+
+
+class BulkItemResult(BaseModel):
+	# position of the item in the request array
+	index: int
+	status: str  # created | updated | unchanged | error
+	id: Optional[int] = None
+	error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+	succeeded: int
+	failed: int
+	items: List[BulkItemResult]
+
+	@classmethod
+	def from_items(cls, items: List[BulkItemResult]) -> "BulkResult":
+		failed = sum(1 for item in items if item.status == "error")
+		return cls(succeeded=len(items) - failed, failed=failed, items=items)
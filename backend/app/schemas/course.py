@@ -20,6 +20,8 @@ class CourseUpdate(BaseModel):
 
 class CourseOut(CourseBase):
 	id: int
+	# read from Course.department_code; Course.department is the relationship
+	department: str | None = Field(default=None, validation_alias="department_code")
 
 	class Config:
 		from_attributes = True
@@ -19,3 +19,7 @@ class GradeOut(GradeBase):
 
 	class Config:
 		from_attributes = True
+
+
+class GradeBulkUpdate(GradeUpdate):
+	id: int
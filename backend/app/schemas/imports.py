@@ -0,0 +1,46 @@
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
+
+
+class StudentImportRow(BaseModel):
+	student_no: str = Field(..., min_length=1, max_length=32)
+	entry_year: Optional[int] = None
+	full_name: Optional[str] = Field(default=None, max_length=128)
+	# the owning user; created with role "student" and no usable password when missing
+	email: EmailStr
+
+
+class CourseImportRow(BaseModel):
+	code: str = Field(..., min_length=1, max_length=32)
+	title: str = Field(..., min_length=1, max_length=255)
+	credits: int = Field(default=3, ge=0)
+
+
+class EnrollmentImportRow(BaseModel):
+	student_no: str = Field(..., min_length=1, max_length=32)
+	course_code: str = Field(..., min_length=1, max_length=32)
+	term: str = Field(..., min_length=1, max_length=10)
+	grade: Optional[float] = None
+
+
+class GradeImportRow(BaseModel):
+	student_no: str = Field(..., min_length=1, max_length=32)
+	course_code: str = Field(..., min_length=1, max_length=32)
+	term: str = Field(..., min_length=1, max_length=10)
+	value: float
+
+
+class ImportRowError(BaseModel):
+	# row number in the file, counting the header as row 1
+	row: int
+	error: str
+
+
+class ImportReport(BaseModel):
+	entity: str
+	rows: int = 0
+	inserted: int = 0
+	error_count: int = 0
+	# the first ``max_errors`` row errors; error_count has the total
+	errors: List[ImportRowError] = Field(default_factory=list)
+	elapsed_ms: float = 0.0
@@ -21,10 +21,18 @@ class Room(BaseModel):
 
 class ScheduleRequest(BaseModel):
 	term: str
+	campus: Optional[str] = None
 	slots: List[str]
 	sections: List[Section]
 	rooms: List[Room]
 	instructors: Optional[List[InstructorAvailability]] = None
+	# first_fit: input order, earliest slot with a fitting room, smallest such room
+	# best_fit: input order, smallest room that fits
+	# most_constrained: fewest feasible placements first, best-fit rooms
+	# repair: most_constrained followed by a local-search repair phase
+	strategy: str = Field(default="repair", pattern="^(first_fit|best_fit|most_constrained|repair)$")
+	# bounds the repair phase; construction always runs to completion
+	time_budget_ms: int = Field(default=2000, ge=1, le=60000)
 
 
 class ScheduledItem(BaseModel):
@@ -35,6 +43,81 @@ class ScheduledItem(BaseModel):
 
 class ScheduleResponse(BaseModel):
 	term: str
+	campus: Optional[str] = None
 	items: List[ScheduledItem]
 	unscheduled: List[str] = Field(default_factory=list)
+	strategy: Optional[str] = None
+	placed: int = 0
+	solve_time_ms: float = 0.0
 
+
+class ScheduleBatchRequest(BaseModel):
+	# independent terms/campuses; each entry has its own rooms and is solved on its own
+	requests: List[ScheduleRequest] = Field(min_length=1, max_length=64)
+
+
+class ScheduleBatchResponse(BaseModel):
+	results: List[ScheduleResponse]
+	placed: int
+	unscheduled: int
+	solve_time_ms: float
+
+
+class ScheduleDelta(BaseModel):
+	add_sections: List[Section] = Field(default_factory=list)
+	# replacements for existing sections, e.g. a grown enrollment or a new instructor
+	update_sections: List[Section] = Field(default_factory=list)
+	remove_sections: List[str] = Field(default_factory=list)
+	add_rooms: List[Room] = Field(default_factory=list)
+	remove_rooms: List[str] = Field(default_factory=list)
+	# replaces the availability of the listed instructors
+	instructors: List[InstructorAvailability] = Field(default_factory=list)
+	# how many pinned sections may be moved to fit affected ones
+	max_moves: int = Field(default=0, ge=0)
+
+
+class RescheduleRequest(BaseModel):
+	base: ScheduleRequest
+	schedule: ScheduleResponse
+	delta: ScheduleDelta = Field(default_factory=ScheduleDelta)
+
+
+class RescheduleResponse(ScheduleResponse):
+	pinned: int = 0
+	moves: int = 0
+	# sections whose placement differs from the prior schedule
+	changed: List[str] = Field(default_factory=list)
+
+
+class ExamScheduleRequest(BaseModel):
+	term: str
+	slots: List[str] = Field(min_length=1)
+	rooms: List[Room]
+	# limit the timetable to these courses; all courses with enrollments in the term by default
+	course_ids: Optional[List[int]] = None
+	# allow one exam to be spread over several rooms in its slot
+	split_rooms: bool = True
+
+
+class ExamRoomAssignment(BaseModel):
+	room_id: str
+	seats: int
+
+
+class ExamItem(BaseModel):
+	course_id: int
+	course_code: str
+	slot: str
+	students: int
+	rooms: List[ExamRoomAssignment]
+
+
+class ExamScheduleResponse(BaseModel):
+	term: str
+	items: List[ExamItem]
+	unscheduled: List[str] = Field(default_factory=list)
+	courses: int = 0
+	# pairs of courses that share at least one student
+	conflicts: int = 0
+	slots_used: int = 0
+	solve_time_ms: float = 0.0
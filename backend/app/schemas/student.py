@@ -8,7 +8,7 @@ class StudentBase(BaseModel):
 
 
 class StudentCreate(StudentBase):
-	pass
+	user_id: int
 
 
 class StudentUpdate(BaseModel):
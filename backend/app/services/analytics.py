@@ -1,5 +1,6 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterator, AsyncIterator
 from datetime import datetime
+import threading
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
@@ -7,7 +8,77 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import numpy as np
 
+from pydantic import ValidationError
+
+from app.core.config import settings
 from app.schemas.analytics import StudentFeatures, AtRiskPrediction, AnalyticsRequest, AnalyticsResponse
+from app.services.model_store import ModelArtifactStore
+
+
+FEATURE_COLUMNS = ['gpa', 'attendance_rate', 'credit_hours', 'failed_courses', 'age', 'gender_encoded']
+RISK_FACTORS = ['low_gpa', 'poor_attendance', 'multiple_failures', 'low_credit_load']
+# every combination of RISK_FACTORS, indexed by the bitmask of raised flags
+_FACTOR_COMBINATIONS = [
+    [name for bit, name in enumerate(RISK_FACTORS) if mask & (1 << bit)]
+    for mask in range(1 << len(RISK_FACTORS))
+]
+_GENDER_CODES = {'male': 1.0, 'female': 0.0}
+
+
+def factor_lists(flags: np.ndarray) -> List[List[str]]:
+    """Turn a boolean factor matrix (columns follow RISK_FACTORS) into per-row factor name lists"""
+    codes = flags @ (1 << np.arange(len(RISK_FACTORS)))
+    return [list(_FACTOR_COMBINATIONS[code]) for code in codes.tolist()]
+
+
+def synthetic_risk_labels(
+    gpa: np.ndarray, attendance_rate: np.ndarray, credit_hours: np.ndarray, failed_courses: np.ndarray
+) -> np.ndarray:
+    """Rule-based at-risk labels (1 = at risk) for synthetic training rows"""
+    risk_score = (
+        np.select([gpa < 2.0, gpa < 2.5, gpa < 3.0], [3, 2, 1], 0)
+        + np.select([attendance_rate < 0.6, attendance_rate < 0.8], [2, 1], 0)
+        + np.select([failed_courses > 2, failed_courses > 0], [2, 1], 0)
+        + (credit_hours < 12)
+    )
+    # Convert to binary classification
+    return (risk_score >= 3).astype(np.int64)
+
+
+def synthetic_training_batch(rng: np.random.Generator, n_samples: int) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Draw ``n_samples`` synthetic student rows and their risk labels from ``rng``"""
+    gpa = np.clip(rng.normal(2.8, 0.8, n_samples), 0, 4.0)
+    attendance_rate = np.clip(rng.beta(8, 2, n_samples), 0, 1.0)  # Skewed towards higher attendance
+    credit_hours = np.clip(rng.normal(15, 3, n_samples), 0, 30).astype(int)
+    failed_courses = np.clip(rng.poisson(0.5, n_samples), 0, 10)
+    age = np.clip(rng.normal(22, 3, n_samples), 18, 30).astype(int)
+    gender = rng.integers(0, 2, n_samples)
+    
+    features = pd.DataFrame({
+        'gpa': gpa,
+        'attendance_rate': attendance_rate,
+        'credit_hours': credit_hours,
+        'failed_courses': failed_courses,
+        'age': age,
+        'gender_encoded': gender
+    })
+    return features, synthetic_risk_labels(gpa, attendance_rate, credit_hours, failed_courses)
+
+
+def iter_synthetic_training_data(
+    n_samples: int, batch_size: int = 100_000, seed: int = 42
+) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+    """
+    Yield ``(features, labels)`` batches totalling ``n_samples`` rows.
+
+    Only one batch is held in memory at a time, so multi-million-row datasets
+    can be streamed to disk or into a benchmark. Each batch gets its own child
+    seed, making the output reproducible for a given (seed, batch_size).
+    """
+    n_batches = -(-n_samples // batch_size)
+    for i, child in enumerate(np.random.SeedSequence(seed).spawn(n_batches)):
+        size = min(batch_size, n_samples - i * batch_size)
+        yield synthetic_training_batch(np.random.default_rng(child), size)
 
 
 class AtRiskPredictor:
@@ -16,87 +87,38 @@ class AtRiskPredictor:
         self.scaler = StandardScaler()
         self.is_trained = False
         self.feature_importance = {}
+        self.training_info: Dict[str, Any] = {}
     
-    def _prepare_features(self, students: List[StudentFeatures]) -> pd.DataFrame:
-        """Convert student features to DataFrame for ML processing"""
-        data = []
-        for student in students:
-            row = {
-                'student_id': student.student_id,
-                'gpa': student.gpa,
-                'attendance_rate': student.attendance_rate,
-                'credit_hours': student.credit_hours,
-                'failed_courses': student.failed_courses,
-                'age': student.age or 20,  # Default age if not provided
-                'gender_encoded': 1 if student.gender == 'male' else 0 if student.gender == 'female' else 0.5
-            }
-            data.append(row)
-        
-        return pd.DataFrame(data)
+    def _prepare_features(self, students: List[StudentFeatures]) -> np.ndarray:
+        """Build the (n_students, len(FEATURE_COLUMNS)) feature matrix column by column"""
+        n = len(students)
+        X = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.float64)
+        X[:, 0] = np.fromiter((s.gpa for s in students), dtype=np.float64, count=n)
+        X[:, 1] = np.fromiter((s.attendance_rate for s in students), dtype=np.float64, count=n)
+        X[:, 2] = np.fromiter((s.credit_hours for s in students), dtype=np.float64, count=n)
+        X[:, 3] = np.fromiter((s.failed_courses for s in students), dtype=np.float64, count=n)
+        X[:, 4] = np.fromiter((s.age or 20 for s in students), dtype=np.float64, count=n)  # Default age if not provided
+        X[:, 5] = np.fromiter((_GENDER_CODES.get(s.gender, 0.5) for s in students), dtype=np.float64, count=n)
+        return X
+    
+    @staticmethod
+    def _risk_factor_flags(X: np.ndarray) -> np.ndarray:
+        """Boolean (n_students, len(RISK_FACTORS)) matrix of contributing factors"""
+        return np.column_stack((
+            X[:, 0] < 2.5,
+            X[:, 1] < 0.8,
+            X[:, 3] > 1,
+            X[:, 2] < 12,
+        ))
     
-    def _generate_synthetic_training_data(self, n_samples: int = 1000) -> tuple:
+    def _generate_synthetic_training_data(self, n_samples: int = 1000, seed: int = 42) -> tuple:
         """Generate synthetic training data for demonstration"""
-        np.random.seed(42)
-        
-        # Generate features
-        gpa = np.random.normal(2.8, 0.8, n_samples)
-        gpa = np.clip(gpa, 0, 4.0)
-        
-        attendance_rate = np.random.beta(8, 2, n_samples)  # Skewed towards higher attendance
-        attendance_rate = np.clip(attendance_rate, 0, 1.0)
-        
-        credit_hours = np.random.normal(15, 3, n_samples)
-        credit_hours = np.clip(credit_hours, 0, 30).astype(int)
-        
-        failed_courses = np.random.poisson(0.5, n_samples)
-        failed_courses = np.clip(failed_courses, 0, 10)
-        
-        age = np.random.normal(22, 3, n_samples)
-        age = np.clip(age, 18, 30).astype(int)
-        
-        gender = np.random.choice([0, 1], n_samples)
-        
-        # Create risk labels based on rules
-        risk_labels = []
-        for i in range(n_samples):
-            risk_score = 0
-            if gpa[i] < 2.0:
-                risk_score += 3
-            elif gpa[i] < 2.5:
-                risk_score += 2
-            elif gpa[i] < 3.0:
-                risk_score += 1
-            
-            if attendance_rate[i] < 0.6:
-                risk_score += 2
-            elif attendance_rate[i] < 0.8:
-                risk_score += 1
-            
-            if failed_courses[i] > 2:
-                risk_score += 2
-            elif failed_courses[i] > 0:
-                risk_score += 1
-            
-            if credit_hours[i] < 12:
-                risk_score += 1
-            
-            # Convert to binary classification
-            risk_labels.append(1 if risk_score >= 3 else 0)
-        
-        features = pd.DataFrame({
-            'gpa': gpa,
-            'attendance_rate': attendance_rate,
-            'credit_hours': credit_hours,
-            'failed_courses': failed_courses,
-            'age': age,
-            'gender_encoded': gender
-        })
-        
-        return features, np.array(risk_labels)
+        return synthetic_training_batch(np.random.default_rng(seed), n_samples)
     
-    def train(self):
+    def train(self, n_samples: int = 1000):
         """Train the model with synthetic data"""
-        X, y = self._generate_synthetic_training_data()
+        X, y = self._generate_synthetic_training_data(n_samples)
+        X = X[FEATURE_COLUMNS].to_numpy()  # predict() works on plain arrays
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -115,72 +137,197 @@ class AtRiskPredictor:
         accuracy = accuracy_score(y_test, y_pred)
         
         # Store feature importance
-        feature_names = ['gpa', 'attendance_rate', 'credit_hours', 'failed_courses', 'age', 'gender_encoded']
-        self.feature_importance = dict(zip(feature_names, self.model.feature_importances_))
+        self.feature_importance = dict(zip(FEATURE_COLUMNS, self.model.feature_importances_))
         
         self.is_trained = True
         
-        return {
+        self.training_info = {
             'accuracy': accuracy,
             'feature_importance': self.feature_importance,
             'training_samples': len(X_train),
-            'test_samples': len(X_test)
+            'test_samples': len(X_test),
+            'trained_at': datetime.now().isoformat()
+        }
+        return self.training_info
+    
+    def to_artifact(self) -> Dict[str, Any]:
+        """Return the fitted state that needs to be persisted"""
+        return {
+            'model': self.model,
+            'scaler': self.scaler,
+            'feature_importance': self.feature_importance,
+            'training_info': self.training_info
         }
     
-    def predict(self, students: List[StudentFeatures]) -> List[AtRiskPrediction]:
-        """Predict at-risk status for students"""
+    @classmethod
+    def from_artifact(cls, artifact: Dict[str, Any]) -> "AtRiskPredictor":
+        """Rebuild a trained predictor from a persisted artifact"""
+        predictor = cls()
+        predictor.model = artifact['model']
+        predictor.scaler = artifact['scaler']
+        predictor.feature_importance = artifact['feature_importance']
+        predictor.training_info = artifact['training_info']
+        predictor.is_trained = True
+        return predictor
+    
+    def predict_arrays(self, students: List[StudentFeatures]) -> Dict[str, np.ndarray]:
+        """
+        Columnar prediction: returns parallel arrays ``student_id``, ``risk_score``,
+        ``risk_level``, ``confidence`` and a boolean ``factors`` matrix whose
+        columns follow RISK_FACTORS.
+        """
         if not self.is_trained:
             self.train()
         
-        # Prepare features
-        df = self._prepare_features(students)
-        feature_cols = ['gpa', 'attendance_rate', 'credit_hours', 'failed_courses', 'age', 'gender_encoded']
-        X = df[feature_cols].values
+        X = self._prepare_features(students)
+        student_ids = np.fromiter((s.student_id for s in students), dtype=np.int64, count=len(students))
+        if not len(students):
+            return {
+                'student_id': student_ids,
+                'risk_score': np.empty(0),
+                'risk_level': np.empty(0, dtype=object),
+                'confidence': np.empty(0),
+                'factors': np.empty((0, len(RISK_FACTORS)), dtype=bool)
+            }
         
-        # Scale features
-        X_scaled = self.scaler.transform(X)
+        # Probability of being at-risk
+        risk_probs = self.model.predict_proba(self.scaler.transform(X))[:, 1]
+        risk_levels = np.where(risk_probs > 0.7, 'high', np.where(risk_probs > 0.4, 'medium', 'low')).astype(object)
         
-        # Get predictions and probabilities
-        risk_probs = self.model.predict_proba(X_scaled)[:, 1]  # Probability of being at-risk
-        risk_predictions = self.model.predict(X_scaled)
+        return {
+            'student_id': student_ids,
+            'risk_score': risk_probs,
+            'risk_level': risk_levels,
+            'confidence': np.maximum(risk_probs, 1 - risk_probs),
+            'factors': self._risk_factor_flags(X)
+        }
+    
+    def predict(
+        self, students: List[StudentFeatures], columnar: bool = False
+    ) -> Union[List[AtRiskPrediction], Dict[str, np.ndarray]]:
+        """Predict at-risk status for students (``columnar=True`` returns predict_arrays output)"""
+        result = self.predict_arrays(students)
+        if columnar:
+            return result
         
-        predictions = []
-        for i, student in enumerate(students):
-            risk_score = float(risk_probs[i])
-            risk_level = "high" if risk_score > 0.7 else "medium" if risk_score > 0.4 else "low"
-            confidence = float(max(risk_probs[i], 1 - risk_probs[i]))
-            
-            # Identify contributing factors
-            factors = []
-            if student.gpa < 2.5:
-                factors.append("low_gpa")
-            if student.attendance_rate < 0.8:
-                factors.append("poor_attendance")
-            if student.failed_courses > 1:
-                factors.append("multiple_failures")
-            if student.credit_hours < 12:
-                factors.append("low_credit_load")
-            
-            predictions.append(AtRiskPrediction(
-                student_id=student.student_id,
+        # values are already range-checked above, so skip per-row validation
+        return [
+            AtRiskPrediction.model_construct(
+                student_id=student_id,
                 risk_score=risk_score,
                 risk_level=risk_level,
                 confidence=confidence,
                 factors=factors
-            ))
-        
-        return predictions
+            )
+            for student_id, risk_score, risk_level, confidence, factors in zip(
+                result['student_id'].tolist(),
+                result['risk_score'].tolist(),
+                result['risk_level'].tolist(),
+                result['confidence'].tolist(),
+                factor_lists(result['factors'])
+            )
+        ]
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of trained predictors keyed by model_version.
+
+    Each version is trained or loaded lazily, at most once per process, on
+    first use: the predictor stays in memory and is persisted through a
+    ModelArtifactStore so that other workers (and restarts) warm-start from
+    disk instead of retraining. Loaded artifacts are checksum-verified and
+    memory-mapped; scoring uses the fitted sklearn forest itself.
+    A cached predictor is reloaded when its artifact is replaced on disk, e.g.
+    by a training job running in another process.
+    """
+
+    artifact_name = "at_risk"
+
+    def __init__(self, store: ModelArtifactStore):
+        self.store = store
+        self._models: Dict[str, Tuple[AtRiskPredictor, Optional[int]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _artifact_mtime(self, model_version: str) -> Optional[int]:
+        return self.store.mtime(self.artifact_name, model_version)
+
+    def _lock_for(self, model_version: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(model_version, threading.Lock())
+
+    def _load(self, model_version: str) -> Optional[AtRiskPredictor]:
+        artifact = self.store.load(self.artifact_name, model_version, mmap=True)
+        # artifacts in the older flattened-forest format are retrained
+        if artifact is None or 'model' not in artifact:
+            return None
+        return AtRiskPredictor.from_artifact(artifact)
+
+    def _save(self, model_version: str, predictor: AtRiskPredictor) -> None:
+        self.store.save(
+            self.artifact_name,
+            model_version,
+            predictor.to_artifact(),
+            metadata={"algorithm": "RandomForest", "training_info": predictor.training_info}
+        )
+
+    def _cached(self, model_version: str) -> Optional[AtRiskPredictor]:
+        entry = self._models.get(model_version)
+        if entry is None:
+            return None
+        predictor, mtime = entry
+        if mtime != self._artifact_mtime(model_version):
+            return None
+        return predictor
+
+    def get(self, model_version: str) -> Tuple[AtRiskPredictor, str]:
+        """
+        Return the predictor for ``model_version`` and where it came from:
+        ``"memory"`` (already cached), ``"disk"`` (loaded from an artifact)
+        or ``"trained"`` (fitted by this call).
+        """
+        predictor = self._cached(model_version)
+        if predictor is not None:
+            return predictor, "memory"
+        with self._lock_for(model_version):
+            predictor = self._cached(model_version)
+            if predictor is not None:
+                return predictor, "memory"
+            predictor = self._load(model_version)
+            source = "disk"
+            if predictor is None:
+                predictor = AtRiskPredictor()
+                predictor.train()
+                self._save(model_version, predictor)
+                source = "trained"
+            self._models[model_version] = (predictor, self._artifact_mtime(model_version))
+            return predictor, source
+
+    def train(self, model_version: str, n_samples: int = 1000) -> AtRiskPredictor:
+        """(Re)train ``model_version`` and replace its artifact"""
+        with self._lock_for(model_version):
+            predictor = AtRiskPredictor()
+            predictor.train(n_samples)
+            self._save(model_version, predictor)
+            self._models[model_version] = (predictor, self._artifact_mtime(model_version))
+            return predictor
+
+    def evict(self, model_version: Optional[str] = None) -> None:
+        """Drop cached predictors from memory (artifacts on disk are kept)"""
+        with self._guard:
+            if model_version is None:
+                self._models.clear()
+            else:
+                self._models.pop(model_version, None)
+
+
+model_registry = ModelRegistry(ModelArtifactStore(settings.analytics_model_dir))
 
 
 def analyze_at_risk_students(request: AnalyticsRequest) -> AnalyticsResponse:
     """Main function to analyze at-risk students"""
-    predictor = AtRiskPredictor()
-    
-    # Train model if not already trained
-    if not predictor.is_trained:
-        training_info = predictor.train()
-    else:
-        training_info = {"status": "model_already_trained"}
+    predictor, source = model_registry.get(request.model_version)
     
     # Make predictions
     predictions = predictor.predict(request.students)
@@ -190,8 +337,58 @@ def analyze_at_risk_students(request: AnalyticsRequest) -> AnalyticsResponse:
         model_info={
             "version": request.model_version,
             "algorithm": "RandomForest",
-            "training_info": training_info,
+            "cached": source != "trained",
+            "source": source,
+            "training_info": predictor.training_info,
             "feature_importance": predictor.feature_importance
         },
         generated_at=datetime.now()
     )
+
+
+def warm_model(model_version: str) -> Dict[str, Any]:
+    """Make sure ``model_version`` is loaded in the current (worker) process"""
+    _, source = model_registry.get(model_version)
+    return {"version": model_version, "source": source}
+
+
+def train_model(model_version: str, n_samples: int = 1000) -> Dict[str, Any]:
+    """Job entry point: retrain ``model_version`` and persist the new artifact"""
+    predictor = model_registry.train(model_version, n_samples)
+    return {"version": model_version, "training_info": predictor.training_info}
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split a byte stream into ``(line_no, line)`` pairs, skipping blank lines"""
+    buffer = bytearray()
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        end = buffer.rfind(b"\n")
+        if end < 0:
+            continue
+        lines = buffer[:end].split(b"\n")
+        del buffer[:end + 1]
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, bytes(line)
+    if buffer.strip():
+        yield line_no + 1, bytes(buffer)
+
+
+def parse_student_line(line_no: int, line: bytes) -> Union[StudentFeatures, Dict[str, Any]]:
+    """Parse one NDJSON line, returning an error record instead of raising"""
+    try:
+        return StudentFeatures.model_validate_json(line)
+    except ValidationError as e:
+        return {"line": line_no, "error": e.errors(include_url=False, include_context=False, include_input=False)}
+
+
+def score_ndjson_batch(model_version: str, students: List[StudentFeatures]) -> bytes:
+    """Score a micro-batch and encode the predictions as NDJSON"""
+    if not students:
+        return b""
+    predictor, _ = model_registry.get(model_version)
+    lines = [p.model_dump_json() for p in predictor.predict(students)]
+    return ("\n".join(lines) + "\n").encode()
@@ -0,0 +1,190 @@
+import heapq
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.course import Course
+from app.models.enrollment import Enrollment
+from app.schemas.scheduling import (
+	ExamItem,
+	ExamRoomAssignment,
+	ExamScheduleRequest,
+	ExamScheduleResponse,
+	Room,
+)
+
+
+def load_exam_enrollments(db: Session, term: str, course_ids: Optional[Sequence[int]] = None) -> np.ndarray:
+	"""``(n, 2)`` array of distinct ``(student_id, course_id)`` pairs enrolled in ``term``"""
+	stmt = select(Enrollment.student_id, Enrollment.course_id).where(Enrollment.term == term).distinct()
+	if course_ids is not None:
+		stmt = stmt.where(Enrollment.course_id.in_(course_ids))
+	rows = db.execute(stmt).all()
+	return np.asarray(rows, dtype=np.int64).reshape(-1, 2)
+
+
+def course_conflict_graph(pairs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, sparse.csr_matrix]:
+	"""
+	Build the course conflict graph from ``(student_id, course_id)`` pairs.
+
+	Returns ``(course_ids, students_per_course, adjacency)`` where adjacency is
+	a symmetric CSR matrix over course indices whose entries count the students
+	two courses share. It is computed as ``S.T @ S`` on the sparse
+	student x course incidence matrix, so the cost follows the number of
+	enrollments and conflicting pairs rather than courses squared.
+	"""
+	students, student_idx = np.unique(pairs[:, 0], return_inverse=True)
+	courses, course_idx = np.unique(pairs[:, 1], return_inverse=True)
+	incidence = sparse.csr_matrix(
+		(np.ones(len(pairs), dtype=np.int32), (student_idx, course_idx)),
+		shape=(len(students), len(courses)),
+	)
+	# duplicate pairs are summed on construction; an enrollment counts once
+	incidence.data[:] = 1
+	shared = (incidence.T @ incidence).tocsr()
+	sizes = shared.diagonal().astype(np.int64)
+	shared.setdiag(0)
+	shared.eliminate_zeros()
+	return courses, sizes, shared
+
+
+class _ExamRooms:
+	"""Free rooms per slot as int bitsets over rooms in ascending capacity order"""
+
+	def __init__(self, rooms: List[Room], n_slots: int):
+		self.rooms = sorted(rooms, key=lambda r: r.capacity)
+		self.capacities = [r.capacity for r in self.rooms]
+		self.free = [(1 << len(self.rooms)) - 1] * n_slots
+		self.free_seats = [sum(self.capacities)] * n_slots
+
+	def _smallest_free(self, slot: int, seats: int) -> int:
+		start = bisect_left(self.capacities, seats)
+		rooms = self.free[slot] >> start
+		if not rooms:
+			return -1
+		return start + (rooms & -rooms).bit_length() - 1
+
+	def pack(self, slot: int, seats: int, split: bool) -> Optional[List[Tuple[int, int]]]:
+		"""
+		Reserve rooms for ``seats`` students in ``slot``: the smallest room that
+		holds everyone, or when splitting is allowed the largest free rooms until
+		the remainder fits the smallest room that can take it.
+		"""
+		if seats > self.free_seats[slot]:
+			return None
+		r = self._smallest_free(slot, seats)
+		if r >= 0:
+			taken = [(r, seats)]
+		elif not split:
+			return None
+		else:
+			taken = []
+			free, remaining = self.free[slot], seats
+			while remaining > 0:
+				r = free.bit_length() - 1
+				if self.capacities[r] >= remaining:
+					# the last piece goes to the smallest room that fits it
+					last = bisect_left(self.capacities, remaining)
+					rooms = free >> last
+					r = last + (rooms & -rooms).bit_length() - 1
+					taken.append((r, remaining))
+					break
+				taken.append((r, self.capacities[r]))
+				remaining -= self.capacities[r]
+				free &= ~(1 << r)
+		for r, _ in taken:
+			self.free[slot] &= ~(1 << r)
+			self.free_seats[slot] -= self.capacities[r]
+		return taken
+
+
+def dsatur_exam_slots(
+	adjacency: sparse.csr_matrix,
+	sizes: np.ndarray,
+	rooms: List[Room],
+	n_slots: int,
+	split_rooms: bool = True,
+) -> Tuple[List[int], List[List[Tuple[str, int]]]]:
+	"""
+	DSATUR colouring of the conflict graph with slots as colours.
+
+	The uncoloured course with the most distinctly-slotted neighbours goes next
+	(ties: higher degree, then more students) and takes the earliest slot none
+	of its neighbours use whose free rooms can seat it. Courses with no such
+	slot get slot -1. Neighbour slots are kept as int bitmasks per course.
+	"""
+	n = adjacency.shape[0]
+	indptr, indices = adjacency.indptr, adjacency.indices
+	degree = np.diff(indptr).tolist()
+	sizes = sizes.tolist()
+	all_slots = (1 << n_slots) - 1
+	neighbour_slots = [0] * n
+	slot_of = [-1] * n
+	done = [False] * n
+	placements: List[List[Tuple[str, int]]] = [[] for _ in range(n)]
+	packer = _ExamRooms(rooms, n_slots)
+
+	heap = [(0, -degree[v], -sizes[v], v) for v in range(n)]
+	heapq.heapify(heap)
+	while heap:
+		neg_sat, _, _, v = heapq.heappop(heap)
+		if done[v] or -neg_sat != neighbour_slots[v].bit_count():
+			continue  # already coloured, or a stale entry from before its saturation grew
+		done[v] = True
+		candidates = all_slots & ~neighbour_slots[v]
+		while candidates:
+			low = candidates & -candidates
+			slot = low.bit_length() - 1
+			candidates ^= low
+			taken = packer.pack(slot, sizes[v], split_rooms)
+			if taken is not None:
+				slot_of[v] = slot
+				placements[v] = [(packer.rooms[r].room_id, seats) for r, seats in taken]
+				break
+		if slot_of[v] < 0:
+			continue
+		bit = 1 << slot_of[v]
+		for u in indices[indptr[v]:indptr[v + 1]].tolist():
+			if not done[u] and not neighbour_slots[u] & bit:
+				neighbour_slots[u] |= bit
+				heapq.heappush(heap, (-neighbour_slots[u].bit_count(), -degree[u], -sizes[u], u))
+	return slot_of, placements
+
+
+def schedule_exams(db: Session, req: ExamScheduleRequest) -> ExamScheduleResponse:
+	"""Exam timetable for ``req.term``: no student sits two exams in the same slot"""
+	started = time.perf_counter()
+	pairs = load_exam_enrollments(db, req.term, req.course_ids)
+	courses, sizes, adjacency = course_conflict_graph(pairs)
+	slot_of, placements = dsatur_exam_slots(adjacency, sizes, req.rooms, len(req.slots), req.split_rooms)
+
+	codes: Dict[int, str] = dict(
+		db.execute(select(Course.id, Course.code).where(Course.id.in_(courses.tolist()))).all()
+	) if len(courses) else {}
+	items: List[ExamItem] = []
+	unscheduled: List[str] = []
+	for course_id, students, slot, rooms in zip(courses.tolist(), sizes.tolist(), slot_of, placements):
+		code = codes.get(course_id, str(course_id))
+		if slot < 0:
+			unscheduled.append(code)
+			continue
+		items.append(ExamItem(
+			course_id=course_id,
+			course_code=code,
+			slot=req.slots[slot],
+			students=students,
+			rooms=[ExamRoomAssignment(room_id=room_id, seats=seats) for room_id, seats in rooms],
+		))
+	return ExamScheduleResponse(
+		term=req.term,
+		items=items,
+		unscheduled=unscheduled,
+		courses=len(courses),
+		conflicts=adjacency.nnz // 2,
+		slots_used=len({item.slot for item in items}),
+		solve_time_ms=round((time.perf_counter() - started) * 1000, 3),
+	)
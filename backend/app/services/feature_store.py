@@ -0,0 +1,124 @@
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import case, delete, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.course import Course
+from app.models.enrollment import Enrollment
+from app.models.grade import Grade
+from app.models.student import Student
+from app.models.student_feature import StudentFeature
+from app.schemas.analytics import StudentFeatures
+
+# grades are recorded on a 0-20 scale; the model works on a 0-4 GPA
+GRADE_SCALE = 20.0
+PASSING_GRADE = 10.0
+
+FeatureKey = Tuple[int, str]
+
+
+def enrollment_grades_query():
+	"""Per-enrollment ``(enrollment_id, student_id, term, credits, grade)`` rows"""
+	grade_value = func.coalesce(Grade.value, Enrollment.grade)
+	return (
+		select(
+			Enrollment.id.label("enrollment_id"),
+			Enrollment.student_id,
+			Enrollment.term,
+			func.coalesce(Course.credits, 0).label("credits"),
+			func.avg(grade_value).label("grade"),
+		)
+		.join(Course, Course.id == Enrollment.course_id)
+		.outerjoin(Grade, Grade.enrollment_id == Enrollment.id)
+		.group_by(Enrollment.id, Enrollment.student_id, Enrollment.term, Course.credits)
+	)
+
+
+def term_features_query(keys: Optional[List[FeatureKey]] = None):
+	"""Aggregate enrollments into one student_features row per (student_id, term)"""
+	per_enrollment = enrollment_grades_query()
+	if keys is not None:
+		per_enrollment = per_enrollment.where(tuple_(Enrollment.student_id, Enrollment.term).in_(keys))
+	enr = per_enrollment.subquery()
+	return (
+		select(
+			enr.c.student_id,
+			enr.c.term,
+			func.count().label("enrolled_courses"),
+			func.count(enr.c.grade).label("graded_courses"),
+			func.coalesce(func.sum(enr.c.grade), 0.0).label("grade_sum"),
+			func.coalesce(func.sum(case((enr.c.grade < PASSING_GRADE, 1), else_=0)), 0).label("failed_courses"),
+			func.coalesce(func.sum(enr.c.credits), 0).label("credit_hours"),
+		)
+		.group_by(enr.c.student_id, enr.c.term)
+	)
+
+
+_COLUMNS = ["student_id", "term", "enrolled_courses", "graded_courses", "grade_sum", "failed_courses", "credit_hours"]
+
+
+def refresh_student_features(db: Session, keys: Iterable[FeatureKey]) -> None:
+	"""
+	Recompute the feature rows for the given (student_id, term) keys inside the
+	caller's transaction. Call it after changing enrollments or grades and before
+	committing; only the touched keys are re-aggregated.
+	"""
+	keys = list({(student_id, term) for student_id, term in keys})
+	if not keys:
+		return
+	db.flush()
+	db.execute(delete(StudentFeature).where(tuple_(StudentFeature.student_id, StudentFeature.term).in_(keys)))
+	db.execute(insert(StudentFeature).from_select(_COLUMNS, term_features_query(keys)))
+
+
+def rebuild_student_features(db: Session) -> int:
+	"""Regenerate the whole feature store from enrollments and grades"""
+	db.execute(delete(StudentFeature))
+	db.execute(insert(StudentFeature).from_select(_COLUMNS, term_features_query()))
+	db.commit()
+	return db.scalar(select(func.count()).select_from(StudentFeature))
+
+
+def stored_feature_query(department_id: Optional[int] = None, term: Optional[str] = None):
+	"""
+	Same shape as the live scoring aggregate, ``(student_id, mean_grade,
+	failed_courses, credit_hours)``, but read from student_features; with a
+	``term`` only students that have features for it are returned.
+	"""
+	join_on = StudentFeature.student_id == Student.id
+	if term is not None:
+		join_on = join_on & (StudentFeature.term == term)
+	n_terms = func.count(StudentFeature.term)
+	graded = func.sum(StudentFeature.graded_courses)
+	stmt = (
+		select(
+			Student.id.label("student_id"),
+			case((graded > 0, func.sum(StudentFeature.grade_sum) / graded), else_=Student.gpa).label("mean_grade"),
+			func.coalesce(func.sum(StudentFeature.failed_courses), 0).label("failed_courses"),
+			case((n_terms > 0, func.sum(StudentFeature.credit_hours) / n_terms), else_=0).label("credit_hours"),
+		)
+		.select_from(Student)
+		.join(StudentFeature, join_on, isouter=term is None)
+		.where(Student.status == "active")
+		.group_by(Student.id, Student.gpa)
+		.order_by(Student.id)
+	)
+	if department_id is not None:
+		stmt = stmt.where(Student.department_id == department_id)
+	return stmt
+
+
+def to_student_features(
+	student_id: int, mean_grade, failed_courses, credit_hours, attendance_rate: float = 1.0
+) -> Optional[StudentFeatures]:
+	"""Convert one aggregate row into model features (None if there is no grade data)"""
+	if mean_grade is None:
+		return None
+	return StudentFeatures.model_construct(
+		student_id=student_id,
+		gpa=min(max(float(mean_grade) * 4.0 / GRADE_SCALE, 0.0), 4.0),
+		attendance_rate=attendance_rate,
+		credit_hours=int(credit_hours or 0),
+		failed_courses=int(failed_courses or 0),
+		age=None,
+		gender=None,
+	)
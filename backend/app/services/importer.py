@@ -0,0 +1,352 @@
+"""
+Bulk import of students, courses, enrollments and grades from CSV or XLSX.
+
+Files are streamed in chunks. Each chunk is validated with one pydantic call,
+its foreign keys and duplicates are resolved with one set-based query per
+table and its rows are written with a single executemany INSERT (ON CONFLICT
+DO NOTHING on natural keys where the dialect supports it), then committed.
+If a chunk still fails in the database it is retried row by row, so the
+report names the offending rows instead of aborting the import.
+"""
+
+import csv
+import io
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Type
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.models.course import Course
+from app.models.enrollment import Enrollment
+from app.models.grade import Grade
+from app.models.student import Student
+from app.models.user import User
+from app.schemas.imports import (
+	CourseImportRow,
+	EnrollmentImportRow,
+	GradeImportRow,
+	ImportReport,
+	ImportRowError,
+	StudentImportRow,
+)
+from app.services.feature_store import refresh_student_features
+
+DEFAULT_CHUNK_SIZE = 5000
+# users created for imported students cannot log in until an admin sets a password
+UNUSABLE_PASSWORD = "!"
+
+RawRow = Dict[str, Optional[str]]
+Numbered = List[Tuple[int, Any]]  # (row number, row)
+
+
+class ImportFormatError(ValueError):
+	"""The uploaded file cannot be read as the requested format"""
+
+
+def _clean(value: Any) -> Optional[str]:
+	if value is None:
+		return None
+	value = str(value).strip()
+	return value or None
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[RawRow]:
+	text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+	try:
+		for row in csv.DictReader(text):
+			yield {key.strip(): _clean(value) for key, value in row.items() if key}
+	except UnicodeDecodeError as e:
+		raise ImportFormatError(f"CSV files must be UTF-8 encoded: {e}")
+	finally:
+		text.detach()
+
+
+def iter_xlsx_rows(stream: BinaryIO) -> Iterator[RawRow]:
+	"""Rows of the first worksheet; the first row holds the column names"""
+	try:
+		from openpyxl import load_workbook
+	except ImportError:
+		raise ImportFormatError("reading .xlsx files requires the openpyxl package")
+	try:
+		workbook = load_workbook(stream, read_only=True, data_only=True)
+	except Exception as e:
+		raise ImportFormatError(f"not a readable .xlsx file: {e}")
+	try:
+		rows = workbook.worksheets[0].iter_rows(values_only=True)
+		header = [_clean(name) for name in next(rows, ())]
+		for values in rows:
+			yield {name: _clean(value) for name, value in zip(header, values) if name}
+	finally:
+		workbook.close()
+
+
+def iter_file_rows(stream: BinaryIO, fmt: str) -> Iterator[RawRow]:
+	if fmt == "csv":
+		return iter_csv_rows(stream)
+	if fmt == "xlsx":
+		return iter_xlsx_rows(stream)
+	raise ImportFormatError(f"unsupported format {fmt!r}, expected csv or xlsx")
+
+
+def format_from_filename(filename: Optional[str]) -> str:
+	return "xlsx" if filename and filename.lower().endswith(".xlsx") else "csv"
+
+
+def _insert(db: Session, model: type, records: List[Dict[str, Any]], conflict_keys: Sequence[str] = ()) -> int:
+	"""
+	One executemany INSERT; rows that hit a unique key are dropped where the
+	dialect allows it. Returns the number of rows actually inserted.
+	"""
+	if not records:
+		return 0
+	dialect = db.get_bind().dialect.name
+	if conflict_keys and dialect == "postgresql":
+		from sqlalchemy.dialects.postgresql import insert as dialect_insert
+		stmt = dialect_insert(model).on_conflict_do_nothing(index_elements=list(conflict_keys))
+	elif conflict_keys and dialect == "sqlite":
+		from sqlalchemy.dialects.sqlite import insert as dialect_insert
+		stmt = dialect_insert(model).on_conflict_do_nothing(index_elements=list(conflict_keys))
+	else:
+		stmt = insert(model)
+	return len(db.execute(stmt.returning(model.id), records).all())
+
+
+class _Chunk:
+	"""Rows of one chunk waiting to be written, plus the errors found so far"""
+
+	def __init__(self):
+		self.records: List[Dict[str, Any]] = []
+		self.errors: List[ImportRowError] = []
+		self.feature_keys: Set[Tuple[int, str]] = set()
+		self.inserted = 0
+
+	def error(self, row: int, message: str) -> None:
+		self.errors.append(ImportRowError(row=row, error=message))
+
+
+def _unique(rows: Numbered, key: Callable[[Any], Any], chunk: _Chunk, label: str) -> Numbered:
+	"""Drop rows repeating the key of an earlier row of the same chunk"""
+	seen: Set[Any] = set()
+	kept: Numbered = []
+	for row_no, row in rows:
+		k = key(row)
+		if k in seen:
+			chunk.error(row_no, f"duplicate {label} in file")
+			continue
+		seen.add(k)
+		kept.append((row_no, row))
+	return kept
+
+
+def _ids_by(db: Session, column, id_column, values: Iterable[str]) -> Dict[str, int]:
+	return dict(db.execute(select(column, id_column).where(column.in_(set(values)))).all())
+
+
+def _import_students(db: Session, rows: Numbered, chunk: _Chunk) -> None:
+	"""
+	Students with their owning user. Users are matched by email ignoring case
+	and, when missing, created with the email as typed.
+	"""
+	rows = _unique(rows, lambda r: r.student_no, chunk, "student_no")
+	rows = _unique(rows, lambda r: r.email.lower(), chunk, "email")
+	existing = _ids_by(db, Student.student_no, Student.id, (r.student_no for _, r in rows))
+	users = _ids_by(db, func.lower(User.email), User.id, (r.email.lower() for _, r in rows))
+	linked = set(db.execute(select(Student.user_id).where(Student.user_id.in_(list(users.values())))).scalars())
+	accepted: Numbered = []
+	for row_no, row in rows:
+		user_id = users.get(row.email.lower())
+		if row.student_no in existing:
+			chunk.error(row_no, f"student_no {row.student_no} already exists")
+		elif user_id is not None and user_id in linked:
+			chunk.error(row_no, f"user {row.email} already has a student record")
+		else:
+			accepted.append((row_no, row))
+	missing = [
+		{"email": row.email, "role": "student", "password_hash": UNUSABLE_PASSWORD}
+		for _, row in accepted if row.email.lower() not in users
+	]
+	if missing:
+		# RETURNING order is not guaranteed for multi-row inserts; match on the email
+		created = db.execute(insert(User).returning(User.id, User.email), missing)
+		users.update({email.lower(): user_id for user_id, email in created})
+	for _, row in accepted:
+		chunk.records.append({**row.model_dump(exclude={"email"}), "user_id": users[row.email.lower()]})
+	chunk.inserted += _insert(db, Student, chunk.records, ("student_no",))
+
+
+def _import_courses(db: Session, rows: Numbered, chunk: _Chunk) -> None:
+	rows = _unique(rows, lambda r: r.code, chunk, "code")
+	existing = _ids_by(db, Course.code, Course.id, (r.code for _, r in rows))
+	for row_no, row in rows:
+		if row.code in existing:
+			chunk.error(row_no, f"course {row.code} already exists")
+		else:
+			chunk.records.append(row.model_dump())
+	chunk.inserted += _insert(db, Course, chunk.records, ("code",))
+
+
+def _resolve_enrollment_keys(db: Session, rows: Numbered, chunk: _Chunk) -> List[Tuple[int, Any, int, int]]:
+	"""``(row number, row, student_id, course_id)`` for rows whose student and course exist"""
+	students = _ids_by(db, Student.student_no, Student.id, (r.student_no for _, r in rows))
+	courses = _ids_by(db, Course.code, Course.id, (r.course_code for _, r in rows))
+	resolved = []
+	for row_no, row in rows:
+		student_id, course_id = students.get(row.student_no), courses.get(row.course_code)
+		if student_id is None:
+			chunk.error(row_no, f"unknown student_no {row.student_no}")
+		elif course_id is None:
+			chunk.error(row_no, f"unknown course_code {row.course_code}")
+		else:
+			resolved.append((row_no, row, student_id, course_id))
+	return resolved
+
+
+def _existing_enrollments(db: Session, keys: Set[Tuple[int, int, str]]) -> Dict[Tuple[int, int, str], int]:
+	if not keys:
+		return {}
+	stmt = select(Enrollment.student_id, Enrollment.course_id, Enrollment.term, Enrollment.id).where(
+		tuple_(Enrollment.student_id, Enrollment.course_id, Enrollment.term).in_(list(keys))
+	)
+	return {(s, c, t): enrollment_id for s, c, t, enrollment_id in db.execute(stmt)}
+
+
+def _import_enrollments(db: Session, rows: Numbered, chunk: _Chunk) -> None:
+	rows = _unique(rows, lambda r: (r.student_no, r.course_code, r.term), chunk, "enrollment")
+	resolved = _resolve_enrollment_keys(db, rows, chunk)
+	existing = _existing_enrollments(db, {(s, c, row.term) for _, row, s, c in resolved})
+	for row_no, row, student_id, course_id in resolved:
+		if (student_id, course_id, row.term) in existing:
+			chunk.error(row_no, "enrollment already exists")
+			continue
+		chunk.records.append({"student_id": student_id, "course_id": course_id, "term": row.term, "grade": row.grade})
+		chunk.feature_keys.add((student_id, row.term))
+	chunk.inserted += _insert(db, Enrollment, chunk.records)
+
+
+def _import_grades(db: Session, rows: Numbered, chunk: _Chunk) -> None:
+	rows = _unique(rows, lambda r: (r.student_no, r.course_code, r.term), chunk, "grade")
+	resolved = _resolve_enrollment_keys(db, rows, chunk)
+	enrollments = _existing_enrollments(db, {(s, c, row.term) for _, row, s, c in resolved})
+	graded = set(db.execute(
+		select(Grade.enrollment_id).where(Grade.enrollment_id.in_(list(enrollments.values())))
+	).scalars())
+	for row_no, row, student_id, course_id in resolved:
+		enrollment_id = enrollments.get((student_id, course_id, row.term))
+		if enrollment_id is None:
+			chunk.error(row_no, "no such enrollment")
+		elif enrollment_id in graded:
+			chunk.error(row_no, "enrollment already has a grade")
+		else:
+			chunk.records.append({"enrollment_id": enrollment_id, "value": row.value})
+			chunk.feature_keys.add((student_id, row.term))
+	chunk.inserted += _insert(db, Grade, chunk.records)
+
+
+@dataclass(frozen=True)
+class _Entity:
+	row_model: Type[BaseModel]
+	write: Callable[[Session, Numbered, _Chunk], None]
+
+
+ENTITIES: Dict[str, _Entity] = {
+	"students": _Entity(StudentImportRow, _import_students),
+	"courses": _Entity(CourseImportRow, _import_courses),
+	"enrollments": _Entity(EnrollmentImportRow, _import_enrollments),
+	"grades": _Entity(GradeImportRow, _import_grades),
+}
+
+
+def _validate(row_model: Type[BaseModel], raw: Numbered, chunk: _Chunk) -> Numbered:
+	"""Validate a whole chunk in one call, falling back to per-row results only when some rows fail"""
+	adapter = TypeAdapter(List[row_model])
+	try:
+		models = adapter.validate_python([row for _, row in raw])
+		return [(row_no, model) for (row_no, _), model in zip(raw, models)]
+	except ValidationError as e:
+		failed: Dict[int, str] = {}
+		for err in e.errors():
+			index, field = err["loc"][0], ".".join(str(part) for part in err["loc"][1:])
+			failed.setdefault(index, f"{field}: {err['msg']}" if field else err["msg"])
+	valid: Numbered = []
+	for index, (row_no, row) in enumerate(raw):
+		if index in failed:
+			chunk.error(row_no, failed[index])
+		else:
+			valid.append((row_no, row_model.model_validate(row)))
+	return valid
+
+
+def _write(db: Session, spec: _Entity, rows: Numbered, chunk: _Chunk) -> None:
+	spec.write(db, rows, chunk)
+	if chunk.feature_keys:
+		refresh_student_features(db, chunk.feature_keys)
+	db.commit()
+
+
+def _write_rows_one_by_one(db: Session, spec: _Entity, rows: Numbered, chunk: _Chunk) -> None:
+	"""Fallback after a chunk failed in the database: commit each row alone and report the ones that fail"""
+	for row_no, row in rows:
+		single = _Chunk()
+		try:
+			_write(db, spec, [(row_no, row)], single)
+		except DBAPIError as e:
+			db.rollback()
+			chunk.error(row_no, f"database error: {str(e.orig).splitlines()[0]}")
+			continue
+		chunk.errors.extend(single.errors)
+		chunk.inserted += single.inserted
+
+
+def import_rows(
+	db: Session,
+	entity: str,
+	rows: Iterable[RawRow],
+	chunk_size: int = DEFAULT_CHUNK_SIZE,
+	max_errors: int = 1000,
+) -> ImportReport:
+	"""
+	Import ``rows`` (dicts keyed by column name) as ``entity``. Every chunk is
+	committed on its own; rows the database rejects are reported like
+	validation errors.
+	"""
+	spec = ENTITIES[entity]
+	started = time.perf_counter()
+	report = ImportReport(entity=entity)
+	numbered = enumerate(rows, start=2)  # row 1 is the header
+	while True:
+		raw = list(islice(numbered, chunk_size))
+		if not raw:
+			break
+		chunk = _Chunk()
+		valid = _validate(spec.row_model, raw, chunk)
+		invalid = chunk.errors[:]
+		try:
+			_write(db, spec, valid, chunk)
+		except DBAPIError:
+			db.rollback()
+			chunk = _Chunk()
+			chunk.errors.extend(invalid)
+			_write_rows_one_by_one(db, spec, valid, chunk)
+		report.rows += len(raw)
+		report.inserted += chunk.inserted
+		report.error_count += len(chunk.errors)
+		room = max_errors - len(report.errors)
+		if room > 0:
+			report.errors.extend(sorted(chunk.errors, key=lambda e: e.row)[:room])
+	report.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+	return report
+
+
+def import_file(
+	db: Session,
+	entity: str,
+	stream: BinaryIO,
+	fmt: str = "csv",
+	chunk_size: int = DEFAULT_CHUNK_SIZE,
+	max_errors: int = 1000,
+) -> ImportReport:
+	return import_rows(db, entity, iter_file_rows(stream, fmt), chunk_size=chunk_size, max_errors=max_errors)
@@ -0,0 +1,186 @@
+import asyncio
+import multiprocessing
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Iterable, List, Optional
+from app.core.config import settings
+
+
+def _init_job_process() -> None:
+	"""Runs first in each spawned job process, before it imports the database layer"""
+	# a job process runs one job at a time, so a single pooled connection is enough
+	settings.db_pool_size, settings.db_max_overflow = 1, 0
+
+
+class JobQueueFull(Exception):
+	"""Raised when a job runner already has its maximum of running + queued jobs"""
+
+
+@dataclass
+class Job:
+	id: str
+	kind: str
+	future: Future
+	submitted_at: datetime = field(default_factory=datetime.now)
+	finished_at: Optional[datetime] = None
+
+	@property
+	def status(self) -> str:
+		if not self.future.done():
+			return "running" if self.future.running() else "queued"
+		if self.future.cancelled() or self.future.exception() is not None:
+			return "failed"
+		return "succeeded"
+
+	def to_dict(self) -> dict:
+		done = self.future.done() and not self.future.cancelled()
+		error = self.future.exception() if done else None
+		return {
+			"id": self.id,
+			"kind": self.kind,
+			"status": self.status,
+			"submitted_at": self.submitted_at,
+			"finished_at": self.finished_at,
+			"result": self.future.result() if done and error is None else None,
+			"error": str(error) if error is not None else None,
+		}
+
+
+class JobRunner:
+	"""
+	Bounded executor for CPU-heavy work (model training, bulk inference, solvers).
+
+	Work runs in a dedicated process pool (or thread pool) so it neither holds
+	Starlette's request threadpool nor competes for the API process's GIL. At
+	most ``max_workers`` jobs run and ``max_queue`` wait; anything beyond that is
+	rejected with JobQueueFull so callers can answer 503 instead of piling up.
+	"""
+
+	def __init__(self, max_workers: int, max_queue: int, kind: str = "process", max_history: int = 1000):
+		self.max_workers = max(1, max_workers)
+		self.max_queue = max_queue
+		self.kind = kind
+		self.max_history = max_history
+		self._executor: Optional[Executor] = None
+		self._in_flight = 0
+		self._lock = threading.Lock()
+		self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+	def _get_executor(self) -> Executor:
+		with self._lock:
+			if self._executor is None:
+				if self.kind == "thread":
+					self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="jobs")
+				else:
+					# spawn: forking a process that already runs threads is unsafe
+					self._executor = ProcessPoolExecutor(
+						max_workers=self.max_workers,
+						mp_context=multiprocessing.get_context("spawn"),
+						initializer=_init_job_process,
+					)
+			return self._executor
+
+	@property
+	def in_flight(self) -> int:
+		return self._in_flight
+
+	def _acquire(self, n: int = 1) -> None:
+		with self._lock:
+			if self._in_flight + n > self.max_workers + self.max_queue:
+				raise JobQueueFull(f"{self._in_flight} jobs already running or queued")
+			self._in_flight += n
+
+	def _release(self, _future: Future) -> None:
+		with self._lock:
+			self._in_flight -= 1
+
+	def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+		executor = self._get_executor()
+		self._acquire()
+		try:
+			future = executor.submit(fn, *args)
+		except BaseException:
+			self._release(None)
+			raise
+		future.add_done_callback(self._release)
+		return future
+
+	async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+		"""Run ``fn(*args)`` on the pool and await its result"""
+		return await asyncio.wrap_future(self._submit(fn, *args))
+
+	async def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+		"""
+		Run ``fn(item)`` for every item in parallel and await all results in order.
+		Capacity for the whole batch is reserved up front, so a batch is either
+		accepted entirely or rejected with JobQueueFull.
+		"""
+		items = list(items)
+		executor = self._get_executor()
+		self._acquire(len(items))
+		futures: List[Future] = []
+		try:
+			for item in items:
+				futures.append(executor.submit(fn, item))
+		except BaseException:
+			for future in futures:
+				future.cancel()
+			for _ in range(len(items) - len(futures)):
+				self._release(None)
+			raise
+		finally:
+			for future in futures:
+				future.add_done_callback(self._release)
+		return list(await asyncio.gather(*(asyncio.wrap_future(f) for f in futures)))
+
+	def submit(self, kind: str, fn: Callable[..., Any], *args: Any) -> Job:
+		"""Start ``fn(*args)`` as a background job whose status can be polled by id"""
+		job = Job(id=str(uuid.uuid4()), kind=kind, future=self._submit(fn, *args))
+
+		def _finished(_future: Future) -> None:
+			job.finished_at = datetime.now()
+
+		job.future.add_done_callback(_finished)
+		with self._lock:
+			self._jobs[job.id] = job
+			# forget the oldest finished jobs once the history is full; unfinished
+			# ones are kept, so a long-running job does not hold back pruning
+			excess = len(self._jobs) - self.max_history
+			if excess > 0:
+				finished = [job_id for job_id, old in self._jobs.items() if old.future.done()]
+				for job_id in finished[:excess]:
+					del self._jobs[job_id]
+		return job
+
+	def get(self, job_id: str) -> Optional[Job]:
+		return self._jobs.get(job_id)
+
+	def shutdown(self) -> None:
+		with self._lock:
+			executor, self._executor = self._executor, None
+		if executor is not None:
+			executor.shutdown(wait=False, cancel_futures=True)
+
+
+analytics_jobs = JobRunner(
+	max_workers=settings.analytics_workers,
+	max_queue=settings.analytics_max_queue,
+	kind=settings.analytics_executor,
+)
+
+scheduling_jobs = JobRunner(
+	max_workers=settings.scheduling_workers,
+	max_queue=settings.scheduling_max_queue,
+	kind=settings.scheduling_executor,
+)
+
+# bcrypt releases the GIL, so threads give real parallelism without pickling
+password_jobs = JobRunner(
+	max_workers=settings.password_workers,
+	max_queue=settings.password_max_queue,
+	kind="thread",
+)
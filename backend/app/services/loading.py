@@ -0,0 +1,19 @@
+from functools import lru_cache
+from typing import Type
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, raiseload
+
+
+@lru_cache(maxsize=None)
+def out_options(model: type, schema: Type[BaseModel]) -> tuple:
+	"""
+	Loader options for reading ``model`` rows into ``schema``: only the mapped
+	columns the schema has fields for (by name, or by a string validation
+	alias), and no relationships. Anything else the serializer touches raises
+	instead of quietly issuing more SQL.
+	"""
+	columns = inspect(model).column_attrs
+	names = [field.validation_alias if isinstance(field.validation_alias, str) else name for name, field in schema.model_fields.items()]
+	fields = [getattr(model, name) for name in names if name in columns]
+	return (load_only(*fields), raiseload("*"))
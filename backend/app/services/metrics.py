@@ -0,0 +1,126 @@
+"""
+Minimal in-process metrics in the Prometheus text format, served at /metrics.
+
+Values are per process: with several uvicorn workers each one reports its
+own pool and queues, which is what pool sizing needs anyway.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format(value: float) -> str:
+	if math.isinf(value):
+		return "+Inf"
+	return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+	kind = "counter"
+
+	def __init__(self, name: str, help: str):
+		self.name, self.help = name, help
+		self._value = 0.0
+		self._lock = threading.Lock()
+
+	def inc(self, amount: float = 1.0) -> None:
+		with self._lock:
+			self._value += amount
+
+	@property
+	def value(self) -> float:
+		return self._value
+
+	def samples(self) -> List[str]:
+		return [f"{self.name} {_format(self._value)}"]
+
+
+class Gauge:
+	"""A value read from ``fn`` at scrape time"""
+	kind = "gauge"
+
+	def __init__(self, name: str, help: str, fn: Callable[[], float]):
+		self.name, self.help = name, help
+		self.fn = fn
+
+	@property
+	def value(self) -> float:
+		return float(self.fn())
+
+	def samples(self) -> List[str]:
+		return [f"{self.name} {_format(self.value)}"]
+
+
+class Histogram:
+	kind = "histogram"
+
+	def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+		self.name, self.help = name, help
+		self.buckets = tuple(sorted(buckets)) + (math.inf,)
+		self._counts = [0] * len(self.buckets)
+		self._sum = 0.0
+		self._lock = threading.Lock()
+
+	def observe(self, value: float) -> None:
+		i = bisect_left(self.buckets, value)
+		with self._lock:
+			self._counts[i] += 1
+			self._sum += value
+
+	@property
+	def count(self) -> int:
+		return sum(self._counts)
+
+	@property
+	def sum(self) -> float:
+		return self._sum
+
+	def samples(self) -> List[str]:
+		with self._lock:
+			counts, total = list(self._counts), self._sum
+		lines, cumulative = [], 0
+		for bound, n in zip(self.buckets, counts):
+			cumulative += n
+			lines.append(f'{self.name}_bucket{{le="{_format(bound)}"}} {cumulative}')
+		lines.append(f"{self.name}_sum {_format(total)}")
+		lines.append(f"{self.name}_count {cumulative}")
+		return lines
+
+
+class MetricsRegistry:
+	def __init__(self):
+		self._metrics: Dict[str, object] = {}
+		self._lock = threading.Lock()
+
+	def _register(self, metric):
+		with self._lock:
+			# re-registering a name (e.g. a module reloaded in tests) replaces it
+			self._metrics[metric.name] = metric
+		return metric
+
+	def counter(self, name: str, help: str) -> Counter:
+		return self._register(Counter(name, help))
+
+	def gauge(self, name: str, help: str, fn: Callable[[], float]) -> Gauge:
+		return self._register(Gauge(name, help, fn))
+
+	def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+		return self._register(Histogram(name, help, buckets))
+
+	def get(self, name: str):
+		return self._metrics.get(name)
+
+	def render(self) -> str:
+		lines: List[str] = []
+		for metric in list(self._metrics.values()):
+			lines.append(f"# HELP {metric.name} {metric.help}")
+			lines.append(f"# TYPE {metric.name} {metric.kind}")
+			lines.extend(metric.samples())
+		return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
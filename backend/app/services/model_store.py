@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import joblib
+
+
+class ArtifactChecksumError(Exception):
+	"""Raised when an artifact file does not match the checksum in its manifest"""
+
+
+def _sha256(path: str) -> str:
+	digest = hashlib.sha256()
+	with open(path, "rb") as f:
+		for block in iter(lambda: f.read(1 << 20), b""):
+			digest.update(block)
+	return digest.hexdigest()
+
+
+class ModelArtifactStore:
+	"""
+	Versioned on-disk model artifacts: ``<name>_<version>.joblib`` plus a
+	``<name>_<version>.json`` manifest holding its sha256 and metadata.
+
+	Artifacts are written uncompressed so numpy arrays inside them can be
+	memory-mapped on load. Objects that copy their arrays when unpickled, such
+	as sklearn's tree estimators, still get a private copy per process.
+	Checksums are verified once per file per process.
+	"""
+
+	def __init__(self, root: str):
+		self.root = root
+		self._verified: Dict[str, Tuple[int, int]] = {}
+		self._lock = threading.Lock()
+
+	def artifact_path(self, name: str, version: str) -> str:
+		return os.path.join(self.root, f"{name}_{version}.joblib")
+
+	def manifest_path(self, name: str, version: str) -> str:
+		return os.path.join(self.root, f"{name}_{version}.json")
+
+	def mtime(self, name: str, version: str) -> Optional[int]:
+		"""Modification time of the manifest, which is written last on save"""
+		try:
+			return os.stat(self.manifest_path(name, version)).st_mtime_ns
+		except FileNotFoundError:
+			return None
+
+	def manifest(self, name: str, version: str) -> Optional[Dict[str, Any]]:
+		try:
+			with open(self.manifest_path(name, version)) as f:
+				return json.load(f)
+		except FileNotFoundError:
+			return None
+
+	def save(self, name: str, version: str, payload: Any, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+		os.makedirs(self.root, exist_ok=True)
+		path = self.artifact_path(name, version)
+		manifest_path = self.manifest_path(name, version)
+		suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+		joblib.dump(payload, path + suffix)
+		manifest = {
+			"name": name,
+			"version": version,
+			"file": os.path.basename(path),
+			"format": "joblib",
+			"sha256": _sha256(path + suffix),
+			"size": os.path.getsize(path + suffix),
+			"created_at": datetime.now().isoformat(),
+			"metadata": metadata or {},
+		}
+		with open(manifest_path + suffix, "w") as f:
+			json.dump(manifest, f, indent=2, default=str)
+		# atomic renames, artifact first, so readers never see a manifest
+		# pointing at a half-written file
+		os.replace(path + suffix, path)
+		os.replace(manifest_path + suffix, manifest_path)
+		return manifest
+
+	def _verify(self, path: str, manifest: Dict[str, Any]) -> None:
+		stat = os.stat(path)
+		key = (stat.st_size, stat.st_mtime_ns)
+		with self._lock:
+			if self._verified.get(path) == key:
+				return
+		if stat.st_size != manifest["size"] or _sha256(path) != manifest["sha256"]:
+			raise ArtifactChecksumError(f"{path} does not match its manifest checksum")
+		with self._lock:
+			self._verified[path] = key
+
+	def load(self, name: str, version: str, mmap: bool = True) -> Optional[Any]:
+		"""Load an artifact (None if absent), memory-mapping its numpy arrays read-only"""
+		manifest = self.manifest(name, version)
+		if manifest is None:
+			return None
+		path = self.artifact_path(name, version)
+		self._verify(path, manifest)
+		return joblib.load(path, mmap_mode="r" if mmap else None)
@@ -1,11 +1,125 @@
-from typing import Any
-from fastapi import Query
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
-def pagination_params(limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0)) -> tuple[int, int]:
-	return limit, offset
+# named sort orders for an endpoint: NOT NULL columns, optionally wrapped in
+# desc(), ending with a unique column (normally the primary key) as the tie-break
+SortOrders = Dict[str, Sequence[Any]]
 
 
-def apply_pagination(query: Any, limit: int, offset: int):
-	return query.offset(offset).limit(limit)
+@dataclass
+class PageParams:
+	limit: int
+	offset: int = 0
+	cursor: Optional[str] = None
+	sort: Optional[str] = None
 
+
+def page_params(
+	limit: int = Query(50, ge=1, le=200),
+	offset: int = Query(0, ge=0),
+	cursor: Optional[str] = Query(None, max_length=512),
+	sort: Optional[str] = Query(None, max_length=32),
+) -> PageParams:
+	return PageParams(limit=limit, offset=offset, cursor=cursor, sort=sort)
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+	raw = json.dumps([sort, list(values)], separators=(",", ":")).encode()
+	return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, List[Any]]:
+	try:
+		raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+		sort, values = json.loads(raw)
+		if not isinstance(sort, str) or not isinstance(values, list):
+			raise ValueError(cursor)
+		return sort, values
+	except (binascii.Error, ValueError, TypeError):
+		raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+def _unwrap(column: Any) -> Tuple[Any, bool]:
+	"""``(column, descending)`` for a column that may be wrapped in desc()"""
+	if isinstance(column, UnaryExpression) and column.modifier is operators.desc_op:
+		return column.element, True
+	return column, False
+
+
+def _keyset(columns: Sequence[Any]) -> List[Tuple[Any, bool]]:
+	keys = [_unwrap(column) for column in columns]
+	for column, _ in keys:
+		# NULLs never compare greater or less than a cursor value, so such rows would be skipped
+		if getattr(column, "nullable", True):
+			raise ValueError(f"keyset sort column {column} must be NOT NULL")
+	return keys
+
+
+def _cursor_values(keys: List[Tuple[Any, bool]], values: List[Any]) -> List[Any]:
+	"""Cursor values checked against their columns' types; a mismatch is a 400"""
+	checked = []
+	for (column, _), value in zip(keys, values):
+		python_type = column.type.python_type
+		if python_type is float and type(value) is int:
+			value = float(value)
+		if type(value) is not python_type:
+			raise HTTPException(status_code=400, detail="invalid cursor")
+		checked.append(value)
+	return checked
+
+
+def _after(keys: List[Tuple[Any, bool]], values: Sequence[Any]):
+	"""Rows strictly after ``values`` in the order given by ``keys``"""
+	clauses = []
+	for i, (column, descending) in enumerate(keys):
+		equal = [keys[j][0] == values[j] for j in range(i)]
+		past = column < values[i] if descending else column > values[i]
+		clauses.append(and_(*equal, past))
+	return or_(*clauses)
+
+
+def _page_query(query: Any, page: PageParams, orders: SortOrders) -> Tuple[Any, str, List[Tuple[Any, bool]]]:
+	"""Apply the sort, cursor or offset, and limit of ``page`` to a select()"""
+	sort = page.sort or next(iter(orders))
+	if sort not in orders:
+		raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(orders)}")
+	keys = _keyset(orders[sort])
+
+	if page.cursor is not None:
+		cursor_sort, values = decode_cursor(page.cursor)
+		if cursor_sort != sort or len(values) != len(keys):
+			raise HTTPException(status_code=400, detail="cursor does not match the requested sort")
+		query = query.where(_after(keys, _cursor_values(keys, values)))
+	query = query.order_by(*orders[sort])
+	if page.cursor is None and page.offset:
+		query = query.offset(page.offset)
+	return query.limit(page.limit), sort, keys
+
+
+def _set_next_cursor(rows: list, page: PageParams, response: Response, sort: str, keys: List[Tuple[Any, bool]]) -> list:
+	if len(rows) == page.limit:
+		last = rows[-1]
+		response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort, [getattr(last, column.key) for column, _ in keys])
+	return rows
+
+
+async def paginate_async(db: Any, stmt: Any, page: PageParams, response: Response, orders: SortOrders) -> list:
+	"""
+	Page through the single-entity select ``stmt`` in one of ``orders``
+	(``?sort=``, first one by default). With a ``cursor`` the page is read as
+	``WHERE key > :cursor ORDER BY key LIMIT :n``, so it costs the same at any
+	depth; without one the legacy ``offset`` still works. Full pages set
+	``X-Next-Cursor`` to an opaque cursor for the next page.
+	"""
+	stmt, sort, keys = _page_query(stmt, page, orders)
+	rows = (await db.scalars(stmt)).all()
+	return _set_next_cursor(list(rows), page, response, sort, keys)
@@ -0,0 +1,182 @@
+"""
+Cache of authenticated principals keyed by token subject (the user's email),
+plus each user's current token version.
+
+get_current_user reads principals before touching the database, so role
+checks on a warm entry cost no round trip. Entries are written on login and on
+a cache miss, and dropped when a user's role changes or the user is deleted.
+
+Token versions are recorded on login, when a user is created and when their
+tokens are revoked, and kept for the same TTL as principals, so a record is
+never staler than a cached principal would be (an inactive user is recorded
+as REVOKED). Read-only routes authorize from token claims alone only while a
+matching record exists; a missing record (expired, written by another worker,
+lost on restart) is not trusted and sends the request through the principal
+lookup instead.
+
+The in-memory backend is per process; set PRINCIPAL_CACHE_URL to a redis://
+URL to share entries, invalidations and revocations between workers.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.services.metrics import registry
+
+CACHE_HITS = registry.counter("principal_cache_hits_total", "get_current_user lookups served from the principal cache")
+CACHE_MISSES = registry.counter("principal_cache_misses_total", "get_current_user lookups that went to the database")
+
+
+@dataclass(frozen=True)
+class Principal:
+	"""What authorization needs to know about the caller"""
+	id: int
+	email: str
+	role: str
+	is_active: bool = True
+	token_version: int = 0
+
+	@classmethod
+	def from_user(cls, user) -> "Principal":
+		return cls(id=user.id, email=user.email, role=user.role, is_active=bool(user.is_active), token_version=user.token_version)
+
+
+class MemoryPrincipalBackend:
+	"""Bounded LRU with per-entry expiry"""
+
+	def __init__(self, ttl_seconds: float, max_entries: int):
+		self.ttl_seconds = ttl_seconds
+		self.max_entries = max_entries
+		self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+		# not LRU-evicted: dropping a record would un-revoke tokens; expiry keeps it small
+		self._versions: Dict[int, Tuple[float, int]] = {}
+		self._lock = threading.Lock()
+
+	async def get(self, subject: str) -> Optional[Principal]:
+		with self._lock:
+			entry = self._entries.get(subject)
+			if entry is None:
+				return None
+			expires, principal = entry
+			if expires <= time.monotonic():
+				del self._entries[subject]
+				return None
+			self._entries.move_to_end(subject)
+			return principal
+
+	async def set(self, subject: str, principal: Principal) -> None:
+		with self._lock:
+			self._entries[subject] = (time.monotonic() + self.ttl_seconds, principal)
+			self._entries.move_to_end(subject)
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+
+	async def delete(self, subject: str) -> None:
+		with self._lock:
+			self._entries.pop(subject, None)
+
+	async def get_token_version(self, user_id: int) -> Optional[int]:
+		with self._lock:
+			entry = self._versions.get(user_id)
+			if entry is None or entry[0] <= time.monotonic():
+				return None
+			return entry[1]
+
+	async def set_token_version(self, user_id: int, version: int, ttl_seconds: float) -> None:
+		now = time.monotonic()
+		with self._lock:
+			self._versions[user_id] = (now + ttl_seconds, version)
+			if len(self._versions) > self.max_entries:
+				self._versions = {k: v for k, v in self._versions.items() if v[0] > now}
+
+	async def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self._versions.clear()
+
+
+class RedisPrincipalBackend:
+	"""Entries as JSON strings under ``prefix + subject`` with a Redis TTL; eviction is left to maxmemory"""
+
+	def __init__(self, url: str, ttl_seconds: float, prefix: str = "principal:"):
+		try:
+			from redis import asyncio as redis
+		except ImportError as e:
+			raise RuntimeError("PRINCIPAL_CACHE_URL needs the 'redis' package installed") from e
+		self._client = redis.from_url(url, decode_responses=True)
+		self.ttl_seconds = ttl_seconds
+		self.prefix = prefix
+
+	async def get(self, subject: str) -> Optional[Principal]:
+		raw = await self._client.get(self.prefix + subject)
+		return Principal(**json.loads(raw)) if raw else None
+
+	async def set(self, subject: str, principal: Principal) -> None:
+		await self._client.set(self.prefix + subject, json.dumps(asdict(principal)), px=int(self.ttl_seconds * 1000))
+
+	async def delete(self, subject: str) -> None:
+		await self._client.delete(self.prefix + subject)
+
+	async def get_token_version(self, user_id: int) -> Optional[int]:
+		raw = await self._client.get(f"{self.prefix}tv:{user_id}")
+		return int(raw) if raw is not None else None
+
+	async def set_token_version(self, user_id: int, version: int, ttl_seconds: float) -> None:
+		await self._client.set(f"{self.prefix}tv:{user_id}", version, px=int(ttl_seconds * 1000))
+
+	async def clear(self) -> None:
+		async for key in self._client.scan_iter(match=self.prefix + "*"):
+			await self._client.delete(key)
+
+
+# recorded for deleted users; no issued token carries it
+REVOKED = -1
+
+
+class PrincipalCache:
+	def __init__(self, backend):
+		self.backend = backend
+
+	@classmethod
+	def from_settings(cls) -> "PrincipalCache":
+		if settings.principal_cache_url:
+			return cls(RedisPrincipalBackend(settings.principal_cache_url, settings.principal_cache_ttl_seconds))
+		return cls(MemoryPrincipalBackend(settings.principal_cache_ttl_seconds, settings.principal_cache_max_entries))
+
+	@property
+	def enabled(self) -> bool:
+		return settings.principal_cache_ttl_seconds > 0
+
+	async def get(self, subject: str) -> Optional[Principal]:
+		principal = await self.backend.get(subject) if self.enabled else None
+		(CACHE_HITS if principal is not None else CACHE_MISSES).inc()
+		return principal
+
+	async def put(self, principal: Principal) -> None:
+		if self.enabled:
+			await self.backend.set(principal.email, principal)
+
+	async def invalidate(self, subject: str) -> None:
+		await self.backend.delete(subject)
+
+	async def current_token_version(self, user_id: int) -> Optional[int]:
+		"""The user's token version if it was recorded within the cache TTL, else None"""
+		return await self.backend.get_token_version(user_id) if self.enabled else None
+
+	async def record_token_version(self, user_id: int, version: int) -> None:
+		if self.enabled:
+			await self.backend.set_token_version(user_id, version, settings.principal_cache_ttl_seconds)
+
+	async def record_user(self, user) -> None:
+		"""Record ``user``'s token version; REVOKED while the account is inactive"""
+		await self.record_token_version(user.id, user.token_version if user.is_active else REVOKED)
+
+	async def clear(self) -> None:
+		await self.backend.clear()
+
+
+principal_cache = PrincipalCache.from_settings()
@@ -0,0 +1,252 @@
+"""
+Token-bucket throttling of /api/v1/auth/login per client IP and per account.
+The account bucket is charged before the password check and refunded when the
+login succeeds, so only failed attempts use it up.
+
+It runs as a pure ASGI middleware, so a throttled attempt is answered with 429
+before routing, the database or bcrypt are involved. Buckets live in process
+memory by default; set RATE_LIMIT_URL to a redis:// URL to share them between
+workers.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from starlette.requests import Request
+from app.core.config import settings
+from app.services.metrics import registry
+
+LOGIN_PATH = "/api/v1/auth/login"
+# an OAuth2 password form is a few hundred bytes; larger bodies are refused with 413
+MAX_FORM_BYTES = 8192
+FORM_TYPES = (b"application/x-www-form-urlencoded", b"multipart/form-data")
+
+THROTTLED = registry.counter("login_throttled_total", "Login attempts rejected by the rate limiter")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+	"""``burst`` attempts at once, refilled at ``per_minute``"""
+	burst: int
+	per_minute: float
+
+	@property
+	def per_second(self) -> float:
+		return self.per_minute / 60.0
+
+
+class MemoryBucketStore:
+	"""Token buckets in a bounded LRU; an evicted bucket simply starts full again"""
+
+	def __init__(self, max_entries: int = 100_000):
+		self.max_entries = max_entries
+		self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	async def take(self, key: str, limit: RateLimit) -> float:
+		"""Take one token; returns 0 when allowed, else seconds until one is available"""
+		now = time.monotonic()
+		with self._lock:
+			tokens, updated = self._buckets.get(key, (float(limit.burst), now))
+			tokens = min(float(limit.burst), tokens + (now - updated) * limit.per_second)
+			wait = 0.0
+			if tokens >= 1:
+				tokens -= 1
+			else:
+				wait = (1 - tokens) / limit.per_second
+			self._buckets[key] = (tokens, now)
+			self._buckets.move_to_end(key)
+			while len(self._buckets) > self.max_entries:
+				self._buckets.popitem(last=False)
+		return wait
+
+	async def refund(self, key: str, limit: RateLimit) -> None:
+		"""Give back a token taken by ``take``"""
+		now = time.monotonic()
+		with self._lock:
+			if key not in self._buckets:
+				return
+			tokens, updated = self._buckets[key]
+			self._buckets[key] = (min(float(limit.burst), tokens + (now - updated) * limit.per_second + 1), now)
+
+	async def clear(self) -> None:
+		with self._lock:
+			self._buckets.clear()
+
+
+_TAKE_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+_REFUND_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+if not state[1] then return 0 end
+local tokens = math.min(burst, tonumber(state[1]) + math.max(0, now - tonumber(state[2])) * rate + 1)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+return 0
+"""
+
+
+class RedisBucketStore:
+	"""Buckets as Redis hashes updated atomically by a Lua script; they expire once full again"""
+
+	def __init__(self, url: str, prefix: str = "ratelimit:"):
+		try:
+			from redis import asyncio as redis
+		except ImportError as e:
+			raise RuntimeError("RATE_LIMIT_URL needs the 'redis' package installed") from e
+		self._client = redis.from_url(url, decode_responses=True)
+		self._take = self._client.register_script(_TAKE_SCRIPT)
+		self._refund = self._client.register_script(_REFUND_SCRIPT)
+		self.prefix = prefix
+
+	async def take(self, key: str, limit: RateLimit) -> float:
+		return float(await self._take(keys=[self.prefix + key], args=[limit.burst, limit.per_second, time.time()]))
+
+	async def refund(self, key: str, limit: RateLimit) -> None:
+		await self._refund(keys=[self.prefix + key], args=[limit.burst, limit.per_second, time.time()])
+
+	async def clear(self) -> None:
+		async for key in self._client.scan_iter(match=self.prefix + "*"):
+			await self._client.delete(key)
+
+
+def store_from_settings():
+	if settings.rate_limit_url:
+		return RedisBucketStore(settings.rate_limit_url)
+	return MemoryBucketStore()
+
+
+def _client_ip(scope) -> str:
+	if settings.rate_limit_trust_forwarded:
+		for name, value in scope.get("headers", ()):
+			if name == b"x-forwarded-for":
+				return value.decode("latin-1").split(",")[0].strip()
+	client = scope.get("client")
+	return client[0] if client else "unknown"
+
+
+async def _form_username(scope, body: bytes) -> Optional[str]:
+	"""
+	The username of a buffered urlencoded or multipart login form. Raises
+	ValueError for bodies that are not a form or cannot be parsed; a form
+	without a username returns None and is left to the route's validation.
+	"""
+	content_type = next((v for k, v in scope.get("headers", ()) if k == b"content-type"), b"")
+	if not content_type.lower().startswith(FORM_TYPES):
+		raise ValueError("login expects a form body")
+
+	async def receive():
+		return {"type": "http.request", "body": body, "more_body": False}
+
+	# a bare scope, so Starlette reports parse errors by raising instead of answering 400 itself
+	request = Request({"type": "http", "headers": scope.get("headers", [])}, receive)
+	try:
+		form = await request.form(max_files=0, max_fields=16)
+	except Exception as e:
+		raise ValueError("unparseable login form") from e
+	value = form.get("username")
+	return value.strip().lower() if isinstance(value, str) and value.strip() else None
+
+
+class LoginRateLimitMiddleware:
+	def __init__(
+		self,
+		app,
+		ip_limit: Optional[RateLimit] = None,
+		account_limit: Optional[RateLimit] = None,
+		store=None,
+		path: str = LOGIN_PATH,
+	):
+		self.app = app
+		self.ip_limit = ip_limit or RateLimit(settings.login_rate_ip_burst, settings.login_rate_ip_per_minute)
+		self.account_limit = account_limit or RateLimit(settings.login_rate_account_burst, settings.login_rate_account_per_minute)
+		self.store = store if store is not None else store_from_settings()
+		self.path = path
+
+	async def __call__(self, scope, receive, send):
+		if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+			await self.app(scope, receive, send)
+			return
+
+		wait = await self.store.take(f"ip:{_client_ip(scope)}", self.ip_limit)
+		if wait:
+			await self._reject(send, wait)
+			return
+
+		# buffer the (small) form to read the account, then replay it to the app
+		messages: List[dict] = []
+		size, more = 0, True
+		while more and size <= MAX_FORM_BYTES:
+			message = await receive()
+			messages.append(message)
+			if message["type"] != "http.request":
+				break
+			size += len(message.get("body", b""))
+			more = message.get("more_body", False)
+		if more:
+			await self._respond(send, 413, "Login form too large")
+			return
+		try:
+			username = await _form_username(scope, b"".join(m.get("body", b"") for m in messages))
+		except ValueError as e:
+			await self._respond(send, 400, str(e))
+			return
+		if username:
+			wait = await self.store.take(f"account:{username}", self.account_limit)
+			if wait:
+				await self._reject(send, wait)
+				return
+
+		async def replay():
+			return messages.pop(0) if messages else await receive()
+
+		status = None
+
+		async def send_status(message):
+			nonlocal status
+			if message["type"] == "http.response.start":
+				status = message["status"]
+			await send(message)
+
+		await self.app(scope, replay, send_status)
+		# only failed attempts count against the account, or anyone knowing the
+		# email could lock its owner out; a successful login gives its token back
+		if username and status == 200:
+			await self.store.refund(f"account:{username}", self.account_limit)
+
+	async def _reject(self, send, wait: float) -> None:
+		THROTTLED.inc()
+		retry_after = (b"retry-after", str(max(1, math.ceil(wait))).encode())
+		await self._respond(send, 429, "Too many login attempts, try again later", [retry_after])
+
+	async def _respond(self, send, status: int, detail: str, headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+		body = json.dumps({"detail": detail}).encode()
+		await send({
+			"type": "http.response.start",
+			"status": status,
+			"headers": [
+				(b"content-type", b"application/json"),
+				(b"content-length", str(len(body)).encode()),
+				*(headers or []),
+			],
+		})
+		await send({"type": "http.response.body", "body": body})
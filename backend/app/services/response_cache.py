@@ -0,0 +1,223 @@
+"""
+Server-side cache and ETags for the public read routes.
+
+Each cached route belongs to a namespace (the path segment after /api/v1/)
+with a version counter. Write handlers bump the namespaces they touch, and a
+cached response is reused only while its namespace's version is unchanged,
+so invalidation is exact for writes made through the API. Writes that bypass
+it (CLI, direct SQL) show up after RESPONSE_CACHE_TTL_SECONDS.
+
+Every cacheable 200 gets a strong ETag over its body. A matching
+If-None-Match is answered with 304, straight from the cache when the entry
+is warm, so a polling dashboard costs a version read and nothing else.
+
+Response bodies are cached per process. Versions are also per process by
+default; set RESPONSE_CACHE_URL to a redis:// URL so writes handled by one
+worker invalidate the others.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.services.metrics import registry
+
+API_PREFIX = "/api/v1/"
+# unauthenticated GET routes whose responses do not depend on the caller
+CACHED_NAMESPACES = frozenset({"students", "courses", "enrollments", "grades", "users"})
+MAX_BODY_BYTES = 1 << 20
+# response headers kept with a cached body
+_KEPT_HEADERS = (b"content-type", b"x-next-cursor")
+
+HITS = registry.counter("response_cache_hits_total", "GET responses served from the response cache")
+MISSES = registry.counter("response_cache_misses_total", "Cacheable GET responses that ran the handler")
+NOT_MODIFIED = registry.counter("response_cache_not_modified_total", "Conditional GETs answered with 304")
+
+
+class MemoryVersionStore:
+	def __init__(self):
+		self._versions: Dict[str, int] = {}
+		self._lock = threading.Lock()
+
+	async def get(self, namespace: str) -> int:
+		return self._versions.get(namespace, 0)
+
+	async def bump(self, namespaces: Iterable[str]) -> None:
+		with self._lock:
+			for namespace in namespaces:
+				self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+
+class RedisVersionStore:
+	def __init__(self, url: str, prefix: str = "respcache:"):
+		try:
+			from redis import asyncio as redis
+		except ImportError as e:
+			raise RuntimeError("RESPONSE_CACHE_URL needs the 'redis' package installed") from e
+		self._client = redis.from_url(url, decode_responses=True)
+		self.prefix = prefix
+
+	async def get(self, namespace: str) -> int:
+		return int(await self._client.get(self.prefix + namespace) or 0)
+
+	async def bump(self, namespaces: Iterable[str]) -> None:
+		async with self._client.pipeline(transaction=False) as pipe:
+			for namespace in namespaces:
+				pipe.incr(self.prefix + namespace)
+			await pipe.execute()
+
+
+@dataclass
+class CachedResponse:
+	version: int
+	etag: bytes
+	body: bytes
+	headers: List[Tuple[bytes, bytes]]
+	expires: float
+
+
+class ResponseCache:
+	def __init__(self, versions, ttl_seconds: float, max_entries: int):
+		self.versions = versions
+		self.ttl_seconds = ttl_seconds
+		self.max_entries = max_entries
+		self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	@classmethod
+	def from_settings(cls) -> "ResponseCache":
+		versions = RedisVersionStore(settings.response_cache_url) if settings.response_cache_url else MemoryVersionStore()
+		return cls(versions, settings.response_cache_ttl_seconds, settings.response_cache_max_entries)
+
+	@property
+	def enabled(self) -> bool:
+		return self.ttl_seconds > 0
+
+	async def invalidate(self, *namespaces: str) -> None:
+		"""Call after committing a write to these namespaces"""
+		await self.versions.bump(namespaces)
+
+	def get(self, key: str, version: int) -> Optional[CachedResponse]:
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				return None
+			if entry.version != version or entry.expires <= time.monotonic():
+				del self._entries[key]
+				return None
+			self._entries.move_to_end(key)
+			return entry
+
+	def put(self, key: str, entry: CachedResponse) -> None:
+		with self._lock:
+			self._entries[key] = entry
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+
+
+response_cache = ResponseCache.from_settings()
+
+
+def _etag(body: bytes) -> bytes:
+	return b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"'
+
+
+def _namespace(path: str) -> Optional[str]:
+	if not path.startswith(API_PREFIX):
+		return None
+	namespace = path[len(API_PREFIX):].split("/", 1)[0]
+	return namespace if namespace in CACHED_NAMESPACES else None
+
+
+def _matches(if_none_match: Optional[bytes], etag: bytes) -> bool:
+	if not if_none_match:
+		return False
+	candidates = [c.strip() for c in if_none_match.split(b",")]
+	return b"*" in candidates or etag in candidates or b"W/" + etag in candidates
+
+
+class ResponseCacheMiddleware:
+	"""Serves and fills ``cache`` for GETs under CACHED_NAMESPACES"""
+
+	def __init__(self, app, cache: Optional[ResponseCache] = None):
+		self.app = app
+		self.cache = cache if cache is not None else response_cache
+
+	async def __call__(self, scope, receive, send):
+		namespace = _namespace(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+		if namespace is None or not self.cache.enabled:
+			await self.app(scope, receive, send)
+			return
+
+		request_headers = dict(scope.get("headers", ()))
+		if_none_match = request_headers.get(b"if-none-match")
+		key = scope["path"] + "?" + scope.get("query_string", b"").decode("latin-1")
+		version = await self.cache.versions.get(namespace)
+		entry = self.cache.get(key, version)
+		if entry is not None:
+			HITS.inc()
+			await self._send(send, entry, if_none_match)
+			return
+		MISSES.inc()
+
+		start: Dict = {}
+		chunks: List[bytes] = []
+		too_big = False
+
+		async def capture(message):
+			nonlocal too_big
+			if message["type"] == "http.response.start":
+				start.update(message)
+				return
+			if message["type"] != "http.response.body":
+				await send(message)
+				return
+			chunks.append(message.get("body", b""))
+			if message.get("more_body", False):
+				if sum(map(len, chunks)) > MAX_BODY_BYTES and not too_big:
+					# too large to keep: stream it through uncached
+					too_big = True
+					await send(start)
+				if too_big:
+					await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+					chunks.clear()
+				return
+			body = b"".join(chunks)
+			if too_big:
+				await send({"type": "http.response.body", "body": body})
+				return
+			if start.get("status") != 200:
+				await send(start)
+				await send({"type": "http.response.body", "body": body})
+				return
+			headers = [(k, v) for k, v in start.get("headers", []) if k.lower() in _KEPT_HEADERS]
+			entry = CachedResponse(
+				version=version,
+				etag=_etag(body),
+				body=body,
+				headers=headers,
+				expires=time.monotonic() + self.cache.ttl_seconds,
+			)
+			self.cache.put(key, entry)
+			await self._send(send, entry, if_none_match)
+
+		await self.app(scope, receive, capture)
+
+	async def _send(self, send, entry: CachedResponse, if_none_match: Optional[bytes]) -> None:
+		headers = [(b"etag", entry.etag), (b"cache-control", b"no-cache")]
+		if _matches(if_none_match, entry.etag):
+			NOT_MODIFIED.inc()
+			await send({"type": "http.response.start", "status": 304, "headers": headers})
+			await send({"type": "http.response.body", "body": b""})
+			return
+		headers += entry.headers + [(b"content-length", str(len(entry.body)).encode())]
+		await send({"type": "http.response.start", "status": 200, "headers": headers})
+		await send({"type": "http.response.body", "body": entry.body})
@@ -1,38 +1,323 @@
-from typing import List, Set
-from app.schemas.scheduling import ScheduleRequest, ScheduleResponse, ScheduledItem
+import time
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.schemas.scheduling import (
+	RescheduleRequest,
+	RescheduleResponse,
+	ScheduleDelta,
+	ScheduleRequest,
+	ScheduleResponse,
+	ScheduledItem,
+)
 
 
-def greedy_schedule(req: ScheduleRequest) -> ScheduleResponse:
-	assigned: List[ScheduledItem] = []
-	unscheduled: List[str] = []
-	# availability map
-	instr_avail: dict[str, Set[str]] = {}
-	if req.instructors:
-		for ia in req.instructors:
-			instr_avail[ia.instructor_id] = set(ia.available_slots)
-	# room capacities
-	rooms = {r.room_id: r.capacity for r in req.rooms}
-	# try to assign each section
-	used = set()  # (room_id, slot)
-	for sec in req.sections:
-		placed = False
-		for slot in req.slots:
-			# respect instructor availability if provided
-			if instr_avail and sec.instructor_id in instr_avail and slot not in instr_avail[sec.instructor_id]:
-				continue
-			for room_id, cap in rooms.items():
-				if cap < sec.enrolled:
+Placement = Tuple[int, int]  # (room index, slot index)
+
+
+class _Timetable:
+	"""
+	Room/slot occupancy for one solve.
+
+	Rooms are sorted by capacity so ``bisect`` gives the smallest room a section
+	fits in. Each slot keeps an int bitset of its free rooms (bit ``r`` = room
+	``r`` in capacity order), each section an int bitmask of the slots its
+	instructor is available in and each instructor a bitmask of the slots they
+	already teach in, so "smallest free room >= r in slot s" and "may this
+	section use slot s" are single integer operations.
+	"""
+
+	def __init__(self, req: ScheduleRequest):
+		self.sections = req.sections
+		self.slots = req.slots
+		self.rooms = sorted(req.rooms, key=lambda r: r.capacity)
+		self.capacities = [r.capacity for r in self.rooms]
+		n_rooms, n_slots = len(self.rooms), len(self.slots)
+		all_slots = (1 << n_slots) - 1
+		slot_bit = {slot: 1 << i for i, slot in enumerate(self.slots)}
+		instr_mask: Dict[str, int] = {}
+		for ia in req.instructors or []:
+			instr_mask[ia.instructor_id] = sum(slot_bit[s] for s in set(ia.available_slots) if s in slot_bit)
+		# sections whose instructor sent no availability may use any slot
+		self.available = [instr_mask.get(sec.instructor_id, all_slots) for sec in req.sections]
+		instructor_ids: Dict[str, int] = {}
+		self.instructor = [instructor_ids.setdefault(sec.instructor_id, len(instructor_ids)) for sec in req.sections]
+		self.busy = [0] * len(instructor_ids)  # slots each instructor already teaches in
+		# first room index large enough for each section
+		self.min_room = [bisect_left(self.capacities, sec.enrolled) for sec in req.sections]
+		self.free = [(1 << n_rooms) - 1] * n_slots
+		self.n_rooms = n_rooms
+		self.occupant: List[int] = [-1] * (n_rooms * n_slots)  # slot * n_rooms + room -> section
+		self.placement: List[Optional[Placement]] = [None] * len(req.sections)
+
+	def slot_mask(self, idx: int) -> int:
+		"""Slots section ``idx`` may use: its instructor is available and not teaching elsewhere"""
+		return self.available[idx] & ~self.busy[self.instructor[idx]]
+
+	def allowed_slots(self, idx: int) -> Iterator[int]:
+		mask = self.slot_mask(idx)
+		while mask:
+			low = mask & -mask
+			yield low.bit_length() - 1
+			mask ^= low
+
+	def n_options(self, idx: int) -> int:
+		return self.available[idx].bit_count() * (self.n_rooms - self.min_room[idx])
+
+	def smallest_free(self, slot: int, start: int) -> int:
+		"""Index of the smallest free room >= ``start`` in ``slot``, or -1"""
+		rooms = self.free[slot] >> start
+		if not rooms:
+			return -1
+		return start + (rooms & -rooms).bit_length() - 1
+
+	def first_fit(self, idx: int) -> Optional[Placement]:
+		"""Smallest fitting room in the earliest allowed slot that has one"""
+		start = self.min_room[idx]
+		for s in self.allowed_slots(idx):
+			r = self.smallest_free(s, start)
+			if r >= 0:
+				return r, s
+		return None
+
+	def best_fit(self, idx: int) -> Optional[Placement]:
+		"""Smallest free room that fits section ``idx`` in any allowed slot"""
+		start = self.min_room[idx]
+		best: Optional[Placement] = None
+		for s in self.allowed_slots(idx):
+			r = self.smallest_free(s, start)
+			if r >= 0 and (best is None or r < best[0]):
+				best = (r, s)
+				if r == start:
+					break
+		return best
+
+	def fits(self, idx: int, at: Placement) -> bool:
+		"""Whether section ``idx`` may take ``at`` right now"""
+		r, s = at
+		return r >= self.min_room[idx] and bool(self.slot_mask(idx) >> s & 1) and bool(self.free[s] >> r & 1)
+
+	def place(self, idx: int, at: Placement) -> None:
+		r, s = at
+		self.free[s] &= ~(1 << r)
+		self.busy[self.instructor[idx]] |= 1 << s
+		self.occupant[s * self.n_rooms + r] = idx
+		self.placement[idx] = at
+
+	def remove(self, idx: int) -> Placement:
+		r, s = at = self.placement[idx]
+		self.free[s] |= 1 << r
+		self.busy[self.instructor[idx]] &= ~(1 << s)
+		self.occupant[s * self.n_rooms + r] = -1
+		self.placement[idx] = None
+		return at
+
+	def slots_with_room(self, start: int, cache: Dict[int, int]) -> int:
+		"""Bitmask of slots that still have a free room >= ``start``"""
+		mask = cache.get(start)
+		if mask is None:
+			mask = 0
+			for s, free in enumerate(self.free):
+				if free >> start:
+					mask |= 1 << s
+			cache[start] = mask
+		return mask
+
+	def repair(self, idx: int, cache: Dict[int, int], deadline: Optional[float] = None) -> bool:
+		"""
+		Place section ``idx`` by moving one placed section out of a room/slot it
+		could use into that section's own best remaining fit. Gives up (False)
+		once ``deadline`` has passed.
+
+		A failed attempt swaps two sections and swaps them back, so the free-room
+		bitsets never change; ``cache`` holds ``slots_with_room`` results across
+		attempts and callers clear it once a repair succeeds.
+		"""
+		occupant, min_room = self.occupant, self.min_room
+		# largest room index still free in any slot
+		top = max((free.bit_length() for free in self.free), default=0) - 1
+		for s in self.allowed_slots(idx):
+			if deadline is not None and time.perf_counter() > deadline:
+				return False
+			base, bit = s * self.n_rooms, 1 << s
+			for r in range(min_room[idx], self.n_rooms):
+				other = occupant[base + r]
+				if other < 0:
+					self.place(idx, (r, s))
+					return True
+				# cheap necessary conditions before touching the table
+				if min_room[other] > top:
 					continue
-				key = (room_id, slot)
-				if key in used:
+				if not (self.slot_mask(other) | bit) & self.slots_with_room(min_room[other], cache):
 					continue
-				assigned.append(ScheduledItem(section_id=sec.section_id, room_id=room_id, slot=slot))
-				used.add(key)
-				placed = True
-				break
-			if placed:
-				break
-		if not placed:
-			unscheduled.append(sec.section_id)
-	return ScheduleResponse(term=req.term, items=assigned, unscheduled=unscheduled)
+				self.remove(other)
+				self.place(idx, (r, s))
+				moved = self.best_fit(other)
+				if moved is not None:
+					self.place(other, moved)
+					return True
+				self.remove(idx)
+				self.place(other, (r, s))
+		return False
+
+	def response(self, term: str) -> ScheduleResponse:
+		items: List[ScheduledItem] = []
+		unscheduled: List[str] = []
+		for sec, at in zip(self.sections, self.placement):
+			if at is None:
+				unscheduled.append(sec.section_id)
+			else:
+				items.append(ScheduledItem(section_id=sec.section_id, room_id=self.rooms[at[0]].room_id, slot=self.slots[at[1]]))
+		return ScheduleResponse(term=term, items=items, unscheduled=unscheduled)
+
+
+def greedy_schedule(req: ScheduleRequest) -> ScheduleResponse:
+	"""Sections in input order, each in the smallest fitting room of the earliest slot that has one"""
+	table = _Timetable(req)
+	for idx in range(len(req.sections)):
+		at = table.first_fit(idx)
+		if at is not None:
+			table.place(idx, at)
+	return table.response(req.term)
+
+
+def _place_sections(
+	table: _Timetable,
+	order: List[int],
+	deadline: float,
+	most_constrained: bool = True,
+	max_moves: Optional[int] = None,
+) -> int:
+	"""
+	Best-fit each section in ``order`` (most-constrained first if asked), then
+	run the repair phase on the ones left over. Construction always completes;
+	only repair is cut off at ``deadline``. Each successful repair moves one
+	already placed section; ``max_moves`` caps how many (None = unlimited, 0 =
+	no repair). Returns the number of moves made.
+	"""
+	if most_constrained:
+		order = sorted(order, key=lambda i: (table.n_options(i), -table.sections[i].enrolled))
+
+	unplaced: List[int] = []
+	for idx in order:
+		at = table.best_fit(idx)
+		if at is None:
+			unplaced.append(idx)
+		else:
+			table.place(idx, at)
+
+	moves = 0
+	cache: Dict[int, int] = {}
+	for idx in unplaced:
+		if max_moves is not None and moves >= max_moves:
+			break
+		if time.perf_counter() > deadline:
+			break
+		if table.repair(idx, cache, deadline):
+			cache.clear()
+			moves += 1
+	return moves
+
+
+def constrained_schedule(req: ScheduleRequest, most_constrained: bool = True, repair: bool = True) -> ScheduleResponse:
+	"""
+	Best-fit construction, optionally ordering sections most-constrained first
+	(fewest feasible room/slot pairs, then largest), followed by an optional
+	repair phase. ``req.time_budget_ms`` bounds the repair phase only; sections
+	it has not placed by then are reported as unscheduled.
+	"""
+	deadline = time.perf_counter() + req.time_budget_ms / 1000
+	table = _Timetable(req)
+	_place_sections(
+		table,
+		list(range(len(req.sections))),
+		deadline,
+		most_constrained=most_constrained,
+		max_moves=None if repair else 0,
+	)
+	return table.response(req.term)
+
+
+def solve_schedule(req: ScheduleRequest) -> ScheduleResponse:
+	"""Run the requested strategy and report how many sections it placed and how long it took"""
+	started = time.perf_counter()
+	if req.strategy == "first_fit":
+		result = greedy_schedule(req)
+	else:
+		result = constrained_schedule(
+			req,
+			most_constrained=req.strategy in ("most_constrained", "repair"),
+			repair=req.strategy == "repair",
+		)
+	result.campus = req.campus
+	result.strategy = req.strategy
+	result.placed = len(result.items)
+	result.solve_time_ms = round((time.perf_counter() - started) * 1000, 3)
+	return result
+
+
+def apply_delta(base: ScheduleRequest, delta: ScheduleDelta) -> ScheduleRequest:
+	"""The scheduling problem ``base`` with ``delta`` applied"""
+	removed = set(delta.remove_sections)
+	updated = {sec.section_id: sec for sec in delta.update_sections}
+	sections = [updated.pop(sec.section_id, sec) for sec in base.sections if sec.section_id not in removed]
+	sections += [sec for sec in updated.values() if sec.section_id not in removed]
+	sections += delta.add_sections
+
+	removed_rooms = set(delta.remove_rooms)
+	rooms = [room for room in base.rooms if room.room_id not in removed_rooms] + delta.add_rooms
+
+	instructors = base.instructors
+	if delta.instructors:
+		availability = {ia.instructor_id: ia for ia in base.instructors or []}
+		availability.update({ia.instructor_id: ia for ia in delta.instructors})
+		instructors = list(availability.values())
+	return base.model_copy(update={"sections": sections, "rooms": rooms, "instructors": instructors})
+
+
+def reschedule(req: RescheduleRequest) -> RescheduleResponse:
+	"""
+	Repair a prior timetable after ``req.delta``. Prior placements that are
+	still valid stay pinned; only new sections, sections whose placement
+	became invalid and previously unscheduled ones are placed again. At most
+	``delta.max_moves`` pinned sections may be moved to make room.
+	"""
+	started = time.perf_counter()
+	problem = apply_delta(req.base, req.delta)
+	deadline = started + problem.time_budget_ms / 1000
+	table = _Timetable(problem)
+	room_index = {room.room_id: i for i, room in enumerate(table.rooms)}
+	slot_index = {slot: i for i, slot in enumerate(table.slots)}
+	prior = {item.section_id: item for item in req.schedule.items}
+
+	affected: List[int] = []
+	pinned = 0
+	for idx, sec in enumerate(problem.sections):
+		item = prior.get(sec.section_id)
+		r = room_index.get(item.room_id, -1) if item else -1
+		s = slot_index.get(item.slot, -1) if item else -1
+		if r >= 0 and s >= 0 and table.fits(idx, (r, s)):
+			table.place(idx, (r, s))
+			pinned += 1
+		else:
+			affected.append(idx)
+	moves = _place_sections(table, affected, deadline, max_moves=req.delta.max_moves)
 
+	result = table.response(problem.term)
+	changed: List[str] = []
+	for item in result.items:
+		before = prior.get(item.section_id)
+		if before is None or (before.room_id, before.slot) != (item.room_id, item.slot):
+			changed.append(item.section_id)
+	changed += [section_id for section_id in result.unscheduled if section_id in prior]
+	return RescheduleResponse(
+		term=problem.term,
+		campus=problem.campus,
+		items=result.items,
+		unscheduled=result.unscheduled,
+		strategy="reschedule",
+		placed=len(result.items),
+		solve_time_ms=round((time.perf_counter() - started) * 1000, 3),
+		pinned=pinned,
+		moves=moves,
+		changed=changed,
+	)
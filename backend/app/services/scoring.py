@@ -0,0 +1,144 @@
+from typing import Iterator, List, Optional
+from datetime import datetime
+import uuid
+from sqlalchemy import case, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.at_risk_score import AtRiskScore
+from app.models.enrollment import Enrollment
+from app.models.student import Student
+from app.schemas.analytics import StudentFeatures, ScoringRunRequest, ScoringRunResponse
+from app.services.analytics import model_registry, factor_lists
+from app.services.feature_store import (
+	PASSING_GRADE,
+	enrollment_grades_query,
+	stored_feature_query,
+	to_student_features,
+)
+
+
+def student_feature_query(department_id: Optional[int] = None, term: Optional[str] = None):
+	"""
+	One set-based aggregate over students, enrollments and grades returning
+	``(student_id, mean_grade, failed_courses, credit_hours)`` per student.
+
+	``mean_grade`` falls back to ``Student.gpa`` when no grade is recorded and
+	``credit_hours`` is the average credit load per enrolled term. With a
+	``term`` only students enrolled in that term are returned.
+	"""
+	per_enrollment = enrollment_grades_query()
+	if term is not None:
+		per_enrollment = per_enrollment.where(Enrollment.term == term)
+	enr = per_enrollment.subquery()
+
+	n_terms = func.count(func.distinct(enr.c.term))
+	stmt = (
+		select(
+			Student.id.label("student_id"),
+			func.coalesce(func.avg(enr.c.grade), Student.gpa).label("mean_grade"),
+			func.coalesce(func.sum(case((enr.c.grade < PASSING_GRADE, 1), else_=0)), 0).label("failed_courses"),
+			case((n_terms > 0, func.coalesce(func.sum(enr.c.credits), 0) / n_terms), else_=0).label("credit_hours"),
+		)
+		.select_from(Student)
+		.join(enr, enr.c.student_id == Student.id, isouter=term is None)
+		.where(Student.status == "active")
+		.group_by(Student.id, Student.gpa)
+		.order_by(Student.id)
+	)
+	if department_id is not None:
+		stmt = stmt.where(Student.department_id == department_id)
+	return stmt
+
+
+def iter_student_features(
+	db: Session,
+	department_id: Optional[int] = None,
+	term: Optional[str] = None,
+	attendance_rate: float = 1.0,
+	chunk_size: int = 5000,
+	source: str = "live",
+) -> Iterator[tuple[List[StudentFeatures], int]]:
+	"""
+	Stream ``(features, skipped)`` chunks straight from the aggregate query,
+	computed live from enrollments/grades or read from the student_features store.
+	Students without any grade or recorded GPA cannot be scored and are skipped.
+	"""
+	query = stored_feature_query if source == "store" else student_feature_query
+	result = db.execute(query(department_id, term).execution_options(yield_per=chunk_size))
+	for rows in result.partitions():
+		features = [
+			f for f in (to_student_features(*row, attendance_rate=attendance_rate) for row in rows)
+			if f is not None
+		]
+		yield features, len(rows) - len(features)
+
+
+def run_scoring_job(db: Session, request: ScoringRunRequest) -> ScoringRunResponse:
+	"""Score every matching student from the database and persist the results"""
+	predictor, _ = model_registry.get(request.model_version)
+	run_id = str(uuid.uuid4())
+	scored = skipped = 0
+	risk_levels = {"low": 0, "medium": 0, "high": 0}
+
+	chunks = iter_student_features(
+		db,
+		department_id=request.department_id,
+		term=request.term,
+		attendance_rate=request.default_attendance_rate,
+		chunk_size=request.chunk_size,
+		source=request.source,
+	)
+	for features, chunk_skipped in chunks:
+		skipped += chunk_skipped
+		if not features:
+			continue
+		result = predictor.predict(features, columnar=True)
+		levels = result["risk_level"].tolist()
+		rows = [
+			{
+				"run_id": run_id,
+				"student_id": student_id,
+				"term": request.term,
+				"model_version": request.model_version,
+				"risk_score": risk_score,
+				"risk_level": level,
+				"confidence": confidence,
+				"factors": factors,
+			}
+			for student_id, risk_score, level, confidence, factors in zip(
+				result["student_id"].tolist(),
+				result["risk_score"].tolist(),
+				levels,
+				result["confidence"].tolist(),
+				factor_lists(result["factors"]),
+			)
+		]
+		db.execute(insert(AtRiskScore), rows)
+		scored += len(rows)
+		for level in levels:
+			risk_levels[level] += 1
+	db.commit()
+
+	return ScoringRunResponse(
+		run_id=run_id,
+		model_version=request.model_version,
+		department_id=request.department_id,
+		term=request.term,
+		scored=scored,
+		skipped=skipped,
+		risk_levels=risk_levels,
+		generated_at=datetime.now(),
+	)
+
+
+def score_from_database(request: ScoringRunRequest) -> ScoringRunResponse:
+	"""Job entry point: run a scoring job with its own session (e.g. in a worker process)"""
+	db = SessionLocal()
+	try:
+		return run_scoring_job(db, request)
+	except Exception:
+		db.rollback()
+		raise
+	finally:
+		db.close()
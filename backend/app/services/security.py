@@ -1,6 +1,23 @@
+import time
+from typing import Callable, Optional, Tuple
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from app.core.config import settings
+from app.services.jobs import JobQueueFull, password_jobs
+from app.services.metrics import registry
 
-_pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# hashes made with other rounds still verify; needs_update() flags them for a rehash
+_pwd = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.password_bcrypt_rounds)
+
+HASH_SECONDS = registry.histogram("password_hash_seconds", "bcrypt hash time on a password worker")
+VERIFY_SECONDS = registry.histogram("password_verify_seconds", "bcrypt verify (and rehash) time on a password worker")
+REJECTED = registry.counter("password_rejected_total", "Password operations refused because the queue was full")
+registry.gauge("password_in_flight", "Password operations running or queued", lambda: password_jobs.in_flight)
+registry.gauge(
+	"password_queue_depth",
+	"Password operations waiting for a worker",
+	lambda: max(0, password_jobs.in_flight - password_jobs.max_workers),
+)
 
 
 def hash_password(raw: str) -> str:
@@ -9,3 +26,42 @@ def hash_password(raw: str) -> str:
 
 def verify_password(raw: str, hashed: str) -> bool:
 	return _pwd.verify(raw, hashed)
+
+
+def verify_and_rehash(raw: str, hashed: str) -> Tuple[bool, Optional[str]]:
+	"""``(matches, new_hash)``; new_hash is set when ``hashed`` used other bcrypt rounds than configured"""
+	try:
+		return _pwd.verify_and_update(raw, hashed)
+	except ValueError:
+		# not a hash at all, e.g. the unusable password of an imported account
+		return False, None
+
+
+def _timed(histogram, fn: Callable, *args):
+	started = time.perf_counter()
+	try:
+		return fn(*args)
+	finally:
+		histogram.observe(time.perf_counter() - started)
+
+
+async def _run(histogram, fn: Callable, *args):
+	try:
+		return await password_jobs.run(_timed, histogram, fn, *args)
+	except JobQueueFull:
+		REJECTED.inc()
+		raise HTTPException(
+			status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+			detail="Password service is busy, try again shortly",
+			headers={"Retry-After": "1"},
+		)
+
+
+async def hash_password_async(raw: str) -> str:
+	"""hash_password on the bounded password pool; 503 when its queue is full"""
+	return await _run(HASH_SECONDS, hash_password, raw)
+
+
+async def verify_and_rehash_async(raw: str, hashed: str) -> Tuple[bool, Optional[str]]:
+	"""verify_and_rehash on the bounded password pool; 503 when its queue is full"""
+	return await _run(VERIFY_SECONDS, verify_and_rehash, raw, hashed)
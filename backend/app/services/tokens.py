@@ -1,31 +1,40 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Dict, Optional
 from jose import jwt, JWTError
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import get_db
 from app.models.user import User
+from app.services.principal_cache import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# requests that cannot change state; these may authorize from token claims alone
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
-def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
+
+def create_access_token(subject: str, expires_minutes: Optional[int] = None, claims: Optional[Dict[str, Any]] = None) -> str:
 	expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes or settings.access_token_expire_minutes)
-	to_encode = {"sub": subject, "exp": expire}
+	to_encode = {**(claims or {}), "sub": subject, "exp": expire}
 	return jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
 
 
-def get_db():
-	db = SessionLocal()
-	try:
-		yield db
-	finally:
-		db.close()
+def create_user_token(user: User) -> str:
+	"""Access token carrying the user's id, role and token version as signed claims"""
+	return create_access_token(user.email, claims={"uid": user.id, "role": user.role, "tv": user.token_version})
+
+
+def _principal_from_claims(payload: Dict[str, Any]) -> Optional[Principal]:
+	uid, role, version = payload.get("uid"), payload.get("role"), payload.get("tv")
+	if not isinstance(uid, int) or not isinstance(role, str) or not isinstance(version, int):
+		return None  # issued before role claims; take the lookup path
+	return Principal(id=uid, email=payload["sub"], role=role, token_version=version)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
 	credentials_exception = HTTPException(status_code=401, detail="Could not validate credentials")
 	try:
 		payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
@@ -34,7 +43,31 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 			raise credentials_exception
 	except JWTError:
 		raise credentials_exception
-	user = db.query(User).filter(User.email == email).first()
-	if user is None:
+
+	if request.method in SAFE_METHODS:
+		claimed = _principal_from_claims(payload)
+		if claimed is not None:
+			# trust the claims only against a known version record; inactive users
+			# are recorded as REVOKED, and without a record (expired, another
+			# process, restart) the lookup below checks is_active and the version
+			current = await principal_cache.current_token_version(claimed.id)
+			if current is not None:
+				if current != claimed.token_version:
+					raise credentials_exception
+				return claimed
+
+	principal = await principal_cache.get(email)
+	if principal is None:
+		row = (await db.execute(
+			select(User.id, User.email, User.role, User.is_active, User.token_version).where(User.email == email).limit(1)
+		)).first()
+		if row is None:
+			raise credentials_exception
+		principal = Principal(*row)
+		await principal_cache.put(principal)
+	if not principal.is_active:
+		raise credentials_exception
+	version = payload.get("tv")
+	if version is not None and version != principal.token_version:
 		raise credentials_exception
-	return user
+	return principal
@@ -0,0 +1,49 @@
+"""feat(db): add at_risk_scores table for server-side scoring runs
+
+Revision ID: 0012_create_at_risk_scores
+Revises: 0011_update_courses_table
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0012_create_at_risk_scores"
+down_revision = "0011_update_courses_table"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create at_risk_scores table and index grades by enrollment for the scoring aggregate."""
+    op.create_table(
+        "at_risk_scores",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("run_id", sa.String(length=36), nullable=False, comment="Scoring run identifier"),
+        sa.Column("student_id", sa.Integer(), nullable=False, comment="Foreign key to students table"),
+        sa.Column("term", sa.String(length=10), nullable=True, comment="Scored term (NULL = all terms)"),
+        sa.Column("model_version", sa.String(length=64), nullable=False, comment="Model version used for scoring"),
+        sa.Column("risk_score", sa.Float(), nullable=False),
+        sa.Column("risk_level", sa.String(length=16), nullable=False),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column("factors", sa.JSON(), nullable=False),
+        sa.Column("scored_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False, comment="Scoring timestamp"),
+        sa.ForeignKeyConstraint(["student_id"], ["students.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_at_risk_scores_id", "at_risk_scores", ["id"], unique=False)
+    op.create_index("ix_at_risk_scores_run_id", "at_risk_scores", ["run_id"], unique=False)
+    op.create_index("ix_at_risk_scores_student_id", "at_risk_scores", ["student_id"], unique=False)
+    op.create_index("ix_at_risk_scores_risk_level", "at_risk_scores", ["risk_level"], unique=False)
+    op.create_index("ix_grades_enrollment_id", "grades", ["enrollment_id"], unique=False)
+
+
+def downgrade():
+    """Drop at_risk_scores table and related indexes."""
+    op.drop_index("ix_grades_enrollment_id", table_name="grades")
+    op.drop_index("ix_at_risk_scores_risk_level", table_name="at_risk_scores")
+    op.drop_index("ix_at_risk_scores_student_id", table_name="at_risk_scores")
+    op.drop_index("ix_at_risk_scores_run_id", table_name="at_risk_scores")
+    op.drop_index("ix_at_risk_scores_id", table_name="at_risk_scores")
+    op.drop_table("at_risk_scores")
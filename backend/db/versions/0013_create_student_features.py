@@ -0,0 +1,40 @@
+"""feat(db): add student_features table as a precomputed analytics feature store
+
+Revision ID: 0013_create_student_features
+Revises: 0012_create_at_risk_scores
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0013_create_student_features"
+down_revision = "0012_create_at_risk_scores"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create student_features table keyed by (student_id, term)."""
+    op.create_table(
+        "student_features",
+        sa.Column("student_id", sa.Integer(), nullable=False, comment="Foreign key to students table"),
+        sa.Column("term", sa.String(length=10), nullable=False, comment="Academic term"),
+        sa.Column("enrolled_courses", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("graded_courses", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("grade_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("failed_courses", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("credit_hours", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False, comment="Last refresh timestamp"),
+        sa.ForeignKeyConstraint(["student_id"], ["students.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("student_id", "term")
+    )
+    # enrollments are looked up by (student_id, term) on every refresh
+    op.create_index("ix_enrollments_student_id_term", "enrollments", ["student_id", "term"], unique=False)
+
+
+def downgrade():
+    """Drop student_features table."""
+    op.drop_index("ix_enrollments_student_id_term", table_name="enrollments")
+    op.drop_table("student_features")
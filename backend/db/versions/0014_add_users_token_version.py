@@ -0,0 +1,25 @@
+"""feat(db): add users.token_version for revoking self-contained access tokens
+
+Revision ID: 0014_add_users_token_version
+Revises: 0013_create_student_features
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0014_add_users_token_version"
+down_revision = "0013_create_student_features"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add the token version that access tokens carry as their 'tv' claim."""
+    op.add_column("users", sa.Column("token_version", sa.Integer(), nullable=False, server_default=sa.text("0"), comment="Bumped to revoke issued access tokens"))
+
+
+def downgrade():
+    """Remove users.token_version."""
+    op.drop_column("users", "token_version")
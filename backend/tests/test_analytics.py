@@ -136,3 +136,208 @@ async def test_analytics_health_check():
         data = resp.json()
         assert data["status"] == "ok"
         assert data["service"] == "analytics"
+
+
+def test_model_registry_caches_and_warm_starts(tmp_path):
+    """Models are trained once per version and reloaded from disk artifacts"""
+    import numpy as np
+    from app.services.analytics import ModelRegistry
+    from app.services.model_store import ModelArtifactStore
+
+    registry = ModelRegistry(ModelArtifactStore(str(tmp_path)))
+    predictor, source = registry.get("v1")
+    assert source == "trained"
+    assert (tmp_path / "at_risk_v1.joblib").exists()
+    assert (tmp_path / "at_risk_v1.json").exists()
+
+    cached, source = registry.get("v1")
+    assert source == "memory"
+    assert cached is predictor
+
+    # a fresh process-level registry warm-starts from the artifact
+    warm, source = ModelRegistry(ModelArtifactStore(str(tmp_path))).get("v1")
+    assert source == "disk"
+    assert warm.is_trained
+    assert warm.feature_importance == predictor.feature_importance
+    assert isinstance(warm.scaler.mean_, np.memmap)
+
+    # the reloaded forest scores exactly like the one that was fitted
+    X = np.random.default_rng(0).normal(size=(500, 6))
+    assert np.array_equal(warm.model.predict_proba(X), predictor.model.predict_proba(X))
+
+
+def test_model_artifact_store_rejects_corrupted_artifact(tmp_path):
+    """Artifacts whose bytes do not match the manifest checksum are refused"""
+    import numpy as np
+    from app.services.model_store import ArtifactChecksumError, ModelArtifactStore
+
+    store = ModelArtifactStore(str(tmp_path))
+    manifest = store.save("demo", "v1", {"weights": np.arange(10.0)})
+    assert manifest["sha256"]
+    assert store.load("demo", "v2") is None
+
+    with open(tmp_path / "demo_v1.joblib", "r+b") as f:
+        f.seek(-8, 2)
+        f.write(b"\x00" * 8)
+    with pytest.raises(ArtifactChecksumError):
+        ModelArtifactStore(str(tmp_path)).load("demo", "v1")
+
+
+def test_predict_columnar_matches_row_predictions():
+    """Columnar and row outputs agree and factors follow the rule thresholds"""
+    from app.services.analytics import AtRiskPredictor, RISK_FACTORS
+
+    students = [
+        StudentFeatures(student_id=1, gpa=1.8, attendance_rate=0.5, credit_hours=9, failed_courses=3, gender="male"),
+        StudentFeatures(student_id=2, gpa=3.5, attendance_rate=0.95, credit_hours=15, failed_courses=0),
+    ]
+    predictor = AtRiskPredictor()
+    rows = predictor.predict(students)
+    columns = predictor.predict(students, columnar=True)
+
+    assert [p.student_id for p in rows] == columns["student_id"].tolist()
+    assert [p.risk_level for p in rows] == columns["risk_level"].tolist()
+    assert rows[0].factors == RISK_FACTORS
+    assert rows[1].factors == []
+    assert columns["factors"].shape == (2, len(RISK_FACTORS))
+    assert predictor.predict([]) == []
+
+
+def test_synthetic_training_data_batches():
+    """Chunked synthetic data is bounded per batch and labelled by the risk rules"""
+    import numpy as np
+    from app.services.analytics import iter_synthetic_training_data, synthetic_risk_labels
+
+    batches = list(iter_synthetic_training_data(2500, batch_size=1000, seed=7))
+    assert [len(X) for X, _ in batches] == [1000, 1000, 500]
+
+    labels = synthetic_risk_labels(
+        np.array([1.9, 3.5, 2.4, 2.9]),
+        np.array([0.9, 0.5, 0.9, 0.7]),
+        np.array([15, 15, 10, 15]),
+        np.array([0, 0, 0, 1]),
+    )
+    assert labels.tolist() == [1, 0, 1, 1]
+
+    again = list(iter_synthetic_training_data(2500, batch_size=1000, seed=7))
+    assert all((a[1] == b[1]).all() for a, b in zip(batches, again))
+
+
+@pytest.mark.asyncio
+async def test_analytics_at_risk_stream():
+    """NDJSON scoring streams one prediction per valid line and reports bad lines"""
+    import json
+
+    lines = [
+        StudentFeatures(student_id=i, gpa=1.5 + (i % 5) * 0.5, attendance_rate=0.9, credit_hours=15, failed_courses=0).model_dump_json()
+        for i in range(1, 6)
+    ]
+    lines.insert(2, '{"student_id": "x"}')
+    body = "\n".join(lines) + "\n"
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post("/api/v1/auth/register", json={"email": "stream@test.com", "username": "stream", "password": "testpass123", "role": "faculty"})
+        login_resp = await ac.post("/api/v1/auth/login", data={"username": "stream@test.com", "password": "testpass123"})
+        headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}", "Content-Type": "application/x-ndjson"}
+
+        resp = await ac.post("/api/v1/analytics/at-risk/stream?batch_size=2", content=body, headers=headers)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+        records = [json.loads(line) for line in resp.text.splitlines()]
+        errors = [r for r in records if "error" in r]
+        predictions = [r for r in records if "risk_score" in r]
+        assert [e["line"] for e in errors] == [3]
+        assert sorted(p["student_id"] for p in predictions) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_analytics_at_risk_stream_reports_full_queue(monkeypatch):
+    """A full worker queue mid-stream ends the response with an error record"""
+    import json
+    from app.services.analytics import score_ndjson_batch
+    from app.services.jobs import JobQueueFull, analytics_jobs
+
+    run = analytics_jobs.run
+    scored = []
+
+    async def busy_after_first_batch(fn, *args):
+        if fn is score_ndjson_batch:
+            if scored:
+                raise JobQueueFull("1 jobs already running or queued")
+            scored.append(args)
+        return await run(fn, *args)
+
+    monkeypatch.setattr(analytics_jobs, "run", busy_after_first_batch)
+    body = "\n".join(
+        StudentFeatures(student_id=i, gpa=3.0, attendance_rate=0.9, credit_hours=15, failed_courses=0).model_dump_json()
+        for i in range(1, 5)
+    ) + "\n"
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post("/api/v1/auth/register", json={"email": "stream-busy@test.com", "password": "testpass123", "role": "faculty"})
+        login_resp = await ac.post("/api/v1/auth/login", data={"username": "stream-busy@test.com", "password": "testpass123"})
+        headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}", "Content-Type": "application/x-ndjson"}
+
+        resp = await ac.post("/api/v1/analytics/at-risk/stream?batch_size=2", content=body, headers=headers)
+        assert resp.status_code == 200
+        records = [json.loads(line) for line in resp.text.splitlines()]
+        assert [r["student_id"] for r in records[:-1]] == [1, 2]
+        assert records[-1]["error"].startswith("Analytics workers are busy")
+        assert records[-1]["retry_after"] == 5
+
+
+@pytest.mark.asyncio
+async def test_analytics_at_risk_stream_stops_on_client_disconnect():
+    """A client that goes away mid-upload gets no error record written after it"""
+    line = StudentFeatures(student_id=1, gpa=3.0, attendance_rate=0.9, credit_hours=15, failed_courses=0).model_dump_json()
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post("/api/v1/auth/register", json={"email": "stream-gone@test.com", "password": "testpass123", "role": "faculty"})
+        login_resp = await ac.post("/api/v1/auth/login", data={"username": "stream-gone@test.com", "password": "testpass123"})
+        token = login_resp.json()["access_token"]
+
+    messages = [{"type": "http.request", "body": (line + "\n").encode(), "more_body": True}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/api/v1/analytics/at-risk/stream", "raw_path": b"/api/v1/analytics/at-risk/stream",
+        "query_string": b"batch_size=2", "root_path": "", "server": ("test", 80), "client": ("test", 1234),
+        "headers": [(b"host", b"test"), (b"authorization", f"Bearer {token}".encode()), (b"content-type", b"application/x-ndjson")],
+    }
+    await app(scope, receive, send)
+    assert sent[0]["status"] == 200
+    assert b"".join(m.get("body", b"") for m in sent[1:]) == b""
+
+
+@pytest.mark.asyncio
+async def test_analytics_training_job():
+    """Training runs as a background job whose status can be polled"""
+    import asyncio
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post("/api/v1/auth/register", json={"email": "trainer@test.com", "username": "trainer", "password": "testpass123", "role": "admin"})
+        login_resp = await ac.post("/api/v1/auth/login", data={"username": "trainer@test.com", "password": "testpass123"})
+        headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+
+        resp = await ac.post("/api/v1/analytics/models/v-job/train", json={"n_samples": 500}, headers=headers)
+        assert resp.status_code == 202
+        job = resp.json()
+        assert job["kind"] == "train"
+
+        for _ in range(300):
+            resp = await ac.get(f"/api/v1/analytics/jobs/{job['id']}", headers=headers)
+            assert resp.status_code == 200
+            if resp.json()["status"] in ("succeeded", "failed"):
+                break
+            await asyncio.sleep(0.1)
+        data = resp.json()
+        assert data["status"] == "succeeded", data["error"]
+        assert data["result"]["training_info"]["training_samples"] == 400
@@ -0,0 +1,43 @@
+import uuid
+import pytest
+from sqlalchemy import select
+from app.db.session import (
+	AsyncSessionLocal,
+	InstrumentedAsyncQueuePool,
+	ThreadedAsyncSession,
+	async_database_url,
+	engine_options,
+)
+from app.models.student import Student
+from app.models.user import User
+
+
+def test_async_database_url():
+	assert async_database_url("sqlite:///./dev.db") is None
+	assert async_database_url("postgresql://app:app@db:5432/academic") == "postgresql+psycopg://app:app@db:5432/academic"
+	assert async_database_url("postgresql+psycopg://app:app@db/academic") == "postgresql+psycopg://app:app@db/academic"
+	opts = engine_options("postgresql+psycopg://app:app@db/academic", is_async=True)
+	assert opts["poolclass"] is InstrumentedAsyncQueuePool
+
+
+@pytest.mark.asyncio
+async def test_sqlite_falls_back_to_threaded_session():
+	async with AsyncSessionLocal() as db:
+		assert isinstance(db, ThreadedAsyncSession)
+		k = uuid.uuid4().hex[:6]
+		user = User(email=f"async-{k}@test.com", role="student", password_hash="x")
+		db.add(user)
+		await db.flush()
+		obj = Student(student_no=f"A{k}", entry_year=1401, user_id=user.id)
+		db.add(obj)
+		await db.commit()
+		await db.refresh(obj)
+		# buffered results stay readable on the event loop, objects stay loaded after commit
+		result = await db.execute(select(Student.id, Student.student_no).where(Student.user_id == user.id))
+		assert result.all() == [(obj.id, f"A{k}")]
+		assert (await db.scalars(select(Student.student_no).where(Student.id == obj.id))).all() == [f"A{k}"]
+		assert (await db.get(Student, obj.id)).entry_year == 1401
+		await db.delete(obj)
+		await db.delete(user)
+		await db.commit()
+		assert await db.scalar(select(Student.id).where(Student.id == obj.id)) is None
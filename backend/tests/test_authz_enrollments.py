@@ -1,21 +1,28 @@
+import uuid
 import pytest
 from httpx import AsyncClient
 from app.main import app
 
 
+async def _create_student(ac, student_no):
+	user = await ac.post("/api/v1/auth/register", json={"email": f"{student_no.lower()}@test.com", "password": "testpass123", "role": "student"})
+	return await ac.post("/api/v1/students/", json={"student_no": student_no, "user_id": user.json()["id"]})
+
+
 @pytest.mark.asyncio
 async def test_enrollments_rbac(monkeypatch, tmp_path):
 	monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path/'rbac_enr.db'}")
+	k = uuid.uuid4().hex[:6]
 	async with AsyncClient(app=app, base_url="http://test") as ac:
 		# faculty token
-		await ac.post("/api/v1/auth/register", json={"email": "f@u.com", "username": "f", "role": "faculty", "password": "secretx"})
-		login = await ac.post("/api/v1/auth/login", data={"username": "f@u.com", "password": "secretx"})
+		await ac.post("/api/v1/auth/register", json={"email": f"f-{k}@u.com", "username": "f", "role": "faculty", "password": "secretx"})
+		login = await ac.post("/api/v1/auth/login", data={"username": f"f-{k}@u.com", "password": "secretx"})
 		token = login.json()["access_token"]
 		headers = {"Authorization": f"Bearer {token}"}
 
 		# seed student & course
-		student = await ac.post("/api/v1/students/", json={"student_no": "S4001"})
-		course = await ac.post("/api/v1/courses/", json={"code": "ENR1", "title": "Enroll"})
+		student = await _create_student(ac, f"S4{k}")
+		course = await ac.post("/api/v1/courses/", json={"code": f"ENR1-{k}", "title": "Enroll"})
 
 		# unauthorized create
 		resp = await ac.post("/api/v1/enrollments/", json={"student_id": student.json()["id"], "course_id": course.json()["id"], "term": "1402-1"})
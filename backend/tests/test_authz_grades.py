@@ -1,23 +1,30 @@
+import uuid
 import pytest
 from httpx import AsyncClient
 from app.main import app
 
 
+async def _create_student(ac, student_no):
+	user = await ac.post("/api/v1/auth/register", json={"email": f"{student_no.lower()}@test.com", "password": "testpass123", "role": "student"})
+	return await ac.post("/api/v1/students/", json={"student_no": student_no, "user_id": user.json()["id"]})
+
+
 @pytest.mark.asyncio
 async def test_grades_rbac(monkeypatch, tmp_path):
 	monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path/'rbac.db'}")
+	k = uuid.uuid4().hex[:6]
 	async with AsyncClient(app=app, base_url="http://test") as ac:
 		# seed a faculty and get token
-		reg = await ac.post("/api/v1/auth/register", json={"email": "t@u.com", "username": "t", "role": "faculty", "password": "xsecret"})
+		reg = await ac.post("/api/v1/auth/register", json={"email": f"t-{k}@u.com", "username": "t", "role": "faculty", "password": "xsecret"})
 		assert reg.status_code == 201
-		login = await ac.post("/api/v1/auth/login", data={"username": "t@u.com", "password": "xsecret"})
+		login = await ac.post("/api/v1/auth/login", data={"username": f"t-{k}@u.com", "password": "xsecret"})
 		token = login.json()["access_token"]
 		headers = {"Authorization": f"Bearer {token}"}
 
 		# seed student/course/enrollment
-		student = await ac.post("/api/v1/students/", json={"student_no": "S3001"})
-		course = await ac.post("/api/v1/courses/", json={"code": "RBAC1", "title": "RBAC"})
-		enr = await ac.post("/api/v1/enrollments/", json={"student_id": student.json()["id"], "course_id": course.json()["id"], "term": "1402-1"})
+		student = await _create_student(ac, f"S3{k}")
+		course = await ac.post("/api/v1/courses/", json={"code": f"RBAC1-{k}", "title": "RBAC"})
+		enr = await ac.post("/api/v1/enrollments/", json={"student_id": student.json()["id"], "course_id": course.json()["id"], "term": "1402-1"}, headers=headers)
 		enr_id = enr.json()["id"]
 
 		# unauthorized create (no token)
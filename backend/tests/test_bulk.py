@@ -0,0 +1,76 @@
+import uuid
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models import Course, Grade, Student, StudentFeature, User
+
+
+def _seed_class(n_students: int, k: str):
+	db = SessionLocal()
+	try:
+		course = Course(code=f"BULK-{k}", title="Bulk", credits=3)
+		students = [
+			Student(student_no=f"B{k}-{i}", user=User(email=f"bulk{i}-{k}@test.com", role="student", password_hash="x"))
+			for i in range(n_students)
+		]
+		db.add_all([course, *students])
+		db.commit()
+		return course.id, [s.id for s in students]
+	finally:
+		db.close()
+
+
+async def _faculty_headers(ac, k):
+	await ac.post("/api/v1/auth/register", json={"email": f"bulkfaculty-{k}@test.com", "username": f"bulkfaculty-{k}", "password": "testpass123", "role": "faculty"})
+	login_resp = await ac.post("/api/v1/auth/login", data={"username": f"bulkfaculty-{k}@test.com", "password": "testpass123"})
+	return {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_enrollments_and_grades():
+	k = uuid.uuid4().hex[:6]
+	course_id, student_ids = _seed_class(3, k)
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		headers = await _faculty_headers(ac, k)
+		enrollments = [{"student_id": s, "course_id": course_id, "term": "1402-1"} for s in student_ids]
+		enrollments += [
+			{"student_id": student_ids[0], "course_id": course_id, "term": "1402-1"},
+			{"student_id": 999999, "course_id": course_id, "term": "1402-1"},
+		]
+		resp = await ac.post("/api/v1/enrollments/bulk", json=enrollments, headers=headers)
+		assert resp.status_code == 200
+		data = resp.json()
+		assert (data["succeeded"], data["failed"]) == (3, 2)
+		assert [i["status"] for i in data["items"]] == ["created"] * 3 + ["error"] * 2
+		assert data["items"][3]["error"] == "enrollment already exists"
+		assert data["items"][4]["error"] == "student not found"
+		enrollment_ids = [i["id"] for i in data["items"][:3]]
+		assert all(enrollment_ids)
+
+		grades = [{"enrollment_id": e, "value": v} for e, v in zip(enrollment_ids, (18, 7, 12))]
+		grades.append({"enrollment_id": enrollment_ids[0], "value": 20})
+		resp = await ac.post("/api/v1/grades/bulk", json=grades, headers=headers)
+		data = resp.json()
+		assert (data["succeeded"], data["failed"]) == (3, 1)
+		assert data["items"][3]["error"] == "enrollment already has a grade"
+		grade_ids = [i["id"] for i in data["items"][:3]]
+
+		updates = [{"id": grade_ids[1], "value": 11}, {"id": grade_ids[2]}, {"id": 999999, "value": 1}]
+		resp = await ac.patch("/api/v1/grades/bulk", json=updates, headers=headers)
+		data = resp.json()
+		assert [i["status"] for i in data["items"]] == ["updated", "unchanged", "error"]
+
+		resp = await ac.post("/api/v1/grades/bulk", json=[], headers=headers)
+		assert resp.status_code == 422
+		resp = await ac.post("/api/v1/grades/bulk", json=grades)
+		assert resp.status_code == 401
+
+	db = SessionLocal()
+	try:
+		assert sorted(g.value for g in db.query(Grade).filter(Grade.id.in_(grade_ids))) == [11, 12, 18]
+		# the feature store sees the updated grade: nobody is failing any more
+		features = db.query(StudentFeature).filter(StudentFeature.student_id.in_(student_ids))
+		assert [f.failed_courses for f in features] == [0, 0, 0]
+	finally:
+		db.close()
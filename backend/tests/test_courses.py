@@ -1,11 +1,24 @@
 import pytest
 from httpx import AsyncClient
 from app.main import app
+from app.db.session import SessionLocal
+from app.models import Department
+
+
+def _department(code):
+	db = SessionLocal()
+	try:
+		if not db.query(Department.id).filter_by(code=code).scalar():
+			db.add(Department(name="Computer Science", code=code))
+			db.commit()
+	finally:
+		db.close()
 
 
 @pytest.mark.asyncio
 async def test_courses_crud(monkeypatch, tmp_path):
 	monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path/'courses.db'}")
+	_department("CS")
 	async with AsyncClient(app=app, base_url="http://test") as ac:
 		# empty list
 		resp = await ac.get("/api/v1/courses/")
@@ -16,6 +29,9 @@ async def test_courses_crud(monkeypatch, tmp_path):
 		resp = await ac.post("/api/v1/courses/", json=payload)
 		assert resp.status_code == 201
 		course_id = resp.json()["id"]
+		assert resp.json()["department"] == "CS"
+		resp = await ac.post("/api/v1/courses/", json={**payload, "code": "CS102", "department": "NOPE"})
+		assert resp.status_code == 404
 		# get
 		resp = await ac.get(f"/api/v1/courses/{course_id}")
 		assert resp.status_code == 200
@@ -1,26 +1,52 @@
+import uuid
 import pytest
 from httpx import AsyncClient
 from app.main import app
+from app.db.session import SessionLocal
+from app.models import Department
+
+
+def _department(code):
+	db = SessionLocal()
+	try:
+		if not db.query(Department.id).filter_by(code=code).scalar():
+			db.add(Department(name="Computer Science", code=code))
+			db.commit()
+	finally:
+		db.close()
+
+
+async def _faculty_headers(ac, k):
+	await ac.post("/api/v1/auth/register", json={"email": f"faculty-{k}@test.com", "password": "testpass123", "role": "faculty"})
+	login = await ac.post("/api/v1/auth/login", data={"username": f"faculty-{k}@test.com", "password": "testpass123"})
+	return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+async def _create_student(ac, student_no, **fields):
+	user = await ac.post("/api/v1/auth/register", json={"email": f"{student_no.lower()}@test.com", "password": "testpass123", "role": "student"})
+	return await ac.post("/api/v1/students/", json={"student_no": student_no, "user_id": user.json()["id"], **fields})
 
 
 @pytest.mark.asyncio
 async def test_enrollments_crud(monkeypatch, tmp_path):
 	monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path/'enrollments.db'}")
+	_department("CS")
+	k = uuid.uuid4().hex[:6]
 	async with AsyncClient(app=app, base_url="http://test") as ac:
+		headers = await _faculty_headers(ac, k)
 		# Create student and course first
-		student_payload = {"student_no": "S1001", "entry_year": 1402, "full_name": "Test Student"}
-		student_resp = await ac.post("/api/v1/students/", json=student_payload)
+		student_resp = await _create_student(ac, f"S{k}", entry_year=1402, full_name="Test Student")
 		assert student_resp.status_code == 201
 		student_id = student_resp.json()["id"]
 		
-		course_payload = {"code": "CS101", "title": "Intro CS", "credits": 3, "department": "CS"}
+		course_payload = {"code": f"CS{k}", "title": "Intro CS", "credits": 3, "department": "CS"}
 		course_resp = await ac.post("/api/v1/courses/", json=course_payload)
 		assert course_resp.status_code == 201
 		course_id = course_resp.json()["id"]
 		
 		# Create enrollment
 		enrollment_payload = {"student_id": student_id, "course_id": course_id, "term": "1402-1", "grade": 18.5}
-		enrollment_resp = await ac.post("/api/v1/enrollments/", json=enrollment_payload)
+		enrollment_resp = await ac.post("/api/v1/enrollments/", json=enrollment_payload, headers=headers)
 		assert enrollment_resp.status_code == 201
 		enrollment_id = enrollment_resp.json()["id"]
 		
@@ -29,10 +55,10 @@ async def test_enrollments_crud(monkeypatch, tmp_path):
 		assert get_resp.status_code == 200
 		
 		# Update grade
-		update_resp = await ac.patch(f"/api/v1/enrollments/{enrollment_id}", json={"grade": 19.0})
+		update_resp = await ac.patch(f"/api/v1/enrollments/{enrollment_id}", json={"grade": 19.0}, headers=headers)
 		assert update_resp.status_code == 200
 		assert update_resp.json()["grade"] == 19.0
 		
 		# Delete enrollment
-		delete_resp = await ac.delete(f"/api/v1/enrollments/{enrollment_id}")
+		delete_resp = await ac.delete(f"/api/v1/enrollments/{enrollment_id}", headers=headers)
 		assert delete_resp.status_code == 204
@@ -1,31 +1,45 @@
+import uuid
 import pytest
 from httpx import AsyncClient
 from app.main import app
 
 
+async def _faculty_headers(ac, k):
+	await ac.post("/api/v1/auth/register", json={"email": f"faculty-{k}@test.com", "password": "testpass123", "role": "faculty"})
+	login = await ac.post("/api/v1/auth/login", data={"username": f"faculty-{k}@test.com", "password": "testpass123"})
+	return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+async def _create_student(ac, student_no, **fields):
+	user = await ac.post("/api/v1/auth/register", json={"email": f"{student_no.lower()}@test.com", "password": "testpass123", "role": "student"})
+	return await ac.post("/api/v1/students/", json={"student_no": student_no, "user_id": user.json()["id"], **fields})
+
+
 @pytest.mark.asyncio
 async def test_grades_crud(monkeypatch, tmp_path):
 	monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path/'grades.db'}")
+	k = uuid.uuid4().hex[:6]
 	async with AsyncClient(app=app, base_url="http://test") as ac:
+		headers = await _faculty_headers(ac, k)
 		# seed student, course, enrollment
-		student = await ac.post("/api/v1/students/", json={"student_no": "S2001", "entry_year": 1402})
+		student = await _create_student(ac, f"S{k}", entry_year=1402)
 		assert student.status_code == 201
-		course = await ac.post("/api/v1/courses/", json={"code": "MATH101", "title": "Math", "credits": 3})
+		course = await ac.post("/api/v1/courses/", json={"code": f"MATH{k}", "title": "Math", "credits": 3})
 		assert course.status_code == 201
-		enrollment = await ac.post("/api/v1/enrollments/", json={"student_id": student.json()["id"], "course_id": course.json()["id"], "term": "1402-1"})
+		enrollment = await ac.post("/api/v1/enrollments/", json={"student_id": student.json()["id"], "course_id": course.json()["id"], "term": "1402-1"}, headers=headers)
 		assert enrollment.status_code == 201
 		enrollment_id = enrollment.json()["id"]
 		# create grade
-		resp = await ac.post("/api/v1/grades/", json={"enrollment_id": enrollment_id, "value": 17.25})
+		resp = await ac.post("/api/v1/grades/", json={"enrollment_id": enrollment_id, "value": 17.25}, headers=headers)
 		assert resp.status_code == 201
 		grade_id = resp.json()["id"]
 		# get
 		resp = await ac.get(f"/api/v1/grades/{grade_id}")
 		assert resp.status_code == 200
 		# update
-		resp = await ac.patch(f"/api/v1/grades/{grade_id}", json={"value": 18.0})
+		resp = await ac.patch(f"/api/v1/grades/{grade_id}", json={"value": 18.0}, headers=headers)
 		assert resp.status_code == 200
 		assert resp.json()["value"] == 18.0
 		# delete
-		resp = await ac.delete(f"/api/v1/grades/{grade_id}")
+		resp = await ac.delete(f"/api/v1/grades/{grade_id}", headers=headers)
 		assert resp.status_code == 204
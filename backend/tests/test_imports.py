@@ -0,0 +1,156 @@
+import io
+import uuid
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models import Enrollment, Grade, Student, StudentFeature, User
+from app.services.importer import import_rows
+
+
+async def _admin_headers(ac):
+	await ac.post("/api/v1/auth/register", json={"email": "importer@test.com", "username": "importer", "password": "testpass123", "role": "admin"})
+	login_resp = await ac.post("/api/v1/auth/login", data={"username": "importer@test.com", "password": "testpass123"})
+	return {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+
+
+async def _user_emails(ac):
+	emails, cursor = [], None
+	while True:
+		resp = await ac.get("/api/v1/users/", params={"limit": 200, **({"cursor": cursor} if cursor else {})})
+		emails += [u["email"] for u in resp.json()]
+		cursor = resp.headers.get("X-Next-Cursor")
+		if cursor is None:
+			return emails
+
+
+def _csv(text: str):
+	return io.BytesIO(text.strip().encode())
+
+
+@pytest.mark.asyncio
+async def test_import_csv_pipeline_with_row_errors():
+	k = uuid.uuid4().hex[:6]
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		headers = await _admin_headers(ac)
+		# registered with a different case than the import uses
+		await ac.post("/api/v1/auth/register", json={"email": f"Taken-{k}@test.com", "password": "testpass123", "role": "student"})
+		users_before = await _user_emails(ac)
+
+		students = (
+			"student_no,entry_year,full_name,email\n"
+			f"I{k}-1,1401,Ali,ali-{k}@test.com\n"
+			f"I{k}-2,,Sara,taken-{k}@test.com\n"
+			f"I{k}-1,1402,Again,again-{k}@test.com\n"
+			f"I{k}-3,soon,Bad,bad-{k}@test.com\n"
+			f"I{k}-4,1401,Twin,taken-{k}@test.com"
+		)
+		resp = await ac.post("/api/v1/imports/students", files={"file": ("students.csv", _csv(students))}, headers=headers)
+		assert resp.status_code == 200
+		report = resp.json()
+		assert (report["rows"], report["inserted"], report["error_count"]) == (5, 2, 3)
+		assert [e["row"] for e in report["errors"]] == [4, 5, 6]
+		assert "entry_year" in report["errors"][1]["error"]
+		# the cached user list picks up the created account, and only that one
+		assert await _user_emails(ac) == users_before + [f"ali-{k}@test.com"]
+
+		# the second student for an already linked user is rejected
+		files = {"file": ("students.csv", _csv(f"student_no,email\nI{k}-5,taken-{k}@test.com"))}
+		report = (await ac.post("/api/v1/imports/students", files=files, headers=headers)).json()
+		assert report["inserted"] == 0
+		assert report["errors"] == [{"row": 2, "error": f"user taken-{k}@test.com already has a student record"}]
+
+		# created users exist but cannot log in
+		resp = await ac.post("/api/v1/auth/login", data={"username": f"ali-{k}@test.com", "password": "!"})
+		assert resp.status_code == 401
+
+		files = {"file": ("courses.csv", _csv(f"code,title,credits\nC{k}1,Intro,3\nC{k}2,Data,4"))}
+		resp = await ac.post("/api/v1/imports/courses", files=files, headers=headers)
+		assert resp.json()["inserted"] == 2
+
+		enrollments = (
+			"student_no,course_code,term\n"
+			f"I{k}-1,C{k}1,1402-1\nI{k}-1,C{k}2,1402-1\nI{k}-2,C{k}1,1402-1\nI{k}-9,C{k}1,1402-1\nI{k}-2,C{k}9,1402-1"
+		)
+		resp = await ac.post(
+			"/api/v1/imports/enrollments", params={"chunk_size": 2},
+			files={"file": ("enrollments.csv", _csv(enrollments))}, headers=headers,
+		)
+		report = resp.json()
+		assert (report["inserted"], report["error_count"]) == (3, 2)
+		assert [e["error"] for e in report["errors"]] == [f"unknown student_no I{k}-9", f"unknown course_code C{k}9"]
+
+		# re-importing the same file only produces duplicate errors
+		resp = await ac.post("/api/v1/imports/enrollments", files={"file": ("enrollments.csv", _csv(enrollments))}, headers=headers)
+		assert resp.json()["inserted"] == 0
+
+		grades = f"student_no,course_code,term,value\nI{k}-1,C{k}1,1402-1,8\nI{k}-1,C{k}2,1402-1,9.5\nI{k}-2,C{k}2,1402-1,12"
+		resp = await ac.post("/api/v1/imports/grades", files={"file": ("grades.csv", _csv(grades))}, headers=headers)
+		report = resp.json()
+		assert (report["inserted"], report["error_count"]) == (2, 1)
+		assert report["errors"][0] == {"row": 4, "error": "no such enrollment"}
+
+		resp = await ac.post("/api/v1/imports/teachers", files={"file": ("x.csv", _csv("a\n1"))}, headers=headers)
+		assert resp.status_code == 422
+		resp = await ac.post("/api/v1/imports/courses", files={"file": ("x.xlsx", _csv("not a workbook"))}, headers=headers)
+		assert resp.status_code == 400
+
+	db = SessionLocal()
+	try:
+		students = db.query(Student.id, User.email).join(User).filter(Student.student_no.in_([f"I{k}-1", f"I{k}-2"])).all()
+		assert sorted(email for _, email in students) == sorted([f"ali-{k}@test.com", f"Taken-{k}@test.com"])
+		ids = [student_id for student_id, _ in students]
+		assert db.query(Enrollment).filter(Enrollment.student_id.in_(ids)).count() == 3
+		assert db.query(Grade).join(Enrollment).filter(Enrollment.student_id.in_(ids)).count() == 2
+		# the feature store follows imported grades
+		features = db.query(StudentFeature).filter(StudentFeature.student_id.in_(ids))
+		assert sorted(f.failed_courses for f in features) == [0, 2]
+	finally:
+		db.close()
+
+
+def test_import_xlsx_rows():
+	openpyxl = pytest.importorskip("openpyxl")
+	from app.services.importer import iter_xlsx_rows
+
+	workbook = openpyxl.Workbook()
+	sheet = workbook.active
+	sheet.append(["code", "title", "credits"])
+	code = f"X{uuid.uuid4().hex[:6]}"
+	sheet.append([code, "Excel", 3])
+	sheet.append([None, "Missing code", None])
+	buffer = io.BytesIO()
+	workbook.save(buffer)
+	buffer.seek(0)
+
+	rows = list(iter_xlsx_rows(buffer))
+	assert rows == [{"code": code, "title": "Excel", "credits": "3"}, {"code": None, "title": "Missing code", "credits": None}]
+	db = SessionLocal()
+	try:
+		report = import_rows(db, "courses", rows)
+	finally:
+		db.close()
+	assert (report.inserted, report.error_count) == (1, 1)
+
+
+def test_import_reports_database_errors_per_row(monkeypatch):
+	from sqlalchemy.exc import IntegrityError
+	from app.schemas.imports import CourseImportRow
+	from app.services import importer
+
+	def write(db, rows, chunk):
+		if any(row.code.endswith("BAD") for _, row in rows):
+			raise IntegrityError("INSERT", {}, Exception("rejected by the database"))
+		importer._import_courses(db, rows, chunk)
+
+	monkeypatch.setitem(importer.ENTITIES, "courses", importer._Entity(CourseImportRow, write))
+	k = uuid.uuid4().hex[:6]
+	rows = [{"code": f"D{k}1", "title": "One"}, {"code": f"D{k}BAD", "title": "Bad"}, {"code": f"D{k}2", "title": "Two"}]
+	db = SessionLocal()
+	try:
+		report = import_rows(db, "courses", rows)
+	finally:
+		db.close()
+	assert (report.rows, report.inserted, report.error_count) == (3, 2, 1)
+	assert report.errors[0].row == 3
+	assert "rejected by the database" in report.errors[0].error
@@ -0,0 +1,58 @@
+import threading
+import pytest
+from app.services.jobs import JobQueueFull, JobRunner
+
+
+def test_job_runner_rejects_when_queue_full():
+	runner = JobRunner(max_workers=1, max_queue=1, kind="thread")
+	release = threading.Event()
+	try:
+		running = runner.submit("block", release.wait, 5)
+		queued = runner.submit("block", release.wait, 5)
+		with pytest.raises(JobQueueFull):
+			runner.submit("block", release.wait, 5)
+		assert queued.status == "queued"
+		release.set()
+		running.future.result(timeout=5)
+		queued.future.result(timeout=5)
+		assert runner.get(running.id).to_dict()["status"] == "succeeded"
+		assert runner.in_flight == 0
+	finally:
+		release.set()
+		runner.shutdown()
+
+
+def test_job_history_prunes_finished_jobs_past_a_running_one():
+	runner = JobRunner(max_workers=2, max_queue=4, kind="thread", max_history=3)
+	release = threading.Event()
+	try:
+		slow = runner.submit("block", release.wait, 5)
+		for i in range(10):
+			runner.submit("quick", abs, -i).future.result(timeout=5)
+		assert len(runner._jobs) == 3
+		assert runner.get(slow.id) is slow
+	finally:
+		release.set()
+		runner.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_job_runner_run_in_process_pool():
+	runner = JobRunner(max_workers=1, max_queue=0, kind="process")
+	try:
+		assert await runner.run(pow, 2, 10) == 1024
+	finally:
+		runner.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_job_runner_map_reserves_whole_batch():
+	runner = JobRunner(max_workers=2, max_queue=1, kind="thread")
+	try:
+		assert await runner.map(abs, [-3, 2, -1]) == [3, 2, 1]
+		assert runner.in_flight == 0
+		with pytest.raises(JobQueueFull):
+			await runner.map(abs, [-1, -2, -3, -4])
+		assert runner.in_flight == 0
+	finally:
+		runner.shutdown()
@@ -0,0 +1,48 @@
+import pytest
+from httpx import AsyncClient
+from app.db.session import InstrumentedQueuePool, engine_options
+from app.main import app
+
+
+def test_engine_options_sqlite_memory_keeps_default_pool():
+	opts = engine_options("sqlite://")
+	assert "poolclass" not in opts
+	assert opts["connect_args"] == {"check_same_thread": False}
+
+
+def test_engine_options_postgres(monkeypatch):
+	from app.core.config import settings
+	monkeypatch.setattr(settings, "db_pool_size", 7)
+	monkeypatch.setattr(settings, "db_statement_timeout_ms", 5000)
+	opts = engine_options("postgresql+psycopg://app:app@db:5432/academic")
+	assert opts["poolclass"] is InstrumentedQueuePool
+	assert opts["pool_size"] == 7
+	assert opts["connect_args"]["options"] == "-c statement_timeout=5000"
+
+
+def test_engine_options_split_one_budget_between_sync_and_async(monkeypatch):
+	from app.core.config import settings
+	from app.db.session import InstrumentedAsyncQueuePool
+	monkeypatch.setattr(settings, "db_pool_size", 5)
+	monkeypatch.setattr(settings, "db_max_overflow", 10)
+	url = "postgresql+psycopg://app:app@db:5432/academic"
+	sync, async_ = engine_options(url, split=True), engine_options(url, is_async=True, split=True)
+	assert async_["poolclass"] is InstrumentedAsyncQueuePool
+	assert sync["pool_size"] + async_["pool_size"] == 5
+	assert sync["max_overflow"] + async_["max_overflow"] == 10
+	monkeypatch.setattr(settings, "db_pool_size", 1)
+	assert engine_options(url, split=True)["pool_size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_reports_pool():
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		resp = await ac.get("/api/v1/students/")
+		assert resp.status_code == 200
+		resp = await ac.get("/metrics")
+		assert resp.status_code == 200
+		body = resp.text
+		assert "# TYPE db_pool_checkout_wait_seconds histogram" in body
+		assert "db_pool_saturation " in body
+		count = [line for line in body.splitlines() if line.startswith("db_pool_checkout_wait_seconds_count")]
+		assert count and int(count[0].split()[1]) >= 1
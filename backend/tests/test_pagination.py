@@ -1,6 +1,14 @@
+import uuid
 import pytest
 from httpx import AsyncClient
 from app.main import app
+from app.services.pagination import _keyset, encode_cursor
+
+
+async def _user_id(ac, email):
+	resp = await ac.post("/api/v1/auth/register", json={"email": email, "password": "testpass123", "role": "student"})
+	assert resp.status_code == 201
+	return resp.json()["id"]
 
 
 @pytest.mark.asyncio
@@ -8,15 +16,83 @@ async def test_students_pagination(monkeypatch, tmp_path):
 	monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path/'pg.db'}")
 	async with AsyncClient(app=app, base_url="http://test") as ac:
 		# seed 3 students
+		k = uuid.uuid4().hex[:6]
 		for i in range(3):
-			resp = await ac.post("/api/v1/students/", json={"student_no": f"S{i}", "entry_year": 1400 + i})
+			user_id = await _user_id(ac, f"page-{k}-{i}@test.com")
+			resp = await ac.post("/api/v1/students/", json={"student_no": f"P{k}-{i}", "entry_year": 1400 + i, "user_id": user_id})
 			assert resp.status_code == 201
+		# the database may hold other students; ours are the newest three
+		total, cursor = 0, None
+		while True:
+			resp = await ac.get("/api/v1/students/", params={"limit": 200, **({"cursor": cursor} if cursor else {})})
+			total += len(resp.json())
+			cursor = resp.headers.get("X-Next-Cursor")
+			if cursor is None:
+				break
 		# get first page limit=2
-		resp = await ac.get("/api/v1/students/?limit=2&offset=0")
+		resp = await ac.get(f"/api/v1/students/?limit=2&offset={total - 3}")
 		assert resp.status_code == 200
-		assert len(resp.json()) == 2
+		assert [s["student_no"] for s in resp.json()] == [f"P{k}-0", f"P{k}-1"]
 		# second page
-		resp = await ac.get("/api/v1/students/?limit=2&offset=2")
+		resp = await ac.get(f"/api/v1/students/?limit=2&offset={total - 1}")
 		assert resp.status_code == 200
-		assert len(resp.json()) == 1
+		assert [s["student_no"] for s in resp.json()] == [f"P{k}-2"]
+
+
+@pytest.mark.asyncio
+async def test_students_cursor_pagination():
+	k = uuid.uuid4().hex[:6]
+	ours = {f"C{k}-{i}" for i in range(5)}
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		for i in (3, 1, 4, 0, 2):
+			user_id = await _user_id(ac, f"cursor-{k}-{i}@test.com")
+			resp = await ac.post("/api/v1/students/", json={"student_no": f"C{k}-{i}", "entry_year": 1400, "user_id": user_id})
+			assert resp.status_code == 201
+
+		async def walk(sort):
+			seen, cursor = [], None
+			while True:
+				params = {"limit": 2, "sort": sort}
+				if cursor:
+					params["cursor"] = cursor
+				resp = await ac.get("/api/v1/students/", params=params)
+				assert resp.status_code == 200
+				seen += [s["student_no"] for s in resp.json() if s["student_no"] in ours]
+				cursor = resp.headers.get("X-Next-Cursor")
+				if cursor is None:
+					return seen
+
+		assert await walk("id") == [f"C{k}-{i}" for i in (3, 1, 4, 0, 2)]
+		assert await walk("student_no") == sorted(ours)
+
+		# every full page hands out a cursor, so only a short (possibly empty) page ends the walk
+		sizes, cursor = [], None
+		while True:
+			resp = await ac.get("/api/v1/students/", params={"limit": 5, **({"cursor": cursor} if cursor else {})})
+			sizes.append(len(resp.json()))
+			cursor = resp.headers.get("X-Next-Cursor")
+			if cursor is None:
+				break
+		assert all(size == 5 for size in sizes[:-1]) and sizes[-1] < 5
+		resp = await ac.get("/api/v1/students/", params={"limit": 5})
+		cursor = resp.headers["X-Next-Cursor"]
+
+		resp = await ac.get("/api/v1/students/", params={"cursor": "not-a-cursor"})
+		assert resp.status_code == 400
+		resp = await ac.get("/api/v1/students/", params={"cursor": cursor, "sort": "student_no"})
+		assert resp.status_code == 400
+		resp = await ac.get("/api/v1/students/", params={"sort": "full_name"})
+		assert resp.status_code == 400
+		# cursor values of the wrong type are refused rather than compared
+		for values in ([{"a": 1}], ["7"], [True], [None], [1.5]):
+			resp = await ac.get("/api/v1/students/", params={"cursor": encode_cursor("id", values)})
+			assert resp.status_code == 400
+		resp = await ac.get("/api/v1/students/", params={"cursor": encode_cursor("student_no", [5, 1]), "sort": "student_no"})
+		assert resp.status_code == 400
+
 
+def test_keyset_sort_columns_must_be_not_null():
+	from app.models import Student
+	with pytest.raises(ValueError):
+		_keyset([Student.full_name, Student.id])
+	assert _keyset([Student.student_no.desc(), Student.id])[0][1] is True
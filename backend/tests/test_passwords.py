@@ -0,0 +1,46 @@
+import uuid
+import pytest
+from httpx import AsyncClient
+from passlib.context import CryptContext
+from app.main import app
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.services.jobs import password_jobs
+from app.services.metrics import registry
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_passwords_with_old_work_factor():
+	email = f"oldhash-{uuid.uuid4().hex[:6]}@test.com"
+	old = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("testpass123")
+	db = SessionLocal()
+	try:
+		db.add(User(email=email, role="student", password_hash=old))
+		db.commit()
+	finally:
+		db.close()
+
+	verified = registry.get("password_verify_seconds").count
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		resp = await ac.post("/api/v1/auth/login", data={"username": email, "password": "testpass123"})
+		assert resp.status_code == 200
+	assert registry.get("password_verify_seconds").count == verified + 1
+
+	db = SessionLocal()
+	try:
+		stored = db.query(User.password_hash).filter(User.email == email).scalar()
+	finally:
+		db.close()
+	assert stored != old
+	assert stored.split("$")[2] == f"{settings.password_bcrypt_rounds:02d}"
+
+
+@pytest.mark.asyncio
+async def test_password_work_is_rejected_when_queue_is_full(monkeypatch):
+	monkeypatch.setattr(password_jobs, "_in_flight", password_jobs.max_workers + password_jobs.max_queue)
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		resp = await ac.post("/api/v1/auth/register", json={"email": "busy@test.com", "password": "testpass123"})
+	assert resp.status_code == 503
+	assert resp.headers["Retry-After"] == "1"
+	assert registry.get("password_queue_depth").value == password_jobs.max_queue
@@ -0,0 +1,57 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from app.main import app
+from app.db.session import engine
+from app.services.principal_cache import MemoryPrincipalBackend, Principal
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_is_bounded_and_expires(monkeypatch):
+	backend = MemoryPrincipalBackend(ttl_seconds=60, max_entries=2)
+	for i in range(3):
+		await backend.set(f"u{i}@test.com", Principal(id=i, email=f"u{i}@test.com", role="student"))
+	assert await backend.get("u0@test.com") is None
+	assert (await backend.get("u2@test.com")).id == 2
+
+	import app.services.principal_cache as module
+	now = module.time.monotonic()
+	monkeypatch.setattr(module.time, "monotonic", lambda: now + 61)
+	assert await backend.get("u2@test.com") is None
+
+
+@pytest.mark.asyncio
+async def test_role_checks_use_cache_and_follow_invalidation():
+	statements = []
+
+	def _record(conn, cursor, statement, parameters, context, executemany):
+		statements.append(statement)
+
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		resp = await ac.post("/api/v1/auth/register", json={"email": "cached@test.com", "username": "cached", "password": "testpass123", "role": "faculty"})
+		user_id = resp.json()["id"]
+		login_resp = await ac.post("/api/v1/auth/login", data={"username": "cached@test.com", "password": "testpass123"})
+		headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+
+		event.listen(engine, "before_cursor_execute", _record)
+		try:
+			resp = await ac.get("/api/v1/analytics/features/1", headers=headers)
+		finally:
+			event.remove(engine, "before_cursor_execute", _record)
+		assert resp.status_code == 200
+		assert not [s for s in statements if "FROM users" in s]
+
+		# a role change revokes issued tokens; a fresh token carries the new role
+		resp = await ac.patch(f"/api/v1/users/{user_id}", json={"role": "student"})
+		assert resp.status_code == 200
+		resp = await ac.get("/api/v1/analytics/features/1", headers=headers)
+		assert resp.status_code == 401
+		login_resp = await ac.post("/api/v1/auth/login", data={"username": "cached@test.com", "password": "testpass123"})
+		headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+		resp = await ac.get("/api/v1/analytics/features/1", headers=headers)
+		assert resp.status_code == 403
+
+		resp = await ac.delete(f"/api/v1/users/{user_id}")
+		assert resp.status_code == 204
+		resp = await ac.get("/api/v1/analytics/features/1", headers=headers)
+		assert resp.status_code == 401
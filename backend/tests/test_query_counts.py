@@ -0,0 +1,189 @@
+from contextlib import contextmanager
+import uuid
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from app.main import app
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import Course, Department, Enrollment, Grade, Student, User
+from app.services.response_cache import response_cache
+
+
+@contextmanager
+def count_statements():
+	"""Collect every SQL statement sent to the app's engine inside the block"""
+	statements = []
+
+	def _record(conn, cursor, statement, parameters, context, executemany):
+		statements.append(statement)
+
+	event.listen(engine, "before_cursor_execute", _record)
+	try:
+		yield statements
+	finally:
+		event.remove(engine, "before_cursor_execute", _record)
+
+
+@contextmanager
+def track_connections():
+	"""Track how many of the app's pooled connections are checked out at once inside the block"""
+	usage = {"in_use": 0, "peak": 0}
+
+	def _checkout(dbapi_connection, connection_record, connection_proxy):
+		usage["in_use"] += 1
+		usage["peak"] = max(usage["peak"], usage["in_use"])
+
+	def _checkin(dbapi_connection, connection_record):
+		usage["in_use"] -= 1
+
+	event.listen(engine, "checkout", _checkout)
+	event.listen(engine, "checkin", _checkin)
+	try:
+		yield usage
+	finally:
+		event.remove(engine, "checkout", _checkout)
+		event.remove(engine, "checkin", _checkin)
+
+
+def _seed():
+	Base.metadata.create_all(bind=engine)
+	k = uuid.uuid4().hex[:6]
+	db = SessionLocal()
+	try:
+		department = db.query(Department).filter_by(code="CS").one_or_none() or Department(name="Computer Science", code="CS")
+		courses = [Course(code=f"QC{k}-{i}", title=f"Query {i}", credits=3, department=department) for i in range(3)]
+		db.add_all(courses)
+		for i in range(5):
+			user = User(email=f"query-{k}-{i}@test.com", role="student", password_hash="x")
+			student = Student(student_no=f"Q{k}-{i}", user=user, department=department)
+			db.add(student)
+			db.flush()
+			for course in courses:
+				enrollment = Enrollment(student_id=student.id, course_id=course.id, term="1402-1")
+				db.add(enrollment)
+				db.flush()
+				db.add(Grade(enrollment_id=enrollment.id, value=15.0))
+		db.commit()
+		return {
+			"student": student.id,
+			"course": courses[0].id,
+			"enrollment": enrollment.id,
+			"grade": db.query(Grade.id).filter(Grade.enrollment_id == enrollment.id).scalar(),
+			"user": user.id,
+		}
+	finally:
+		db.close()
+
+
+# one SELECT per request: no joined or selectin relationships ride along
+MAX_STATEMENTS = {
+	"/api/v1/students/": 1,
+	"/api/v1/courses/": 1,
+	"/api/v1/enrollments/": 1,
+	"/api/v1/grades/": 1,
+	"/api/v1/users/": 1,
+	"/api/v1/students/{student}": 1,
+	"/api/v1/courses/{course}": 1,
+	"/api/v1/enrollments/{enrollment}": 1,
+	"/api/v1/grades/{grade}": 1,
+	"/api/v1/users/{user}": 1,
+}
+
+
+@pytest.mark.asyncio
+async def test_endpoint_statement_counts():
+	ids = _seed()
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		for route, limit in MAX_STATEMENTS.items():
+			# a cached response would pass with no statements at all
+			response_cache.clear()
+			with count_statements() as statements:
+				resp = await ac.get(route.format(**ids))
+			assert resp.status_code == 200, route
+			assert 1 <= len(statements) <= limit, (route, statements)
+		# the department code comes from a column, not the raise_on_sql relationship
+		resp = await ac.get(f"/api/v1/courses/{ids['course']}")
+		assert resp.json()["department"] == "CS"
+
+
+def test_user_display_name_reads_only_loaded_relationships():
+	from sqlalchemy.orm import selectinload
+	from app.schemas.user import UserOut
+	from app.services.loading import out_options
+
+	ids = _seed()
+	db = SessionLocal()
+	try:
+		user = db.query(User).options(*out_options(User, UserOut)).filter(User.id == ids["user"]).one()
+		assert user.display_name == user.email
+	finally:
+		db.close()
+	db = SessionLocal()
+	try:
+		user = db.query(User).options(selectinload(User.student)).filter(User.id == ids["user"]).one()
+		user.student.full_name = "Query Student"
+		assert user.display_name == "Query Student"
+	finally:
+		db.close()
+
+
+def test_relationships_raise_instead_of_loading():
+	from sqlalchemy.exc import InvalidRequestError
+
+	_seed()
+	db = SessionLocal()
+	try:
+		grade = db.query(Grade).first()
+		with pytest.raises(InvalidRequestError):
+			grade.enrollment
+	finally:
+		db.close()
+
+
+@pytest.mark.asyncio
+async def test_bulk_grade_sheet_statement_count():
+	Base.metadata.create_all(bind=engine)
+	db = SessionLocal()
+	try:
+		k = uuid.uuid4().hex[:6]
+		course = Course(code=f"SHEET{k}", title="Grade sheet", credits=3)
+		db.add(course)
+		db.flush()
+		enrollment_ids = []
+		for i in range(300):
+			student = Student(student_no=f"SH{k}-{i}", user=User(email=f"sheet-{k}-{i}@test.com", role="student", password_hash="x"))
+			db.add(student)
+			db.flush()
+			enrollment = Enrollment(student_id=student.id, course_id=course.id, term="1402-1")
+			db.add(enrollment)
+			db.flush()
+			enrollment_ids.append(enrollment.id)
+		db.commit()
+	finally:
+		db.close()
+
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		await ac.post("/api/v1/auth/register", json={"email": "sheet@test.com", "username": "sheet", "password": "testpass123", "role": "faculty"})
+		login_resp = await ac.post("/api/v1/auth/login", data={"username": "sheet@test.com", "password": "testpass123"})
+		headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+		sheet = [{"enrollment_id": e, "value": 15} for e in enrollment_ids]
+		with count_statements() as statements:
+			resp = await ac.post("/api/v1/grades/bulk", json=sheet, headers=headers)
+		assert resp.json()["succeeded"] == 300
+		# user lookup, enrollment lookup, INSERT, feature-store DELETE + INSERT
+		assert len(statements) <= 6, statements
+
+
+@pytest.mark.asyncio
+async def test_protected_write_uses_one_connection():
+	ids = _seed()
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		await ac.post("/api/v1/auth/register", json={"email": "conn@test.com", "username": "conn", "password": "testpass123", "role": "faculty"})
+		login_resp = await ac.post("/api/v1/auth/login", data={"username": "conn@test.com", "password": "testpass123"})
+		headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+		with track_connections() as usage:
+			resp = await ac.patch(f"/api/v1/grades/{ids['grade']}", json={"value": 17}, headers=headers)
+		assert resp.status_code == 200
+		# the user lookup in get_current_user and the handler share the request's session
+		assert usage["peak"] == 1
@@ -0,0 +1,92 @@
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.services.metrics import registry
+from app.services.rate_limit import LoginRateLimitMiddleware, MemoryBucketStore, RateLimit
+
+
+def _limited(ip_burst=100, account_burst=2):
+	return LoginRateLimitMiddleware(
+		app,
+		ip_limit=RateLimit(burst=ip_burst, per_minute=1),
+		account_limit=RateLimit(burst=account_burst, per_minute=1),
+		store=MemoryBucketStore(),
+	)
+
+
+@pytest.mark.asyncio
+async def test_account_bucket_throttles_before_password_check():
+	async with AsyncClient(app=_limited(), base_url="http://test") as ac:
+		await ac.post("/api/v1/auth/register", json={"email": "victim@test.com", "password": "testpass123"})
+		for _ in range(2):
+			resp = await ac.post("/api/v1/auth/login", data={"username": "victim@test.com", "password": "wrong-pass"})
+			assert resp.status_code == 401
+
+		verified = registry.get("password_verify_seconds").count
+		resp = await ac.post("/api/v1/auth/login", data={"username": " Victim@test.com", "password": "testpass123"})
+		assert resp.status_code == 429
+		assert int(resp.headers["Retry-After"]) >= 1
+		assert registry.get("password_verify_seconds").count == verified
+
+		# other accounts and other routes are unaffected; the replayed form still reaches the handler
+		await ac.post("/api/v1/auth/register", json={"email": "other@test.com", "password": "testpass123"})
+		resp = await ac.post("/api/v1/auth/login", data={"username": "other@test.com", "password": "testpass123"})
+		assert resp.status_code == 200
+		resp = await ac.get("/health")
+		assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_successful_logins_do_not_use_up_the_account_bucket():
+	async with AsyncClient(app=_limited(), base_url="http://test") as ac:
+		await ac.post("/api/v1/auth/register", json={"email": "regular@test.com", "password": "testpass123"})
+		form = {"username": "regular@test.com", "password": "testpass123"}
+		codes = [(await ac.post("/api/v1/auth/login", data=form)).status_code for _ in range(5)]
+		assert codes == [200] * 5
+
+		codes = [
+			(await ac.post("/api/v1/auth/login", data={**form, "password": "wrong-pass"})).status_code
+			for _ in range(3)
+		]
+		assert codes == [401, 401, 429]
+
+
+@pytest.mark.asyncio
+async def test_account_bucket_covers_multipart_and_refuses_odd_bodies():
+	async with AsyncClient(app=_limited(), base_url="http://test") as ac:
+		form = {"username": (None, "multipart@test.com"), "password": (None, "wrong-pass")}
+		codes = [(await ac.post("/api/v1/auth/login", files=form)).status_code for _ in range(3)]
+		assert codes == [401, 401, 429]
+
+		verified = registry.get("password_verify_seconds").count
+		padded = {"username": "padded@test.com", "password": "wrong-pass", "junk": "x" * 9000}
+		resp = await ac.post("/api/v1/auth/login", data=padded)
+		assert resp.status_code == 413
+		resp = await ac.post("/api/v1/auth/login", json={"username": "json@test.com", "password": "wrong-pass"})
+		assert resp.status_code == 400
+		resp = await ac.post(
+			"/api/v1/auth/login", content=b"username=a", headers={"Content-Type": "multipart/form-data"},
+		)
+		assert resp.status_code == 400
+		assert registry.get("password_verify_seconds").count == verified
+
+
+@pytest.mark.asyncio
+async def test_ip_bucket_throttles_any_account():
+	async with AsyncClient(app=_limited(ip_burst=3, account_burst=100), base_url="http://test") as ac:
+		codes = [
+			(await ac.post("/api/v1/auth/login", data={"username": f"u{i}@test.com", "password": "x"})).status_code
+			for i in range(4)
+		]
+	assert codes == [401, 401, 401, 429]
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_refills():
+	store = MemoryBucketStore()
+	limit = RateLimit(burst=1, per_minute=60)
+	assert await store.take("k", limit) == 0
+	wait = await store.take("k", limit)
+	assert 0 < wait <= 1
+	await store.refund("k", limit)
+	assert await store.take("k", limit) == 0
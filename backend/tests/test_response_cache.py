@@ -0,0 +1,88 @@
+import uuid
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from app.main import app
+from app.db.session import engine
+from app.services.metrics import registry
+
+
+async def _create_student(ac, student_no, **fields):
+	resp = await ac.post("/api/v1/auth/register", json={"email": f"{student_no.lower()}@test.com", "password": "testpass123", "role": "student"})
+	assert resp.status_code == 201
+	resp = await ac.post("/api/v1/students/", json={"student_no": student_no, "entry_year": 1400, "user_id": resp.json()["id"], **fields})
+	assert resp.status_code == 201
+	return resp
+
+
+async def _all_student_nos(ac):
+	seen, cursor = [], None
+	while True:
+		resp = await ac.get("/api/v1/students/", params={"limit": 200, **({"cursor": cursor} if cursor else {})})
+		seen += [s["student_no"] for s in resp.json()]
+		cursor = resp.headers.get("X-Next-Cursor")
+		if cursor is None:
+			return seen
+
+
+@pytest.mark.asyncio
+async def test_etag_304_and_server_cache():
+	student_no = f"ETAG{uuid.uuid4().hex[:6]}"
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		resp = await _create_student(ac, student_no, full_name="Cached")
+		student_id = resp.json()["id"]
+		url = f"/api/v1/students/{student_id}"
+
+		resp = await ac.get(url)
+		assert resp.status_code == 200
+		etag = resp.headers["ETag"]
+
+		statements = []
+
+		def _record(conn, cursor, statement, parameters, context, executemany):
+			statements.append(statement)
+
+		hits = registry.get("response_cache_hits_total").value
+		event.listen(engine, "before_cursor_execute", _record)
+		try:
+			resp = await ac.get(url, headers={"If-None-Match": etag})
+			assert resp.status_code == 304
+			assert resp.content == b""
+			resp = await ac.get(url)
+			assert resp.status_code == 200
+			assert resp.json()["student_no"] == student_no
+		finally:
+			event.remove(engine, "before_cursor_execute", _record)
+		assert statements == []
+		assert registry.get("response_cache_hits_total").value == hits + 2
+
+		# a write through the router invalidates the namespace
+		resp = await ac.patch(url, json={"full_name": "Cached, revised"})
+		assert resp.status_code == 200
+		resp = await ac.get(url, headers={"If-None-Match": etag})
+		assert resp.status_code == 200
+		assert resp.json()["full_name"] == "Cached, revised"
+		assert resp.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_list_cache_keeps_cursor_header_and_skips_errors():
+	k = uuid.uuid4().hex[:6]
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		for i in range(3):
+			await _create_student(ac, f"RC{k}-{i}")
+		first = await ac.get("/api/v1/students/", params={"limit": 2})
+		cached = await ac.get("/api/v1/students/", params={"limit": 2})
+		assert cached.json() == first.json()
+		assert cached.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+		# every cached page of the list is dropped when a student is added
+		before = await _all_student_nos(ac)
+		await _create_student(ac, f"RC{k}-3")
+		after = await _all_student_nos(ac)
+		assert f"RC{k}-3" not in before
+		assert after == before + [f"RC{k}-3"]
+
+		resp = await ac.get("/api/v1/students/999999")
+		assert resp.status_code == 404
+		assert "ETag" not in resp.headers
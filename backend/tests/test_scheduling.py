@@ -1,3 +1,4 @@
+import uuid
 import pytest
 from httpx import AsyncClient
 from app.main import app
@@ -50,3 +51,293 @@ async def test_scheduling_unscheduled_when_capacity_low():
 		data = resp.json()
 		assert data["unscheduled"] == ["SEC1"]
 
+
+
+def _contended_request(strategy: str) -> dict:
+	# SEC2's instructor can only teach in Sat-08, so taking sections in input
+	# order gives Sat-08 to SEC1 and leaves SEC2 without a slot
+	return {
+		"term": "1402-1",
+		"strategy": strategy,
+		"slots": ["Sat-08", "Sat-10"],
+		"sections": [
+			{"section_id": "SEC1", "course_code": "CS101", "instructor_id": "I1", "enrolled": 45},
+			{"section_id": "SEC2", "course_code": "CS102", "instructor_id": "I2", "enrolled": 45},
+			{"section_id": "SEC3", "course_code": "CS103", "instructor_id": "I3", "enrolled": 20},
+		],
+		"rooms": [
+			{"room_id": "BIG", "capacity": 50},
+			{"room_id": "SMALL", "capacity": 25},
+		],
+		"instructors": [
+			{"instructor_id": "I2", "available_slots": ["Sat-08"]},
+		],
+	}
+
+
+@pytest.mark.asyncio
+async def test_scheduling_strategies():
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		resp = await ac.post("/api/v1/scheduling/generate", json=_contended_request("first_fit"))
+		data = resp.json()
+		assert data["strategy"] == "first_fit"
+		assert data["placed"] == 2
+		assert data["unscheduled"] == ["SEC2"]
+
+		resp = await ac.post("/api/v1/scheduling/generate", json=_contended_request("most_constrained"))
+		data = resp.json()
+		assert data["placed"] == 3
+		assert data["unscheduled"] == []
+		placed = {i["section_id"]: (i["room_id"], i["slot"]) for i in data["items"]}
+		assert placed["SEC2"] == ("BIG", "Sat-08")
+		assert placed["SEC1"] == ("BIG", "Sat-10")
+		# best fit keeps the small section out of the big room
+		assert placed["SEC3"][0] == "SMALL"
+		assert data["solve_time_ms"] >= 0
+
+		resp = await ac.post("/api/v1/scheduling/generate", json=_contended_request("annealing"))
+		assert resp.status_code == 422
+
+
+def test_repair_moves_placed_section():
+	from app.schemas.scheduling import ScheduleRequest
+	from app.services.scheduling import constrained_schedule
+
+	req = ScheduleRequest(**_contended_request("repair"))
+	# input order alone leaves SEC2 out; the repair phase moves SEC1 to Sat-10
+	assert constrained_schedule(req, most_constrained=False, repair=False).unscheduled == ["SEC2"]
+	result = constrained_schedule(req, most_constrained=False, repair=True)
+	assert result.unscheduled == []
+	placed = {i.section_id: (i.room_id, i.slot) for i in result.items}
+	assert placed["SEC2"] == ("BIG", "Sat-08")
+	assert placed["SEC1"] == ("BIG", "Sat-10")
+
+
+@pytest.mark.asyncio
+async def test_scheduling_small_section_leaves_hall_free():
+	payload = {
+		"term": "1402-1",
+		"strategy": "first_fit",
+		"slots": ["Sat-08"],
+		"sections": [
+			{"section_id": "SEC1", "course_code": "CS101", "instructor_id": "I1", "enrolled": 30},
+			{"section_id": "SEC2", "course_code": "CS102", "instructor_id": "I2", "enrolled": 300},
+		],
+		"rooms": [
+			{"room_id": "HALL", "capacity": 400},
+			{"room_id": "R1", "capacity": 35},
+		],
+	}
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		resp = await ac.post("/api/v1/scheduling/generate", json=payload)
+		data = resp.json()
+		assert data["unscheduled"] == []
+		placed = {i["section_id"]: i["room_id"] for i in data["items"]}
+		assert placed == {"SEC1": "R1", "SEC2": "HALL"}
+
+
+@pytest.mark.asyncio
+async def test_scheduling_prevents_instructor_double_booking():
+	payload = {
+		"term": "1402-1",
+		"strategy": "first_fit",
+		"slots": ["Sat-08", "Sat-10"],
+		"sections": [
+			{"section_id": "SEC1", "course_code": "CS101", "instructor_id": "I1", "enrolled": 30},
+			{"section_id": "SEC2", "course_code": "CS102", "instructor_id": "I1", "enrolled": 30},
+			{"section_id": "SEC3", "course_code": "CS103", "instructor_id": "I1", "enrolled": 30},
+		],
+		"rooms": [
+			{"room_id": "R1", "capacity": 35},
+			{"room_id": "R2", "capacity": 35},
+		],
+	}
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		for strategy in ("first_fit", "best_fit", "most_constrained", "repair"):
+			payload["strategy"] = strategy
+			data = (await ac.post("/api/v1/scheduling/generate", json=payload)).json()
+			assert data["placed"] == 2
+			assert len(data["unscheduled"]) == 1
+			assert {i["slot"] for i in data["items"]} == {"Sat-08", "Sat-10"}
+
+
+def test_time_budget_only_limits_repair():
+	from app.schemas.scheduling import ScheduleRequest
+	from app.services.scheduling import constrained_schedule, greedy_schedule
+
+	# an overfull term: 3000 sections for 40 slots x 50 rooms
+	req = ScheduleRequest(
+		term="1402-1",
+		strategy="repair",
+		time_budget_ms=1,
+		slots=[f"S{i}" for i in range(40)],
+		rooms=[{"room_id": f"R{i}", "capacity": 20 + i} for i in range(50)],
+		sections=[
+			{"section_id": f"SEC{i}", "course_code": f"C{i}", "instructor_id": f"I{i % 700}", "enrolled": 10 + i % 60}
+			for i in range(3000)
+		],
+	)
+	construction = constrained_schedule(req, repair=False)
+	tight = constrained_schedule(req)
+	# construction runs to completion however small the budget
+	assert len(tight.items) >= len(construction.items) >= len(greedy_schedule(req).items) * 0.9
+
+
+@pytest.mark.asyncio
+async def test_scheduling_batch_of_terms():
+	terms = []
+	for term in ("1402-1", "1402-2", "1403-1"):
+		request = _contended_request("repair")
+		request["term"] = term
+		request["campus"] = "main"
+		terms.append(request)
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		resp = await ac.post("/api/v1/scheduling/generate/batch", json={"requests": terms})
+		assert resp.status_code == 200
+		data = resp.json()
+		assert [r["term"] for r in data["results"]] == ["1402-1", "1402-2", "1403-1"]
+		assert all(r["campus"] == "main" and r["unscheduled"] == [] for r in data["results"])
+		assert data["placed"] == 9
+		assert data["unscheduled"] == 0
+
+		resp = await ac.post("/api/v1/scheduling/generate/batch", json={"requests": []})
+		assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_reschedule_keeps_unaffected_sections_pinned():
+	base = {
+		"term": "1402-1",
+		"slots": ["Sat-08", "Sat-10"],
+		"sections": [
+			{"section_id": f"SEC{i}", "course_code": f"CS10{i}", "instructor_id": f"I{i}", "enrolled": 30}
+			for i in range(1, 5)
+		],
+		"rooms": [
+			{"room_id": "R1", "capacity": 35},
+			{"room_id": "R2", "capacity": 35},
+			{"room_id": "R3", "capacity": 80},
+		],
+	}
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		prior = (await ac.post("/api/v1/scheduling/generate", json=base)).json()
+		before = {i["section_id"]: (i["room_id"], i["slot"]) for i in prior["items"]}
+		assert before == {
+			"SEC1": ("R1", "Sat-08"), "SEC2": ("R1", "Sat-10"),
+			"SEC3": ("R2", "Sat-08"), "SEC4": ("R2", "Sat-10"),
+		}
+
+		# close R1 and grow SEC2 past the small rooms; SEC5 is new but no cell is left for it
+		delta = {
+			"remove_rooms": ["R1"],
+			"update_sections": [{"section_id": "SEC2", "course_code": "CS102", "instructor_id": "I2", "enrolled": 60}],
+			"add_sections": [{"section_id": "SEC5", "course_code": "CS105", "instructor_id": "I5", "enrolled": 20}],
+		}
+		resp = await ac.post("/api/v1/scheduling/reschedule", json={"base": base, "schedule": prior, "delta": delta})
+		assert resp.status_code == 200
+		data = resp.json()
+		after = {i["section_id"]: (i["room_id"], i["slot"]) for i in data["items"]}
+		assert data["strategy"] == "reschedule"
+		assert data["pinned"] == 2
+		assert sorted(data["changed"]) == ["SEC1", "SEC2"]
+		assert after["SEC3"] == before["SEC3"] and after["SEC4"] == before["SEC4"]
+		assert {after["SEC1"], after["SEC2"]} == {("R3", "Sat-08"), ("R3", "Sat-10")}
+		assert data["unscheduled"] == ["SEC5"]
+
+
+def test_reschedule_moves_pinned_sections_only_when_allowed():
+	from app.schemas.scheduling import RescheduleRequest
+	from app.services.scheduling import reschedule
+
+	base = {
+		"term": "1402-1",
+		"slots": ["Sat-08", "Sat-10"],
+		"sections": [{"section_id": "SEC1", "course_code": "CS101", "instructor_id": "I1", "enrolled": 20}],
+		"rooms": [{"room_id": "BIG", "capacity": 50}, {"room_id": "SMALL", "capacity": 25}],
+	}
+	prior = {"term": "1402-1", "items": [{"section_id": "SEC1", "room_id": "BIG", "slot": "Sat-08"}]}
+	delta = {
+		"add_sections": [{"section_id": "SEC2", "course_code": "CS102", "instructor_id": "I2", "enrolled": 45}],
+		"instructors": [{"instructor_id": "I2", "available_slots": ["Sat-08"]}],
+	}
+	result = reschedule(RescheduleRequest(base=base, schedule=prior, delta=delta))
+	assert result.unscheduled == ["SEC2"]
+	assert result.changed == []
+
+	delta["max_moves"] = 1
+	result = reschedule(RescheduleRequest(base=base, schedule=prior, delta=delta))
+	assert result.unscheduled == []
+	assert result.moves == 1
+	placed = {i.section_id: (i.room_id, i.slot) for i in result.items}
+	assert placed["SEC2"] == ("BIG", "Sat-08")
+	assert placed["SEC1"][0] == "SMALL"
+	assert sorted(result.changed) == ["SEC1", "SEC2"]
+
+
+def test_course_conflict_graph_and_room_splitting():
+	import numpy as np
+	from app.schemas.scheduling import Room
+	from app.services.exam_scheduling import course_conflict_graph, dsatur_exam_slots
+
+	# (student, course); the repeated (1, 10) pair must count once
+	pairs = np.array([(1, 10), (1, 10), (1, 20), (2, 20), (2, 30), (3, 30), (4, 30)])
+	courses, sizes, adjacency = course_conflict_graph(pairs)
+	assert courses.tolist() == [10, 20, 30]
+	assert sizes.tolist() == [1, 2, 3]
+	assert adjacency.toarray().tolist() == [[0, 1, 0], [1, 0, 1], [0, 1, 0]]
+
+	rooms = [Room(room_id="R1", capacity=1), Room(room_id="R2", capacity=2)]
+	slot_of, placements = dsatur_exam_slots(adjacency, sizes, rooms, n_slots=2)
+	assert slot_of[0] != slot_of[1] and slot_of[1] != slot_of[2]
+	# course 30 has 3 students and is spread over both rooms
+	assert sorted(placements[2]) == [("R1", 1), ("R2", 2)]
+
+	slot_of, _ = dsatur_exam_slots(adjacency, sizes, rooms, n_slots=2, split_rooms=False)
+	assert slot_of[2] == -1
+
+
+@pytest.mark.asyncio
+async def test_exam_schedule_from_enrollments():
+	from app.db.base import Base
+	from app.db.session import SessionLocal, engine
+	from app.models import Course, Enrollment, Student, User
+
+	Base.metadata.create_all(bind=engine)
+	k = uuid.uuid4().hex[:6]
+	term = f"T{k}"
+	db = SessionLocal()
+	try:
+		courses = [Course(code=f"EX{k}-{i}", title=f"Exam {i}", credits=3) for i in range(3)]
+		db.add_all(courses)
+		for i, taken in enumerate([(0, 1), (1, 2)]):
+			student = Student(student_no=f"EX{k}-{i}", user=User(email=f"exam-{k}-{i}@test.com", role="student", password_hash="x"))
+			db.add(student)
+			db.flush()
+			db.add_all(Enrollment(student_id=student.id, course_id=courses[c].id, term=term) for c in taken)
+		db.commit()
+	finally:
+		db.close()
+
+	payload = {
+		"term": term,
+		"slots": ["Exam-1", "Exam-2"],
+		"rooms": [{"room_id": "R1", "capacity": 1}, {"room_id": "R2", "capacity": 2}],
+	}
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		resp = await ac.post("/api/v1/scheduling/exams", json=payload)
+		assert resp.status_code == 401
+		await ac.post("/api/v1/auth/register", json={"email": f"exams-{k}@test.com", "password": "testpass123", "role": "faculty"})
+		login_resp = await ac.post("/api/v1/auth/login", data={"username": f"exams-{k}@test.com", "password": "testpass123"})
+		headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+		resp = await ac.post("/api/v1/scheduling/exams", json=payload, headers=headers)
+		assert resp.status_code == 200
+		data = resp.json()
+	assert data["courses"] == 3
+	assert data["conflicts"] == 2
+	assert data["unscheduled"] == []
+	slot = {item["course_code"]: item["slot"] for item in data["items"]}
+	# EX1 shares a student with both others, which can share a slot
+	assert slot[f"EX{k}-0"] == slot[f"EX{k}-2"] != slot[f"EX{k}-1"]
+	assert data["slots_used"] == 2
+	students = {item["course_code"]: item["students"] for item in data["items"]}
+	assert students == {f"EX{k}-0": 1, f"EX{k}-1": 2, f"EX{k}-2": 1}
@@ -0,0 +1,81 @@
+import uuid
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import AtRiskScore, Course, Enrollment, Grade, Student, User
+from app.schemas.analytics import ScoringRunRequest
+from app.services.scoring import run_scoring_job
+
+
+def _seed(db):
+	"""Two graded students in a term of their own, one ungraded and one outside the term; returns (term, good, weak)"""
+	k = uuid.uuid4().hex[:6]
+	term = f"T{k}"
+	courses = [Course(code=f"SC{k}-{i}", title=f"Scoring {i}", credits=3) for i in range(4)]
+	db.add_all(courses)
+	students = []
+	for i, grades in enumerate([[18.0, 17.5, 19.0, 16.0], [8.0, 9.5, 7.0, 12.0]]):
+		user = User(email=f"scoring-{k}-{i}@test.com", role="student", password_hash="x")
+		student = Student(student_no=f"SC{k}-{i}", user=user)
+		db.add(student)
+		db.flush()
+		for course, value in zip(courses, grades):
+			enr = Enrollment(student_id=student.id, course_id=course.id, term=term)
+			db.add(enr)
+			db.flush()
+			db.add(Grade(enrollment_id=enr.id, value=value))
+		students.append(student)
+	# enrolled but no grades and no gpa: cannot be scored
+	empty = Student(student_no=f"SC{k}-empty", user=User(email=f"scoring-{k}-empty@test.com", role="student", password_hash="x"))
+	db.add(empty)
+	db.flush()
+	db.add(Enrollment(student_id=empty.id, course_id=courses[0].id, term=term))
+	# has a gpa but is not enrolled in the term, so it is not scored for it
+	db.add(Student(student_no=f"SC{k}-away", gpa=15.0, user=User(email=f"scoring-{k}-away@test.com", role="student", password_hash="x")))
+	db.commit()
+	return (term, *students)
+
+
+def test_scoring_job_scores_from_database():
+	Base.metadata.create_all(bind=engine)
+	db = SessionLocal()
+	try:
+		term, good, weak = _seed(db)
+		result = run_scoring_job(db, ScoringRunRequest(term=term, chunk_size=1))
+		assert result.scored == 2
+		assert result.skipped == 1
+
+		scores = {s.student_id: s for s in db.query(AtRiskScore).filter(AtRiskScore.run_id == result.run_id)}
+		assert set(scores) == {good.id, weak.id}
+		assert scores[weak.id].risk_score > scores[good.id].risk_score
+		assert "multiple_failures" in scores[weak.id].factors
+		assert scores[good.id].factors == []
+	finally:
+		db.close()
+
+
+def test_feature_store_incremental_refresh_matches_rebuild():
+	from app.models import StudentFeature
+	from app.services.feature_store import rebuild_student_features, refresh_student_features
+
+	Base.metadata.create_all(bind=engine)
+	db = SessionLocal()
+	try:
+		term, good, weak = _seed(db)
+		refresh_student_features(db, [(good.id, term), (weak.id, term)])
+		db.commit()
+		row = db.get(StudentFeature, (weak.id, term))
+		assert (row.enrolled_courses, row.graded_courses, row.failed_courses, row.credit_hours) == (4, 4, 3, 12)
+		assert row.grade_sum == 36.5
+
+		ours = StudentFeature.student_id.in_([good.id, weak.id])
+		incremental = {(f.student_id, f.term): (f.grade_sum, f.failed_courses) for f in db.query(StudentFeature).filter(ours)}
+		assert len(incremental) == 2
+		rebuild_student_features(db)
+		rebuilt = {(f.student_id, f.term): (f.grade_sum, f.failed_courses) for f in db.query(StudentFeature).filter(ours)}
+		assert incremental == rebuilt
+
+		live = run_scoring_job(db, ScoringRunRequest(term=term))
+		stored = run_scoring_job(db, ScoringRunRequest(term=term, source="store"))
+		assert (live.scored, live.skipped, live.risk_levels) == (stored.scored, stored.skipped, stored.risk_levels)
+	finally:
+		db.close()
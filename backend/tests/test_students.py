@@ -1,4 +1,5 @@
 import os
+import uuid
 import pytest
 from httpx import AsyncClient
 from app.main import app
@@ -11,19 +12,34 @@ def _sqlite_tmp(monkeypatch, tmp_path):
 	yield
 
 
+async def _listed_ids(ac):
+	ids, cursor = [], None
+	while True:
+		resp = await ac.get("/api/v1/students/", params={"limit": 200, **({"cursor": cursor} if cursor else {})})
+		assert resp.status_code == 200
+		ids += [s["id"] for s in resp.json()]
+		cursor = resp.headers.get("X-Next-Cursor")
+		if cursor is None:
+			return ids
+
+
 @pytest.mark.asyncio
 async def test_students_crud():
+	k = uuid.uuid4().hex[:6]
 	async with AsyncClient(app=app, base_url="http://test") as ac:
-		# list empty
-		resp = await ac.get("/api/v1/students/")
-		assert resp.status_code == 200
-		assert resp.json() == []
+		user = await ac.post("/api/v1/auth/register", json={"email": f"student-{k}@test.com", "password": "testpass123", "role": "student"})
+		assert user.status_code == 201
 		# create
-		payload = {"student_no": "S1001", "entry_year": 1402, "full_name": "Test Student"}
+		payload = {"student_no": f"S{k}", "entry_year": 1402, "full_name": "Test Student", "user_id": user.json()["id"]}
 		resp = await ac.post("/api/v1/students/", json=payload)
 		assert resp.status_code == 201
 		data = resp.json()
 		student_id = data["id"]
+		# the user already has a student record; unknown users are rejected
+		resp = await ac.post("/api/v1/students/", json={**payload, "student_no": f"S{k}-2"})
+		assert resp.status_code == 409
+		resp = await ac.post("/api/v1/students/", json={**payload, "student_no": f"S{k}-3", "user_id": 10**9})
+		assert resp.status_code == 404
 		# get
 		resp = await ac.get(f"/api/v1/students/{student_id}")
 		assert resp.status_code == 200
@@ -31,14 +47,11 @@ async def test_students_crud():
 		resp = await ac.patch(f"/api/v1/students/{student_id}", json={"full_name": "Updated"})
 		assert resp.status_code == 200
 		assert resp.json()["full_name"] == "Updated"
-		# list one
-		resp = await ac.get("/api/v1/students/")
-		assert resp.status_code == 200
-		assert len(resp.json()) == 1
+		# listed once
+		assert (await _listed_ids(ac)).count(student_id) == 1
 		# delete
 		resp = await ac.delete(f"/api/v1/students/{student_id}")
 		assert resp.status_code == 204
-		# list empty again
-		resp = await ac.get("/api/v1/students/")
-		assert resp.status_code == 200
-		assert resp.json() == []
+		resp = await ac.get(f"/api/v1/students/{student_id}")
+		assert resp.status_code == 404
+		assert student_id not in await _listed_ids(ac)
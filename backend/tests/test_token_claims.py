@@ -0,0 +1,114 @@
+import asyncio
+import uuid
+import pytest
+from httpx import AsyncClient
+from jose import jwt
+from sqlalchemy import event
+from app.main import app
+from app.core.config import settings
+from app.db.session import engine
+from app.services.principal_cache import principal_cache
+from app.services.tokens import create_access_token
+
+
+async def _login(ac, email, role):
+	resp = await ac.post("/api/v1/auth/register", json={"email": email, "username": email.split("@")[0], "password": "testpass123", "role": role})
+	login_resp = await ac.post("/api/v1/auth/login", data={"username": email, "password": "testpass123"})
+	return resp.json()["id"], login_resp.json()["access_token"]
+
+
+@pytest.mark.asyncio
+async def test_token_carries_role_claims_and_reads_skip_the_database():
+	email = f"user-{uuid.uuid4().hex[:6]}@test.com"
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		user_id, token = await _login(ac, email, "faculty")
+		claims = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+		assert (claims["uid"], claims["role"]) == (user_id, "faculty")
+		assert isinstance(claims["tv"], int)
+
+		statements = []
+
+		def _record(conn, cursor, statement, parameters, context, executemany):
+			statements.append(statement)
+
+		# no cached principal: the claims and the version record written at login authorize a read
+		await principal_cache.invalidate(email)
+		event.listen(engine, "before_cursor_execute", _record)
+		try:
+			resp = await ac.get("/api/v1/analytics/jobs/missing", headers={"Authorization": f"Bearer {token}"})
+			assert resp.status_code == 404
+			assert statements == []
+
+			# without a version record the claims are not trusted on their own
+			await principal_cache.clear()
+			resp = await ac.get("/api/v1/analytics/jobs/missing", headers={"Authorization": f"Bearer {token}"})
+			assert resp.status_code == 404
+			assert len(statements) == 1
+		finally:
+			event.remove(engine, "before_cursor_execute", _record)
+
+
+@pytest.mark.asyncio
+async def test_revoked_tokens_are_rejected_on_reads_and_writes():
+	email = f"user-{uuid.uuid4().hex[:6]}@test.com"
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		user_id, token = await _login(ac, email, "faculty")
+		headers = {"Authorization": f"Bearer {token}"}
+		resp = await ac.patch(f"/api/v1/users/{user_id}", json={"password": "newpass123"})
+		assert resp.status_code == 200
+
+		resp = await ac.get("/api/v1/analytics/jobs/missing", headers=headers)
+		assert resp.status_code == 401
+		# with the revocation record gone, reads and writes check the version in the database
+		await principal_cache.clear()
+		resp = await ac.get("/api/v1/analytics/jobs/missing", headers=headers)
+		assert resp.status_code == 401
+		resp = await ac.post("/api/v1/grades/bulk", json=[{"enrollment_id": 1, "value": 10}], headers=headers)
+		assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_tokens_without_claims_still_authorize_via_lookup():
+	email = f"user-{uuid.uuid4().hex[:6]}@test.com"
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		await _login(ac, email, "faculty")
+		legacy = create_access_token(email)
+		resp = await ac.get("/api/v1/analytics/jobs/missing", headers={"Authorization": f"Bearer {legacy}"})
+		assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_inactive_users_cannot_log_in_or_read_with_old_tokens():
+	from sqlalchemy import update
+	from app.db.session import SessionLocal
+	from app.models.user import User
+
+	email = f"user-{uuid.uuid4().hex[:6]}@test.com"
+	async with AsyncClient(app=app, base_url="http://test") as ac:
+		user_id, token = await _login(ac, email, "faculty")
+		headers = {"Authorization": f"Bearer {token}"}
+		db = SessionLocal()
+		try:
+			db.execute(update(User).where(User.id == user_id).values(is_active=False))
+			db.commit()
+			user = db.get(User, user_id)
+			# what the next login or lookup would record for this account
+			await principal_cache.record_user(user)
+		finally:
+			db.close()
+		resp = await ac.get("/api/v1/analytics/jobs/missing", headers=headers)
+		assert resp.status_code == 401
+		await principal_cache.clear()
+		resp = await ac.get("/api/v1/analytics/jobs/missing", headers=headers)
+		assert resp.status_code == 401
+		resp = await ac.post("/api/v1/auth/login", data={"username": email, "password": "testpass123"})
+		assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_version_records_expire_with_the_principal_ttl(monkeypatch):
+	monkeypatch.setattr(settings, "principal_cache_ttl_seconds", 0.05)
+	await principal_cache.record_token_version(987654, 3)
+	assert await principal_cache.current_token_version(987654) == 3
+	await asyncio.sleep(0.1)
+	assert await principal_cache.current_token_version(987654) is None